@@ -0,0 +1,144 @@
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# 에어코리아 시도별 실시간 측정정보 API가 받는 시도명 (17개 시도)
+AIRKOREA_SIDOS = [
+    "서울", "부산", "대구", "인천", "광주", "대전", "울산", "세종", "경기",
+    "강원", "충북", "충남", "전북", "전남", "경북", "경남", "제주",
+]
+
+KST = timezone(timedelta(hours=9))
+
+
+class AirKoreaSnapshot:
+    """
+    전국 측정소의 시간별 미세먼지 측정값을 메모리에 보관합니다.
+    측정 시간마다 17개 시도를 페이지 단위로 한 번에 받아오고, 날씨 요청은 이 스냅샷만 읽습니다.
+    """
+
+    def __init__(self, fetch_page, sidos=AIRKOREA_SIDOS, page_size=100, publish_delay_minutes=20):
+        # fetch_page(sido, page_no, num_rows) -> (측정소 리스트, totalCount)
+        self.fetch_page = fetch_page
+        self.sidos = list(sidos)
+        self.page_size = page_size
+        # 정시 측정값은 보통 15~20분 뒤 공개되므로, 정시 + publish_delay_minutes 에 갱신
+        self.publish_delay_minutes = publish_delay_minutes
+        self._stations = {} # 시도명 -> 측정소 리스트
+        self._by_station = {} # 시도명 -> {측정소명: 측정값}
+        self._fetched_at = {} # 시도명 -> 마지막 갱신 시각
+        self._data_time = {} # 시도명 -> 측정 시각 (API의 dataTime)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def fetch_sido(self, sido):
+        """한 시도의 모든 측정소를 페이지 단위로 받아옵니다."""
+        stations = []
+        page_no = 1
+        while True:
+            items, total_count = self.fetch_page(sido, page_no, self.page_size)
+            stations.extend(items)
+            if not items or len(stations) >= total_count:
+                break
+            page_no += 1
+        return stations
+
+    def refresh_sido(self, sido):
+        """한 시도의 스냅샷을 갱신합니다. 실패하면 기존 스냅샷을 유지하고 False를 반환합니다."""
+        try:
+            stations = self.fetch_sido(sido)
+        except Exception as e:
+            print(f"Error refreshing Airkorea snapshot for {sido}: {e}")
+            sys.stdout.flush()
+            return False
+        if not stations:
+            return False
+        with self._lock:
+            self._stations[sido] = stations
+            self._by_station[sido] = {s.get("stationName"): s for s in stations}
+            self._fetched_at[sido] = time.time()
+            self._data_time[sido] = max((s.get("dataTime") or "" for s in stations), default="")
+        return True
+
+    def refresh_all(self):
+        start_time = time.time()
+        refreshed = sum(1 for sido in self.sidos if self.refresh_sido(sido))
+        station_count = sum(len(v) for v in self._stations.values())
+        print(f"Airkorea snapshot refreshed {refreshed}/{len(self.sidos)} sidos ({station_count} stations) in {time.time() - start_time:.2f} seconds.")
+        sys.stdout.flush()
+        return refreshed
+
+    def get_sido(self, sido):
+        """
+        시도의 측정소 리스트를 반환합니다.
+        스냅샷에 해당 시도가 아직 없을 때(기동 직후 등)만 그 시도를 즉시 받아옵니다.
+        """
+        stations = self._stations.get(sido)
+        if stations is None:
+            self.refresh_sido(sido)
+            stations = self._stations.get(sido, [])
+        return stations
+
+    def is_loaded(self, sido):
+        """시도 스냅샷이 이미 메모리에 있는지 (조회 시 API 호출이 필요 없는지) 확인합니다."""
+        return sido in self._by_station
+
+    def get_station(self, sido, station_name):
+        """시도 스냅샷에서 특정 측정소의 측정값을 반환합니다. 없으면 None."""
+        if sido not in self._by_station:
+            self.get_sido(sido)
+        return self._by_station.get(sido, {}).get(station_name)
+
+    def age(self, sido):
+        """시도 스냅샷이 마지막으로 갱신된 뒤 지난 시간(초). 한 번도 받지 못했으면 None."""
+        fetched_at = self._fetched_at.get(sido)
+        return time.time() - fetched_at if fetched_at is not None else None
+
+    def status(self):
+        now = time.time()
+        return {
+            sido: {
+                "stations": len(self._stations.get(sido, [])),
+                "data_time": self._data_time.get(sido),
+                "age": now - self._fetched_at[sido] if sido in self._fetched_at else None,
+            }
+            for sido in self.sidos
+        }
+
+    def seconds_until_next_refresh(self, now=None):
+        """다음 정시 + publish_delay_minutes 까지 남은 초를 계산합니다."""
+        now = now or datetime.now(KST)
+        target = now.replace(minute=self.publish_delay_minutes, second=0, microsecond=0)
+        if target <= now:
+            target += timedelta(hours=1)
+        return (target - now).total_seconds()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="airkorea-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                refreshed = self.refresh_all()
+            except Exception as e:
+                refreshed = 0
+                print(f"Error in Airkorea snapshot refresher: {e}")
+                sys.stdout.flush()
+            # 일부 시도라도 실패했으면 10분 뒤 재시도, 아니면 다음 측정 시간까지 대기
+            delay = 600 if refreshed < len(self.sidos) else self.seconds_until_next_refresh()
+            self._stop.wait(delay)
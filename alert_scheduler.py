@@ -0,0 +1,263 @@
+"""
+'알림 받기' 다이제스트 발송 스케줄러입니다.
+발송 시간대가 되면 그 시간대에 구독자가 있는 주제마다 다이제스트를 한 번만 만들고,
+구독자를 묶음(batch)으로 나누어 제한된 동시성과 초당 발송량 제한 안에서 sender로 보냅니다.
+
+sender는 send_batch(user_ids, digest) -> 실패한 user_id 리스트 를 구현하면 됩니다.
+실제 발송은 KakaoEventSender(카카오 챗봇 이벤트 API), 테스트·벤치마크는 FakeSender를 사용합니다.
+"""
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+import upstream
+from subscription_store import SLOT_MINUTES
+
+KST = timezone(timedelta(hours=9))
+
+KAKAO_EVENT_API_URL = "https://bot-api.kakao.com/v2/bots/{bot_id}/talk"
+
+
+def current_slot(now=None):
+    """지금(KST)이 속한 발송 시간대를 (날짜, 'HH:MM', 시간대 시작 후 지난 초)로 반환합니다."""
+    now = now or datetime.now(KST)
+    minute = now.minute - now.minute % SLOT_MINUTES
+    started = now.replace(minute=minute, second=0, microsecond=0)
+    return now.strftime("%Y%m%d"), f"{now.hour:02d}:{minute:02d}", (now - started).total_seconds()
+
+
+class RateLimiter:
+    """초당 rate개까지 허용하는 토큰 버킷입니다. acquire(n)은 토큰이 모일 때까지 기다립니다."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # 버킷보다 큰 묶음은 버킷이 가득 찼을 때 빚을 지고 가져감 (평균 발송량은 rate로 유지)
+                needed = min(n, self.capacity)
+                if self._tokens >= needed:
+                    self._tokens -= n
+                    return
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class KakaoEventSender:
+    """카카오 챗봇 이벤트 API로 다이제스트를 보냅니다. 요청 하나에 최대 100명까지 보낼 수 있습니다."""
+
+    max_batch_size = 100
+
+    def __init__(self, bot_id, rest_api_key, event_name="news_digest", timeout=5):
+        self.url = KAKAO_EVENT_API_URL.format(bot_id=bot_id)
+        self.headers = {"Authorization": f"KakaoAK {rest_api_key}"}
+        self.event_name = event_name
+        self.timeout = timeout
+
+    def send_batch(self, user_ids, digest):
+        # 이벤트 블록은 data의 문자열 값을 파라미터로 받아 말풍선을 만듦
+        res = upstream.post(self.url, json={
+            "event": {"name": self.event_name, "data": {k: digest[k] for k in ("topic", "title", "text")}},
+            "user": [{"type": "botUserKey", "id": user_id} for user_id in user_ids],
+        }, headers=self.headers, timeout=self.timeout)
+        res.raise_for_status()
+        return []
+
+
+class FakeSender:
+    """
+    실제로 보내지 않고 받은 묶음을 세는 가짜 sender입니다. (테스트·벤치마크용)
+    latency초 지연과, fail_every번째 사용자마다 발송 실패를 흉내 낼 수 있습니다.
+    """
+
+    max_batch_size = 100
+
+    def __init__(self, latency=0.0, fail_every=0, keep=False):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.keep = keep
+        self.deliveries = [] # keep=True일 때 (주제, user_id 리스트)
+        self.batches = 0
+        self.sent = 0
+        self._lock = threading.Lock()
+
+    def send_batch(self, user_ids, digest):
+        if self.latency:
+            time.sleep(self.latency)
+        failed = user_ids[::self.fail_every] if self.fail_every else []
+        with self._lock:
+            self.batches += 1
+            self.sent += len(user_ids) - len(failed)
+            if self.keep:
+                self.deliveries.append((digest["topic"], list(user_ids)))
+        return failed
+
+
+class DigestScheduler:
+    """
+    시간대별 다이제스트 발송기입니다.
+    build_digest(topic) -> 다이제스트 dict(topic/title/text 포함, 보낼 것이 없으면 None)는 시간대·주제마다 한 번만 호출됩니다.
+    워커 여러 개가 각자 스케줄러를 돌려도 (날짜, 시간대, 주제)마다 store.claim_slot()을 얻은 프로세스 하나만 발송합니다.
+    """
+
+    def __init__(self, store, build_digest, sender, batch_size=100, concurrency=8, rate_limit=1000,
+                 poll_interval=30, grace=300):
+        self.store = store
+        self.build_digest = build_digest
+        self.sender = sender
+        self.batch_size = min(batch_size, getattr(sender, "max_batch_size", batch_size))
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.poll_interval = poll_interval
+        self.grace = grace # 시간대 시작 후 이 시간(초)이 지나서 처음 확인한 시간대는 늦은 발송 대신 건너뜀
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="alert-sender")
+        self._lock = threading.Lock()
+        self._last_slot = None # 마지막으로 처리한 (날짜, 시간대)
+        self._thread = None
+        self.recent_runs = deque(maxlen=50)
+        self.delivered = 0
+        self.failed = 0
+        self.claimed_elsewhere = 0 # 다른 프로세스가 먼저 가져가서 건너뛴 (시간대, 주제) 수
+
+    def run_due(self, now=None):
+        """현재 시간대를 아직 처리하지 않았으면 발송합니다. 같은 시간대는 한 번만 처리합니다."""
+        date, slot, elapsed = current_slot(now)
+        with self._lock:
+            if self._last_slot == (date, slot):
+                return []
+            self._last_slot = (date, slot)
+        if elapsed > self.grace:
+            print(f"Skipping alert slot {date} {slot}: first checked {elapsed:.0f}s after it started.")
+            sys.stdout.flush()
+            return []
+        results, unbuilt = self._run_slot(slot, date)
+        if unbuilt:
+            # 다이제스트를 만들지 못한 주제가 있으면 다음 확인 때(유예 시간 안에서) 그 주제만 다시 시도
+            with self._lock:
+                self._last_slot = None
+        return results
+
+    def run_slot(self, slot, date=None):
+        """
+        시간대의 모든 주제에 대해 다이제스트를 한 번씩 만들고 구독자에게 보냅니다.
+        date(기본: 오늘, KST)의 같은 시간대·주제를 다른 프로세스가 이미 가져갔으면 건너뜁니다.
+        """
+        return self._run_slot(slot, date)[0]
+
+    def _run_slot(self, slot, date=None):
+        """run_slot과 같고, 다이제스트를 만들지 못해 발송하지 않은(다시 시도할 수 있는) 주제 수를 함께 반환합니다."""
+        date = date or datetime.now(KST).strftime("%Y%m%d")
+        results = []
+        unbuilt = 0
+        for topic in self.store.topics_for_slot(slot):
+            if self.store.slot_claimed(date, slot, topic):
+                with self._lock:
+                    self.claimed_elsewhere += 1
+                continue
+            # 보낼 다이제스트가 생긴 뒤에만 선점: 만들기에 실패한 주제는 선점 기록이 남지 않아 다른 워커나 다음 확인이 다시 시도
+            try:
+                digest = self.build_digest(topic)
+            except Exception as e:
+                print(f"Error building alert digest for '{topic}': {e}")
+                sys.stdout.flush()
+                unbuilt += 1
+                continue
+            if not digest:
+                print(f"No alert digest for '{topic}' at {slot}; will retry.")
+                sys.stdout.flush()
+                unbuilt += 1
+                continue
+            if not self.store.claim_slot(date, slot, topic):
+                with self._lock:
+                    self.claimed_elsewhere += 1
+                continue
+            results.append(self.fan_out(topic, slot, digest))
+        return results, unbuilt
+
+    def _send(self, batch, digest):
+        if self.limiter is not None:
+            self.limiter.acquire(len(batch))
+        try:
+            return len(batch), len(self.sender.send_batch(batch, digest))
+        except Exception as e:
+            print(f"Error sending alert batch of {len(batch)} for '{digest.get('topic')}': {e}")
+            sys.stdout.flush()
+            return len(batch), len(batch)
+
+    def fan_out(self, topic, slot, digest):
+        """구독자를 묶음으로 나누어 동시에 보냅니다. 대기 중인 묶음 수를 제한하여 구독자 목록을 한 번에 읽지 않습니다."""
+        start_time = time.time()
+        recipients = failed = 0
+        pending = set()
+
+        def collect(futures):
+            nonlocal recipients, failed
+            for future in futures:
+                batch_recipients, batch_failed = future.result()
+                recipients += batch_recipients
+                failed += batch_failed
+
+        for batch in self.store.iter_subscribers(topic, slot, batch_size=self.batch_size):
+            if len(pending) >= self.concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(self._executor.submit(self._send, batch, digest))
+        collect(wait(pending)[0])
+
+        elapsed = time.time() - start_time
+        result = {
+            "topic": topic,
+            "slot": slot,
+            "recipients": recipients,
+            "delivered": recipients - failed,
+            "failed": failed,
+            "elapsed": round(elapsed, 3),
+            "messages_per_second": round((recipients - failed) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        with self._lock:
+            self.delivered += recipients - failed
+            self.failed += failed
+            self.recent_runs.append(result)
+        print(f"Alert digest '{topic}' at {slot}: {result['delivered']}/{recipients} delivered in {elapsed:.2f} seconds "
+              f"({result['messages_per_second']} msg/s).")
+        sys.stdout.flush()
+        return result
+
+    def start(self):
+        """poll_interval초마다 발송할 시간대가 되었는지 확인하는 백그라운드 스레드를 시작합니다. 여러 번 호출해도 한 번만 시작합니다."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="alert-scheduler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_due()
+            except Exception as e:
+                print(f"Error in alert scheduler: {e}")
+                sys.stdout.flush()
+            time.sleep(self.poll_interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "last_slot": " ".join(self._last_slot) if self._last_slot else None,
+                "delivered": self.delivered,
+                "failed": self.failed,
+                "claimed_elsewhere": self.claimed_elsewhere,
+                "recent_runs": list(self.recent_runs)[-10:],
+            }
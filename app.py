@@ -1,53 +1,100 @@
-from flask import Flask, jsonify, request
-import feedparser
+from flask import Flask, Response, g, jsonify, request
 import requests
-from bs4 import BeautifulSoup
 import re
 from datetime import datetime, timedelta, timezone
 import json
 import sys # sys 모듈 임포트 (print 플러시용)
 import urllib.parse # URL 디코딩을 위해 추가
 import time # 시간 측정을 위해 time 모듈 임포트
+import os
+import threading
+import calendar
+import tempfile
+import hashlib
+import hmac
+from concurrent.futures import ThreadPoolExecutor, wait
+from feed_cache import FeedCache
+from circuit_breaker import CircuitBreaker
+from text_utils import normalize_keyword, strip_search_fillers
+from article_index import ArticleIndex
+from response_cache import RenderedResponseCache, etag_matches
+from thumb_cache import ThumbnailCache, image_content_type
+from callback import CallbackDispatcher, callback_ack_payload
+from subscription_store import SubscriptionStore, normalize_slot
+from alert_scheduler import DigestScheduler, FakeSender, KakaoEventSender
+from cache_utils import LRUTTLCache, SingleFlight, TTLCache
+from cache_backend import TieredCache, open_backend
+from airkorea_snapshot import AIRKOREA_SIDOS, AirKoreaSnapshot
+from region_index import RegionIndex, load_region_index, normalize_region_name, parse_latlon
+from station_index import StationIndex
+from weather_prefetch import WeatherPrefetcher
+import upstream
+import metrics
+import request_deadline
+from relevance import RelevanceRanker, default_model_client
+from scraper import HTML_PARSER, CompiledSelectors, SelectorCascade, make_soup, url_pattern
 
 app = Flask(__name__)
 
 # JSON 파일로부터 지역 → 좌표 정보 로드
 # 실제 배포 시에는 이 파일이 프로젝트 루트에 있거나, Render 설정에서 접근 가능한 경로에 있어야 합니다.
+# 지역명 색인: 시도/시군구 토큰, 별칭(서울, 서울시, 종로 등), 접두사 색인
+# 콜드 스타트를 줄이기 위해 미리 계산한 색인 파일(REGION_INDEX_PATH)을 한 번에 읽고, 없거나 원본이 바뀌었을 때만 다시 계산
+# (빌드 단계에서 `python region_index.py`로 미리 만들어 둘 수 있음)
+# 읍면동 중심점 CSV(DONG_CENTROIDS_PATH, 열: sido,sigungu,dong,lat,lon)가 있으면 읍면동도 격자로 변환하여 함께 색인
+REGION_INDEX_PATH = os.environ.get("REGION_INDEX_PATH", "region_index.bin")
+DONG_CENTROIDS_PATH = os.environ.get("DONG_CENTROIDS_PATH", "dong_centroids.csv")
 try:
-    with open("region_coords.json", encoding="utf-8") as f:
-        region_coords = json.load(f)
+    region_index = load_region_index("region_coords.json", REGION_INDEX_PATH, DONG_CENTROIDS_PATH)
 except FileNotFoundError:
     print("Warning: region_coords.json not found. Weather functionality may be limited.")
     sys.stdout.flush()
-    region_coords = {} # 파일이 없으면 빈 딕셔너리로 초기화하여 NameError 방지
+    region_index = RegionIndex({}) # 파일이 없으면 빈 색인으로 초기화하여 NameError 방지
+region_coords = region_index.region_coords
+
+def resolve_region(region_name):
+    """입력된 지역명을 region_coords.json의 전체 지역명(예: '서울특별시 종로구')으로 해석합니다."""
+    return region_index.resolve(region_name)
 
 def get_coords(region_name):
-    """지역 이름으로 좌표를 조회합니다."""
-    # region_coords 딕셔너리에 '구'나 '시'가 포함된 전체 지역명으로 저장되어 있으므로,
-    # 정확한 매칭을 위해 입력된 region_name을 기반으로 찾음
-    # 예를 들어, '서울'이 입력되면 '서울특별시 종로구'와 같은 상세 주소를 매핑해야 함.
-    # 여기서는 region_coords.json에 저장된 키들을 순회하며 일치하는 지역을 찾습니다."""
-    
-    # 먼저 정확히 일치하는 지역을 찾음
-    if region_name in region_coords:
-        return region_coords[region_name]
-
-    # 입력된 지역명이 포함된 더 상세한 지역을 찾음 (예: "서울" -> "서울특별시 종로구" 등)
-    # 'region_name'이 'full_region_name'의 일부인 경우 또는 시/도 이름만 입력된 경우를 처리
-    for full_region_name, coords in region_coords.items():
-        # 예를 들어, region_name이 "서울"일 때 "서울특별시 종로구"를 찾기 위함
-        # 또는 region_name이 "종로구"일 때 "서울특별시 종로구"를 찾기 위함
-        if region_name in full_region_name:
-            print(f"Found partial match for '{region_name}': '{full_region_name}' -> {coords}")
-            sys.stdout.flush()
-            return coords
-            
-    print(f"Coords not found for region: {region_name}")
-    sys.stdout.flush()
-    return None, None
+    """지역 이름(또는 '위도,경도')으로 좌표를 조회합니다."""
+    # '서울' → '서울특별시 종로구', '종로' → '서울특별시 종로구' 처럼
+    # 별칭·시군구명·접두사를 색인으로 해석하며, 같은 입력은 항상 같은 지역으로 해석됨
+    # '37.5665,126.9780' 처럼 위경도로 입력하면 외부 지오코딩 없이 바로 기상청 격자로 변환
+    full_region_name, coords = region_index.lookup(region_name)
+    if full_region_name is None:
+        print(f"Coords not found for region: {region_name}")
+        sys.stdout.flush()
+        return None, None
+    return coords
+
+
+# 기상청 / 에어코리아 API 서비스 키 (디코딩된 키 사용)
+# 이 부분을 발급받으신 API 키로 교체해주세요!
+WEATHER_SERVICE_KEY = urllib.parse.unquote("N%2FRBXLEXYr%2FO1xxA7qcJZY5LK63c1D44dWsoUszF%2BDHGpY%2Bn2xAea7ruByvKh566Qf69vLarJBgGRXdVe4DlkA%3D%3D") # 명시적 디코딩
+AIRKOREA_SERVICE_KEY = urllib.parse.unquote("N%2FRBXLEXYr%2FO1xxA7qcJZY5LK63c1D44dWsoUszF%2BDHGpY%2Bn2xAea7ruByvKh566Qf69vLarJBgGRXdVe4DlkA%3D%3D") # 명시적 디코딩
+
+# 스킬 요청 예산(초): 카카오 스킬 응답 제한(5초) 안에 응답하도록 요청마다 마감 시각을 두고,
+# 업스트림 호출 타임아웃과 연관도 정렬·날씨 대기 시간을 남은 시간으로 줄입니다.
+# 예산이 끝나면 각 단계는 기다리지 않고 마지막 정상 데이터나 부분 결과로 카드를 만듭니다.
+SKILL_BUDGET = float(os.environ.get("SKILL_BUDGET", "4.5"))
+RESPONSE_RESERVE = float(os.environ.get("RESPONSE_RESERVE", "0.3")) # 카드 생성·직렬화에 남겨 둘 시간(초)
+
+# 업스트림별 회로 차단기: 연속 실패·타임아웃이 쌓이면 일정 시간 동안 호출 없이 바로 실패하고,
+# 그동안 라우트는 마지막 정상 데이터를 '업데이트 지연' 표시와 함께 응답합니다.
+circuit_breakers = {
+    name: CircuitBreaker(
+        name,
+        failure_threshold=int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "3")),
+        reset_timeout=float(os.environ.get("CIRCUIT_RESET_TIMEOUT", "30")),
+    )
+    for name in ("rss", "donga_search", "donga_trending", "kma", "airkorea")
+}
 
+STALE_MARK = " (업데이트 지연)" # 마지막 정상 데이터로 응답한 카드 제목에 붙이는 표시
 
-# SERVICE_KEY는 fetch_weather_data 함수 내부에 직접 하드코딩 (사용자 요청)
+def stale_title(title, stale):
+    return title + STALE_MARK if stale else title
 
 def extract_image_from_entry(entry):
     """RSS 엔트리에서 이미지 URL을 추출합니다."""
@@ -57,30 +104,68 @@ def extract_image_from_entry(entry):
                 return media['url']
     return "https://t1.daumcdn.net/media/img-section/news_card_default.png"
 
-def fetch_rss_news(rss_url, max_count=5):
-    """지정된 RSS URL에서 뉴스 항목을 가져옵니다."""
+def parse_rss_entries(content, max_count=5):
+    """RSS XML 본문을 파싱하여 뉴스 항목 리스트로 변환합니다."""
+    import feedparser # 임포트 비용이 커서 처음 파싱할 때 임포트 (콜드 스타트 단축)
+    feed = feedparser.parse(content)
+    news_items = []
+    for entry in feed.entries[:max_count]:
+        # HTML 태그 제거 및 제목 정리
+        title = re.sub(r'<[^>]+>', '', entry.title)
+        image = extract_image_from_entry(entry)
+        link = entry.link
+        item = {
+            "title": title,
+            "image": image,
+            "link": link
+        }
+        # 발행 시각(UTC)이 있으면 기사 색인의 최신성 점수에 사용
+        if entry.get("published_parsed"):
+            item["published"] = calendar.timegm(entry.published_parsed)
+        news_items.append(item)
+    return news_items
+
+def rss_upstream_label(rss_url):
+    """RSS 피드 URL을 메트릭 레이블로 변환합니다. (예: https://rss.donga.com/politics.xml → rss_politics)"""
+    return "rss_" + rss_url.rsplit("/", 1)[-1].replace(".xml", "")
+
+def fetch_rss_feed(rss_url, etag=None, last_modified=None, max_count=5):
+    """
+    조건부 GET(ETag / Last-Modified)으로 RSS 피드를 가져옵니다.
+    304 Not Modified 응답이면 파싱을 건너뛰고 not_modified=True를 반환합니다.
+    """
     start_time = time.time() # 시작 시간 기록
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    result = {"articles": [], "not_modified": False, "etag": etag, "last_modified": last_modified}
     try:
-        feed = feedparser.parse(rss_url)
-        news_items = []
-        for entry in feed.entries[:max_count]:
-            # HTML 태그 제거 및 제목 정리
-            title = re.sub(r'<[^>]+>', '', entry.title)
-            image = extract_image_from_entry(entry)
-            link = entry.link
-            news_items.append({
-                "title": title,
-                "image": image,
-                "link": link
-            })
+        res = upstream.get(rss_url, headers=headers, timeout=5, breaker=circuit_breakers["rss"]) # 공유 keep-alive 커넥션 풀 사용
+        if res.status_code == 304:
+            result["not_modified"] = True
+            metrics.observe_upstream(rss_upstream_label(rss_url), time.time() - start_time)
+            print(f"fetch_rss_feed from {rss_url}: 304 Not Modified, took {time.time() - start_time:.2f} seconds.")
+            sys.stdout.flush()
+            return result
+        res.raise_for_status()
+        result["articles"] = parse_rss_entries(res.content, max_count=max_count)
+        result["etag"] = res.headers.get("ETag")
+        result["last_modified"] = res.headers.get("Last-Modified")
         end_time = time.time() # 종료 시간 기록
-        print(f"fetch_rss_news from {rss_url} took {end_time - start_time:.2f} seconds.")
+        metrics.observe_upstream(rss_upstream_label(rss_url), end_time - start_time)
+        print(f"fetch_rss_feed from {rss_url} took {end_time - start_time:.2f} seconds.")
         sys.stdout.flush()
-        return news_items
     except Exception as e:
+        metrics.observe_upstream(rss_upstream_label(rss_url), time.time() - start_time, error=True)
         print(f"Error fetching RSS news from {rss_url}: {e}")
         sys.stdout.flush()
-        return []
+    return result
+
+def fetch_rss_news(rss_url, max_count=5):
+    """지정된 RSS URL에서 뉴스 항목을 가져옵니다."""
+    return fetch_rss_feed(rss_url, max_count=max_count)["articles"]
 
 def clean_image_url(image):
     """상대 경로 이미지 URL을 절대 경로로 변환합니다."""
@@ -91,240 +176,165 @@ def clean_image_url(image):
         return "https://www.donga.com" + image
     return image
 
+DONGA_SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "ko-KR,ko;q=0.9",
+    "Referer": "https://www.donga.com/"
+}
+DONGA_TRENDING_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+def donga_search_url(keyword):
+    return f"https://www.donga.com/news/search?query={keyword}"
+
+# 동아일보 기사 목록 셀렉터 (처음 사용할 때 soupsieve로 한 번 컴파일, URL 패턴별로 마지막에 성공한 셀렉터를 먼저 시도)
+# 검색 페이지: 'ul.row_list li article'이 가장 흔한 패턴이지만, article 태그가 없을 경우 li만 선택
+SEARCH_LIST_SELECTORS = SelectorCascade("donga_search", [
+    "ul.row_list li article",
+    "ul.row_list li",
+])
+# 트렌딩 페이지: 웹사이트 구조 변경에 대응하기 위해 여러 셀렉터를 시도
+# "많이 본 뉴스"나 "요즘 뜨는 이슈" 페이지는 article 태그가 없는 경우가 많음
+TRENDING_LIST_SELECTORS = SelectorCascade("donga_trending", [
+    "ul.row_list li article", # 기존 검색 페이지에서 사용하던 패턴
+    "div.list ul li article",  # 기존 트렌딩 페이지에서 사용하던 패턴
+    "ul.article_list_type01 li",
+    "div.list_type01 ul li",
+    "ul.type_list li",
+    "div.news_list li",
+    "section.ranking_type01 li", # 랭킹 섹션 패턴
+], fallbacks=[
+    "ul li" # 최후의 수단으로 가장 넓은 범위 (기억하지 않으므로 다음 요청에서도 구체적인 셀렉터부터 다시 시도)
+])
+
+LINK_SELECTORS = CompiledSelectors("a") # 링크는 보통 a 태그 자체
+SEARCH_TITLE_SELECTORS = CompiledSelectors("h4")
+# 이미지 태그를 좀 더 넓게 찾고, 없으면 div 내부나 다른 흔한 패턴을 시도
+SEARCH_IMAGE_SELECTORS = CompiledSelectors("img", "div.thumb img", "header a div img")
+# h4 안의 a 태그 → 뉴스 링크 클래스 → 가장 일반적인 a 태그 순서
+TRENDING_TITLE_SELECTORS = CompiledSelectors("h4 a", "a.link_news", "a")
+TRENDING_IMAGE_SELECTORS = CompiledSelectors("img", "img.news_thumb", "div.thumb img", "header a img")
+
+def extract_news_items(potential_articles, title_selectors, image_selectors, max_count=5):
+    """기사 후보 요소들에서 제목/링크/이미지를 추출합니다. 유효한 제목과 링크가 있는 항목만 반환합니다."""
+    news_items = []
+    for item in potential_articles[:max_count]:
+        title_tag = title_selectors.select_one(item)
+        link_tag = LINK_SELECTORS.select_one(item)
+        image_tag = image_selectors.select_one(item)
+
+        title = title_tag.get_text(strip=True) if title_tag is not None else "제목 없음"
+        link = link_tag.get("href") if link_tag is not None and link_tag.has_attr("href") else "#"
+
+        # 링크가 상대 경로일 경우 절대 경로로 변환
+        if link.startswith('//'): 
+            link = "https:" + link
+        elif link.startswith('/'):
+             link = "https://www.donga.com" + link
+
+        if image_tag is not None:
+            image = image_tag.get("src") or image_tag.get("data-src") or ""
+            image = clean_image_url(image)
+        else:
+            image = PLACEHOLDER_IMAGE_URL # 이미지를 찾지 못하면 플레이스홀더 사용
+
+        # 유효한 제목과 링크가 있는 경우에만 추가
+        if title and title != "제목 없음" and link != "#": 
+            news_items.append({
+                "title": title,
+                "image": image,
+                "link": link
+            })
+    return news_items
+
+def parse_with_cascade(html, url, cascade, title_selectors, image_selectors, max_count=5):
+    """
+    목록 셀렉터 후보 중 요소를 찾은 첫 셀렉터로 기사를 추출합니다. (추출 결과가 없어도 더 넓은 셀렉터로 넘어가지 않음)
+    기사를 추출한 구체적인 셀렉터는 URL 패턴별로 기억하여 다음 요청에서 가장 먼저 시도합니다.
+    반환값: (뉴스 항목 리스트, 찾은 후보 요소 수)
+    """
+    soup = make_soup(html)
+    pattern = url_pattern(url)
+    match = cascade.first_match(soup, pattern)
+    if match is None:
+        return [], 0
+    selector, potential_articles = match
+    news_items = extract_news_items(potential_articles, title_selectors, image_selectors, max_count=max_count)
+    if news_items:
+        cascade.remember(pattern, selector)
+    return news_items, len(potential_articles)
+
+def parse_donga_search_html(html, keyword, max_count=5):
+    """동아일보 검색 페이지 HTML에서 뉴스 항목을 추출합니다."""
+    news_items, potential_count = parse_with_cascade(
+        html, donga_search_url(keyword), SEARCH_LIST_SELECTORS,
+        SEARCH_TITLE_SELECTORS, SEARCH_IMAGE_SELECTORS, max_count=max_count,
+    )
+    if not news_items and potential_count > 0:
+        print(f"Warning: Could not extract valid news items from search page for '{keyword}'. Potentially broken selectors for title/link within found articles/list items. Found {potential_count} potential items.")
+        sys.stdout.flush()
+    return news_items
+
 def fetch_donga_search_news(keyword, max_count=5):
     """동아일보에서 키워드 검색 뉴스를 가져옵니다."""
     start_time = time.time() # 시작 시간 기록
-    url = f"https://www.donga.com/news/search?query={keyword}"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept-Language": "ko-KR,ko;q=0.9",
-        "Referer": "https://www.donga.com/"
-    }
+    url = donga_search_url(keyword)
     try:
-        res = requests.get(url, headers=headers, timeout=5) # Timeout 5초로 변경
+        res = upstream.get(url, headers=DONGA_SEARCH_HEADERS, timeout=5, breaker=circuit_breakers["donga_search"]) # Timeout 5초로 변경
         res.raise_for_status() # HTTP 에러 발생 시 예외 발생
-        soup = BeautifulSoup(res.text, "html.parser")
-        
-        news_items = []
-        
-        # 검색 페이지의 기사 목록 셀렉터 강화
-        # 'ul.row_list li article'이 가장 흔한 패턴이지만, 다른 가능성도 고려
-        potential_articles = soup.select("ul.row_list li article")
-        if not potential_articles:
-            potential_articles = soup.select("ul.row_list li") # article 태그가 없을 경우 li만 선택
-
-        for item in potential_articles[:max_count]:
-            title_tag = item.select_one("h4")
-            link_tag = item.select_one("a")
-            image_tag = item.select_one("img") # 이미지 태그를 좀 더 넓게 찾음
-            if not image_tag: # 혹시 div 내부에 있을 경우
-                image_tag = item.select_one("div.thumb img") 
-            if not image_tag: # 또 다른 흔한 패턴
-                image_tag = item.select_one("header a div img")
-
-
-            title = title_tag.get_text(strip=True) if title_tag else "제목 없음"
-            link = link_tag["href"] if link_tag and link_tag.has_attr("href") else "#"
-            
-            # 링크가 상대 경로일 경우 절대 경로로 변환
-            if link.startswith('//'): 
-                link = "https:" + link
-            elif link.startswith('/'):
-                 link = "https://www.donga.com" + link
-
-            image = ""
-            if image_tag:
-                image = image_tag.get("src") or image_tag.get("data-src") or ""
-                image = clean_image_url(image)
-            else:
-                image = "https://via.placeholder.com/200" # 이미지를 찾지 못하면 플레이스홀더 사용
-
-            # 유효한 제목과 링크가 있는 경우에만 추가
-            if title != "제목 없음" and link != "#": 
-                news_items.append({
-                    "title": title,
-                    "image": image,
-                    "link": link
-                })
-        
-        if not news_items and len(potential_articles) > 0:
-            print(f"Warning: Could not extract valid news items from search page for '{keyword}'. Potentially broken selectors for title/link within found articles/list items. Found {len(potential_articles)} potential items.")
-            sys.stdout.flush()
+        news_items = parse_donga_search_html(res.text, keyword, max_count=max_count)
 
         end_time = time.time() # 종료 시간 기록
+        metrics.observe_upstream("donga_search", end_time - start_time)
         print(f"fetch_donga_search_news for '{keyword}' took {end_time - start_time:.2f} seconds.")
         sys.stdout.flush()
         return news_items
     except requests.exceptions.RequestException as e:
+        metrics.observe_upstream("donga_search", time.time() - start_time, error=True)
         print(f"Error fetching Donga search news for '{keyword}': {e}")
         sys.stdout.flush()
         return []
     except Exception as e:
+        metrics.observe_upstream("donga_search", time.time() - start_time, error=True)
         print(f"Error parsing Donga search news for '{keyword}': {e}")
         sys.stdout.flush()
         return []
 
-    """AI 파트입니다"""
-    articles = fetch_rss_news('https://rss.donga.com/total.xml')
-    if not articles:
-        items = [{
-            "title": f"{title} 관련 뉴스를 불러오지 못했습니다.",
-            "imageUrl": "https://via.placeholder.com/200",
-            "link": {"web": web_url}
-        }]
-    else:
-        items = [{
-            "title": a["title"],
-            "imageUrl": a["image"],
-            "link": {"web": a["link"]}
-        } for a in articles]
-
-    for item in items[:10]:
-        from google import genai
-
-        import base64
-
-        code = 'QUl6YVN5QXdCX0UzZVdPbk1tbzBNWmNHYUlGaXBiM0plcVozMEM4'
-        code_bytes = code.encode('ascii')
-        
-        decoded = base64.b64decode(code_bytes)
-        str = decoded.decode('UTF-8')
-        
-        client = genai.Client(api_key=str)
-        
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-05-20", contents=f"{item['title']}과 {keyword} 사이의 연관성을 퍼센테이지로 나타내세요. 퍼센테이지 외에는 아무것도 출력하지 마세요.\n예시: 0%, 10%, 20%, 30%, 40%, 50%, 60%, 70%, 80%, 90%, 100%"
-        )
-        print(response.text)
-
-        if int(response.text.rstrip('%')) <= 50:
-            items.remove(item)
-        
-
-    return jsonify({
-        "version": "2.0",
-        "template": {
-            "outputs": [{
-                "listCard": {
-                    "header": {"title": f"검색 결과"},
-                    "useCallback": True,
-                    "items": items[:5],
-                }
-            }],
-            "quickReplies": common_quick_replies(topic=title) 
-        }
-    })
-
-    end_time = time.time() # 종료 시간 기록
-    print(f"fetch_donga_search_news for '{keyword}' took {end_time - start_time:.2f} seconds.")
-    sys.stdout.flush()
+def parse_donga_trending_html(html, url, max_count=5):
+    """동아일보 트렌딩 페이지 HTML에서 뉴스 항목을 추출합니다."""
+    news_items, potential_count = parse_with_cascade(
+        html, url, TRENDING_LIST_SELECTORS,
+        TRENDING_TITLE_SELECTORS, TRENDING_IMAGE_SELECTORS, max_count=max_count,
+    )
+    if potential_count == 0:
+        print(f"Warning: No potential articles found using any selector for URL: {url}")
+        sys.stdout.flush()
+    elif not news_items:
+        print(f"Warning: Could not extract valid news items from trending page {url}. Potentially broken selectors for title/link within found articles/list items. Found {potential_count} potential items, but no valid news_items were created.")
+        sys.stdout.flush()
     return news_items
 
 def fetch_donga_trending_news(url, max_count=5):
     """동아일보에서 트렌딩 뉴스를 가져옵니다."""
     start_time = time.time() # 시작 시간 기록
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
     try:
-        res = requests.get(url, headers=headers, timeout=5) # Timeout 5초로 변경
+        res = upstream.get(url, headers=DONGA_TRENDING_HEADERS, timeout=5, breaker=circuit_breakers["donga_trending"]) # Timeout 5초로 변경
         res.raise_for_status()
-        soup = BeautifulSoup(res.text, "html.parser")
-        
-        news_items = []
-        
-        # 웹사이트 구조 변경에 대응하기 위해 여러 셀렉터를 시도
-        # "많이 본 뉴스"나 "요즘 뜨는 이슈" 페이지는 article 태그가 없는 경우가 많음
-        potential_articles = []
-        
-        # 가장 흔한 뉴스 리스트 패턴들을 순차적으로 시도
-        selectors_to_try = [
-            "ul.row_list li article", # 기존 검색 페이지에서 사용하던 패턴
-            "div.list ul li article",  # 기존 트렌딩 페이지에서 사용하던 패턴
-            "ul.article_list_type01 li",
-            "div.list_type01 ul li",
-            "ul.type_list li",
-            "div.news_list li",
-            "section.ranking_type01 li", # 랭킹 섹션 패턴
-            "ul li" # 최후의 수단으로 가장 넓은 범위
-        ]
-        
-        for selector in selectors_to_try:
-            found_items = soup.select(selector)
-            if found_items:
-                potential_articles = found_items
-                print(f"Found articles with selector: {selector}")
-                sys.stdout.flush()
-                break # 찾았으면 더 이상 시도하지 않음
-        
-        if not potential_articles:
-            print(f"Warning: No potential articles found using any selector for URL: {url}")
-            sys.stdout.flush()
-
-
-        for item in potential_articles[:max_count]:
-            title_tag = item.select_one("h4 a") # h4 태그 안에 a 태그가 있을 가능성
-            if not title_tag:
-                title_tag = item.select_one("a.link_news") # 뉴스 링크 클래스
-            if not title_tag:
-                title_tag = item.select_one("a") # 가장 일반적인 a 태그
-
-            link_tag = item.select_one("a") # 링크는 보통 a 태그 자체
-
-            image_tag = item.select_one("img") 
-            if not image_tag: # 특정 클래스가 있는 이미지 태그를 시도
-                image_tag = item.select_one("img.news_thumb") 
-            if not image_tag:
-                image_tag = item.select_one("div.thumb img") # 썸네일 이미지가 div.thumb 안에 있을 경우
-            if not image_tag:
-                image_tag = item.select_one("header a img") # 기존 패턴
-
-            title = ""
-            if title_tag and not isinstance(title_tag, str): # title_tag가 Tag 객체인지 확인
-                title = title_tag.get_text(strip=True)
-            else:
-                title = "제목 없음"
-
-            link = ""
-            if link_tag and hasattr(link_tag, 'get') and link_tag.has_attr("href"): # link_tag가 Tag 객체인지 확인
-                link = link_tag["href"]
-            else:
-                link = "#"
-            
-            # 링크가 상대 경로일 경우 절대 경로로 변환
-            if link.startswith('//'): 
-                link = "https:" + link
-            elif link.startswith('/'):
-                 link = "https://www.donga.com" + link
-
-            image = ""
-            if image_tag and hasattr(image_tag, 'get'): # image_tag가 Tag 객체인지 확인
-                image = image_tag.get("src") or image_tag.get("data-src") or ""
-                image = clean_image_url(image)
-            else:
-                image = "https://via.placeholder.com/200" # 이미지를 찾지 못하면 플레이스홀더 사용
-
-            # 유효한 제목과 링크가 있는 경우에만 추가
-            if title != "제목 없음" and link != "#": 
-                news_items.append({
-                    "title": title,
-                    "image": image,
-                    "link": link
-                })
-        
-        if not news_items and len(potential_articles) > 0:
-            print(f"Warning: Could not extract valid news items from trending page {url}. Potentially broken selectors for title/link within found articles/list items. Found {len(potential_articles)} potential items, but no valid news_items were created.")
-            sys.stdout.flush()
+        news_items = parse_donga_trending_html(res.text, url, max_count=max_count)
 
         end_time = time.time() # 종료 시간 기록
+        metrics.observe_upstream("donga_trending", end_time - start_time)
         print(f"fetch_donga_trending_news from {url} took {end_time - start_time:.2f} seconds.")
         sys.stdout.flush()
         return news_items
     except requests.exceptions.RequestException as e:
+        metrics.observe_upstream("donga_trending", time.time() - start_time, error=True)
         print(f"Error fetching Donga trending news from {url}: {e}")
         sys.stdout.flush()
         return []
     except Exception as e:
+        metrics.observe_upstream("donga_trending", time.time() - start_time, error=True)
         print(f"Error parsing Donga trending news from {url}: {e}. Raw HTML snippet (first 500 chars): {res.text[:500] if res else 'No response'}")
         sys.stdout.flush()
         return []
@@ -347,28 +357,195 @@ def common_quick_replies(topic=None):
     return quick_replies_list
 
 
-def list_card_response(title, rss_url, web_url):
-    """RSS 피드 기반 뉴스 ListCard 응답을 생성합니다."""
-    articles = fetch_rss_news(rss_url)
+# 카테고리별 RSS 피드 설정: 라벨 → RSS URL, 웹 URL, 캐시 TTL(초)
+# "IT 과학", "문화" 라벨은 사용자 요청에 따라 변경된 이름이며,
+# 동아일보 RSS에 '문화' 단독 피드는 보이지 않으므로 culture.xml 피드를 사용하고 레이블만 '문화'로 표시
+NEWS_FEEDS = {
+    "정치": {"rss": "https://rss.donga.com/politics.xml", "web": "https://www.donga.com/news/Politics", "ttl": 180},
+    "경제": {"rss": "https://rss.donga.com/economy.xml", "web": "https://www.donga.com/news/Economy", "ttl": 180},
+    "사회": {"rss": "https://rss.donga.com/national.xml", "web": "https://www.donga.com/news/National", "ttl": 180},
+    "국제": {"rss": "https://rss.donga.com/international.xml", "web": "https://www.donga.com/news/Inter", "ttl": 300},
+    "IT 과학": {"rss": "https://rss.donga.com/science.xml", "web": "https://www.donga.com/news/It", "ttl": 600},
+    "문화": {"rss": "https://rss.donga.com/culture.xml", "web": "https://www.donga.com/news/Culture", "ttl": 600},
+    "스포츠": {"rss": "https://rss.donga.com/sports.xml", "web": "https://www.donga.com/news/Sports", "ttl": 300},
+    "연예": {"rss": "https://rss.donga.com/entertainment.xml", "web": "https://www.donga.com/news/Entertainment", "ttl": 300},
+}
+
+# 기사 색인: 카테고리 RSS와 트렌딩 페이지에서 받은 기사를 모아 두고 키워드 검색을 먼저 여기서 처리합니다.
+# 색인 결과가 ARTICLE_INDEX_MIN_HITS개보다 적을 때만 동아일보 검색 페이지를 실시간으로 스크래핑합니다.
+article_index = ArticleIndex(max_docs=int(os.environ.get("ARTICLE_INDEX_MAX_DOCS", "5000")))
+ARTICLE_INDEX_MIN_HITS = int(os.environ.get("ARTICLE_INDEX_MIN_HITS", "5"))
+FEED_MAX_ARTICLES = 30 # 카드에는 5개만 보여주지만 색인에는 피드의 기사를 모두 넣기 위해 넉넉히 파싱
+
+def index_feed_articles(rss_url, articles):
+    """피드 갱신으로 받은 기사들을 검색 색인에 추가합니다."""
+    article_index.add_articles(articles, source=rss_url)
+
+# 워커 간 공유 캐시 계층: 같은 호스트의 워커들이 피드·기상청 격자·검색 결과를 한 번만 받아 함께 사용
+# 기본값(memory)은 워커마다 메모리 캐시만 사용하고, 워커를 여러 개 띄우는 배포에서는 CACHE_BACKEND=sqlite로 켬
+shared_cache_backend = open_backend(
+    os.environ.get("CACHE_BACKEND", "memory"),
+    os.environ.get("SHARED_CACHE_PATH", os.path.join(tempfile.gettempdir(), "kakao_news_bot_cache.sqlite3")),
+    max_entries=int(os.environ.get("SHARED_CACHE_MAX_ENTRIES", "50000")),
+)
+
+# 다른 워커가 이 시간(초) 안에 받아 둔 피드는 업스트림을 다시 호출하지 않고 사용
+FEED_SHARE_WINDOW = int(os.environ.get("FEED_SHARE_WINDOW", os.environ.get("FEED_REFRESH_INTERVAL", "60")))
+shared_feeds = TieredCache("feed", TTLCache(ttl=FEED_SHARE_WINDOW, max_entries=64), shared_cache_backend)
+
+def fetch_feed_shared(rss_url, etag=None, last_modified=None):
+    """
+    워커 간 공유 캐시를 거쳐 RSS 피드를 가져옵니다. (FeedCache의 fetcher)
+    다른 워커가 FEED_SHARE_WINDOW초 안에 받아 둔 결과가 있으면 그 결과를 사용하고, 동시에 갱신하는 워커 중 하나만 업스트림을 호출합니다.
+    공유 결과가 이 워커가 가진 것과 같은 버전(ETag/Last-Modified)이면 304와 같이 not_modified로 처리합니다.
+    """
+    result = shared_feeds.get_or_load(
+        rss_url,
+        lambda: dict(fetch_rss_feed(rss_url, etag=etag, last_modified=last_modified, max_count=FEED_MAX_ARTICLES),
+                     fetched_at=time.time()),
+        cache_if=lambda r: bool(r.get("articles")),
+    )
+    if result.get("articles") and ((etag and result.get("etag") == etag)
+                                   or (last_modified and result.get("last_modified") == last_modified)):
+        return {"articles": [], "not_modified": True, "etag": etag, "last_modified": last_modified,
+                "fetched_at": result.get("fetched_at")}
+    return result
+
+# 피드 캐시: 백그라운드 스레드가 FEED_REFRESH_INTERVAL(초)마다 TTL이 다가온 피드를 미리 갱신합니다.
+feed_cache = FeedCache(
+    fetch_feed_shared,
+    default_ttl=int(os.environ.get("FEED_DEFAULT_TTL", "180")),
+    refresh_interval=int(os.environ.get("FEED_REFRESH_INTERVAL", "60")),
+    on_update=index_feed_articles,
+)
+for _feed in NEWS_FEEDS.values():
+    feed_cache.register(_feed["rss"], ttl=_feed["ttl"])
+if os.environ.get("FEED_PREFETCH", "1") != "0":
+    feed_cache.start()
+
+
+# 렌더링된 카카오 응답 캐시: 데이터 버전이 같으면 dict 생성과 JSON 직렬화 없이 저장된 바이트를 그대로 응답
+rendered_responses = RenderedResponseCache(max_entries=int(os.environ.get("RENDERED_CACHE_MAX_ENTRIES", "2048")))
+
+def cached_json_response(key, version, render):
+    """
+    렌더링 캐시를 거쳐 JSON 응답을 생성합니다. 응답에는 ETag를 붙이고,
+    요청의 If-None-Match가 같은 ETag면 본문 없이 304 Not Modified로 응답합니다.
+    """
+    body, etag = rendered_responses.get_or_render(key, version, render)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status=304, headers={"ETag": etag})
+    return Response(body, mimetype="application/json", headers={"ETag": etag})
+
+def articles_version(articles):
+    """피드 캐시 밖에서 받은 기사 목록(트렌딩, 검색)의 버전으로 사용할 (제목, 링크) 튜플입니다."""
+    return tuple((a["title"], a["link"]) for a in articles)
+
+# 썸네일 프록시: 카드 이미지를 원본 대신 /thumb로 가리키게 하여, 원본을 한 번만 받아 listCard 크기로 줄인 파일을 제공
+# THUMB_PROXY_BASE_URL(이 서버의 외부 주소, 예: https://example.onrender.com)이 없으면 원본 이미지 URL을 그대로 사용
+THUMB_PROXY_BASE_URL = os.environ.get("THUMB_PROXY_BASE_URL", "").rstrip("/")
+THUMB_FETCH_TIMEOUT = float(os.environ.get("THUMB_FETCH_TIMEOUT", "3"))
+THUMB_MAX_SOURCE_BYTES = int(os.environ.get("THUMB_MAX_SOURCE_BYTES", str(5 * 1024 * 1024)))
+PLACEHOLDER_IMAGE_URL = "https://via.placeholder.com/200"
+thumb_cache = ThumbnailCache(
+    os.environ.get("THUMB_CACHE_DIR", "thumb_cache"),
+    max_bytes=int(os.environ.get("THUMB_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+)
+# 프록시 URL 서명 키: 임의 URL을 대신 받아 주는 열린 프록시가 되지 않도록 카드에 넣은 URL만 허용
+# 설정하지 않으면 썸네일 캐시 디렉터리에 한 번 만들어 저장한 키를 모든 워커와 재시작 후에도 함께 사용
+THUMB_SECRET = os.environ.get("THUMB_SECRET") or thumb_cache.secret()
+thumb_single_flight = SingleFlight()
+thumb_failures = TTLCache(ttl=int(os.environ.get("THUMB_FAILURE_TTL", "300")), max_entries=5000) # 받지 못한 원본은 잠시 다시 시도하지 않음
+
+def thumb_signature(image_url):
+    return hmac.new(THUMB_SECRET.encode("utf-8"), image_url.encode("utf-8"), hashlib.sha256).hexdigest()[:16]
+
+def thumb_url(image_url):
+    """카드에 넣을 이미지 URL을 썸네일 프록시 URL로 바꿉니다. 프록시가 꺼져 있거나 http(s) URL이 아니면 그대로 반환합니다."""
+    if not THUMB_PROXY_BASE_URL or not image_url or not image_url.startswith(("http://", "https://")):
+        return image_url
+    return f"{THUMB_PROXY_BASE_URL}/thumb?" + urllib.parse.urlencode({"u": image_url, "s": thumb_signature(image_url)})
+
+def read_limited(res, max_bytes, chunk_size=64 * 1024):
+    """
+    스트리밍 응답 본문을 max_bytes까지만 읽습니다. Content-Length가 이미 크거나 읽는 도중 넘으면 바로 ValueError.
+    (큰 원본 이미지를 메모리에 다 받은 뒤에 거르지 않도록)
+    """
+    declared = res.headers.get("Content-Length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise ValueError(f"Source image too large ({declared} bytes declared)")
+    chunks = []
+    total = 0
+    for chunk in res.iter_content(chunk_size):
+        total += len(chunk)
+        if total > max_bytes:
+            raise ValueError(f"Source image too large (over {max_bytes} bytes)")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def fetch_thumbnail(image_url):
+    """원본 이미지를 받아 썸네일로 저장하고 내용 해시를 반환합니다."""
+    start_time = time.time()
+    try:
+        res = upstream.get(image_url, headers=DONGA_TRENDING_HEADERS, timeout=THUMB_FETCH_TIMEOUT, retries=0, stream=True)
+        try:
+            res.raise_for_status()
+            content = read_limited(res, THUMB_MAX_SOURCE_BYTES)
+        finally:
+            res.close()
+        content_hash = thumb_cache.store(image_url, content)
+    except Exception:
+        metrics.observe_upstream("thumbnail", time.time() - start_time, error=True)
+        raise
+    metrics.observe_upstream("thumbnail", time.time() - start_time)
+    return content_hash
+
+def find_thumbnail(image_url, signature):
+    """
+    /thumb 요청의 썸네일을 찾습니다. 캐시에 없으면 원본을 한 번만 받아 줄입니다. (같은 이미지의 동시 요청은 한 번만 받음)
+    반환: (HTTP 상태 코드, 내용 해시 또는 None)
+    """
+    if not image_url or not hmac.compare_digest(signature, thumb_signature(image_url)):
+        return 403, None
+    content_hash = thumb_cache.lookup(image_url)
+    if content_hash is not None:
+        return 200, content_hash
+    if thumb_failures.contains(image_url):
+        return 404, None
+    try:
+        return 200, thumb_single_flight.do(image_url, lambda: fetch_thumbnail(image_url))
+    except Exception as e:
+        thumb_failures.set(image_url, True)
+        print(f"Error fetching thumbnail source {image_url}: {e}")
+        sys.stdout.flush()
+        return 404, None
+
+def thumbnail_headers(content_hash):
+    """썸네일은 원본 URL별로 바뀌지 않으므로 오래 캐시하도록 합니다."""
+    return {"ETag": f'"{content_hash[:32]}"', "Cache-Control": "public, max-age=31536000, immutable"}
+
+def build_list_card(title, articles, web_url, max_count=5, stale=False):
+    """RSS 피드 기반 뉴스 ListCard 응답 본문(dict)을 생성합니다. stale이면 제목에 업데이트 지연을 표시합니다."""
+    articles = articles[:max_count]
     if not articles:
         items = [{
             "title": f"{title} 관련 뉴스를 불러오지 못했습니다.",
-            "imageUrl": "https://via.placeholder.com/200",
+            "imageUrl": thumb_url(PLACEHOLDER_IMAGE_URL),
             "link": {"web": web_url}
         }]
     else:
         items = [{
             "title": a["title"],
-            "imageUrl": a["image"],
+            "imageUrl": thumb_url(a["image"]),
             "link": {"web": a["link"]}
         } for a in articles]
 
-    return jsonify({
+    return {
         "version": "2.0",
         "template": {
             "outputs": [{
                 "listCard": {
-                    "header": {"title": f"{title} 뉴스 TOP {len(items)}"},
+                    "header": {"title": stale_title(f"{title} 뉴스 TOP {len(items)}", stale and bool(articles))},
                     "items": items,
                     "buttons": [{
                         "label": "더보기",
@@ -379,30 +556,42 @@ def list_card_response(title, rss_url, web_url):
             }],
             "quickReplies": common_quick_replies(topic=title) 
         }
-    })
+    }
 
-def trending_card_response(title, web_url):
-    """트렌딩 뉴스 ListCard 응답을 생성합니다."""
-    articles = fetch_donga_trending_news(web_url)
+def list_card_response(title, rss_url, web_url):
+    """RSS 피드 기반 뉴스 ListCard 응답을 생성합니다."""
+    # 요청마다 RSS를 내려받지 않고 피드 캐시에서 읽음 (갱신 실패 시 마지막 정상 데이터)
+    articles, fetched_at = feed_cache.get(rss_url)
+    stale = feed_cache.is_stale(rss_url)
+    return cached_json_response(("category", title), (feed_cache.version(rss_url), stale),
+                                lambda: build_list_card(title, articles, web_url, stale=stale))
+
+def news_category_response(title):
+    """NEWS_FEEDS에 등록된 카테고리의 ListCard 응답을 생성합니다."""
+    feed = NEWS_FEEDS[title]
+    return list_card_response(title, feed["rss"], feed["web"])
+
+def build_trending_card(title, articles, web_url, stale=False):
+    """트렌딩 뉴스 ListCard 응답 본문(dict)을 생성합니다. stale이면 제목에 업데이트 지연을 표시합니다."""
     if not articles:
         items = [{
             "title": f"{title} 관련 뉴스를 불러오지 못했습니다.",
-            "imageUrl": "https://via.placeholder.com/200",
+            "imageUrl": thumb_url(PLACEHOLDER_IMAGE_URL),
             "link": {"web": web_url}
         }]
     else:
         items = [{
             "title": a["title"],
-            "imageUrl": a["image"],
+            "imageUrl": thumb_url(a["image"]),
             "link": {"web": a["link"]}
         } for a in articles]
 
-    return jsonify({
+    return {
         "version": "2.0", 
         "template": {
             "outputs": [{
                 "listCard": {
-                    "header": {"title": f"{title} TOP {len(items)}"},
+                    "header": {"title": stale_title(f"{title} TOP {len(items)}", stale and bool(articles))},
                     "items": items,
                     "buttons": [{
                         "label": "더보기",
@@ -413,41 +602,201 @@ def trending_card_response(title, web_url):
             }]
         },
         "quickReplies": common_quick_replies(topic=title) 
-    })
+    }
 
-def search_news_response(keyword, max_count=5):
-    """키워드 검색 뉴스 ListCard 응답을 생성합니다."""
-    articles = fetch_donga_search_news(keyword, max_count=max_count)
+# 트렌딩 페이지 설정: 라벨 → 동아일보 랭킹 페이지 URL
+TRENDING_PAGES = {
+    "일간 뉴스": "https://www.donga.com/news/TrendNews/daily",
+    "월간 뉴스": "https://www.donga.com/news/TrendNews/monthly",
+}
+
+def fetch_trending_shared(url, etag=None, last_modified=None):
+    """
+    워커 간 공유 캐시를 거쳐 트렌딩 페이지를 스크래핑합니다. (trending_cache의 fetcher)
+    랭킹 페이지에는 조건부 GET 검증자가 없으므로 etag/last_modified는 사용하지 않습니다.
+    """
+    return shared_feeds.get_or_load(
+        url,
+        lambda: {"articles": fetch_donga_trending_news(url), "not_modified": False, "fetched_at": time.time()},
+        cache_if=lambda r: bool(r.get("articles")),
+    )
+
+# 트렌딩 스냅샷: 요청마다 랭킹 페이지를 스크래핑하지 않고, 카테고리 피드처럼 백그라운드에서 주기적으로 갱신한 목록을 응답
+# 갱신에 실패하면 마지막 정상 목록을 유지하고, TTL이 지나면 제목에 업데이트 지연을 표시
+trending_cache = FeedCache(
+    fetch_trending_shared,
+    default_ttl=int(os.environ.get("TRENDING_TTL", "300")),
+    refresh_interval=int(os.environ.get("FEED_REFRESH_INTERVAL", "60")),
+    on_update=index_feed_articles,
+)
+for _url in TRENDING_PAGES.values():
+    trending_cache.register(_url)
+if os.environ.get("FEED_PREFETCH", "1") != "0":
+    trending_cache.start()
+
+def trending_card_response(title, web_url):
+    """트렌딩 뉴스 ListCard 응답을 생성합니다."""
+    articles, fetched_at = trending_cache.get(web_url)
+    stale = trending_cache.is_stale(web_url)
+    return cached_json_response(("trending", title), (trending_cache.version(web_url), stale),
+                                lambda: build_trending_card(title, articles, web_url, stale=stale))
+
+def build_search_card(keyword, articles, stale=False):
+    """키워드 검색 뉴스 ListCard 응답 본문(dict)을 생성합니다. stale이면 제목에 업데이트 지연을 표시합니다."""
     if not articles:
         items = [{
             "title": f"'{keyword}' 관련 뉴스를 불러오지 못했습니다.",
-            "imageUrl": "https://via.placeholder.com/200",
-            "link": {"web": f"https://www.donga.com/news/search?query={keyword}"}
+            "imageUrl": thumb_url(PLACEHOLDER_IMAGE_URL),
+            "link": {"web": donga_search_url(keyword)}
         }]
     else:
         items = [{
             "title": a["title"],
-            "imageUrl": a["image"],
+            "imageUrl": thumb_url(a["image"]),
             "link": {"web": a["link"]}
         } for a in articles]
 
-    return jsonify({
+    return {
         "version": "2.0",
         "template": {
             "outputs": [{
                 "listCard": {
-                    "header": {"title": f"'{keyword}' 검색 결과"},
+                    "header": {"title": stale_title(f"'{keyword}' 검색 결과", stale and bool(articles))},
                     "items": items,
                     "buttons": [{
                         "label": "더보기",
                         "action": "webLink",
-                        "webLinkUrl": f"https://www.donga.com/news/search?query={keyword}"
+                        "webLinkUrl": donga_search_url(keyword)
                     }]
                 }
             }],
             "quickReplies": common_quick_replies(topic=keyword) 
         }
-    })
+    }
+
+# 검색 결과 연관도 정렬 단계: 후보 제목들을 한 번의 배치 호출로 채점하고, 시간 예산을 넘기면 로컬 점수로 대체
+# GEMINI_API_KEY가 없거나 RELEVANCE_RANKING=0이면 로컬 점수만 사용하거나 정렬 단계를 건너뜀
+RELEVANCE_RANKING = os.environ.get("RELEVANCE_RANKING", "1") != "0"
+RELEVANCE_CANDIDATES = int(os.environ.get("RELEVANCE_CANDIDATES", "10")) # 정렬 전에 가져올 후보 기사 수
+relevance_ranker = RelevanceRanker(
+    client=default_model_client(),
+    time_budget=float(os.environ.get("RELEVANCE_TIME_BUDGET", "1.5")),
+)
+
+def rank_search_results(keyword, articles, max_count=5):
+    """
+    검색 후보 기사들을 연관도 순으로 정렬하여 max_count개를 반환합니다.
+    요청 예산이 부족하면 모델 채점 시간을 남은 시간으로 줄이고, 시간이 없으면 로컬 점수만 사용합니다.
+    """
+    if not RELEVANCE_RANKING:
+        return articles[:max_count]
+    time_budget = request_deadline.clamp(relevance_ranker.time_budget, reserve=RESPONSE_RESERVE)
+    return relevance_ranker.rank(keyword, articles, max_count=max_count, time_budget=time_budget)
+
+def search_candidate_count(max_count=5):
+    """연관도 정렬 전에 모을 후보 기사 수를 반환합니다."""
+    return max(max_count, RELEVANCE_CANDIDATES) if RELEVANCE_RANKING else max_count
+
+def search_article_index(keyword, candidate_count):
+    """
+    기사 색인에서 검색어를 찾습니다.
+    결과가 ARTICLE_INDEX_MIN_HITS개 이상이면 기사 리스트를, 부족하면 None(실시간 스크래핑 필요)을 반환합니다.
+    """
+    hits = article_index.search(keyword, limit=candidate_count)
+    if len(hits) >= ARTICLE_INDEX_MIN_HITS:
+        print(f"Search for '{keyword}' served from article index ({len(hits)} hits).")
+        sys.stdout.flush()
+        return hits
+    return None
+
+# 검색 결과 캐시: 속보로 같은 검색어가 한꺼번에 몰려도 정규화된 검색어(normalize_keyword)당 호스트 전체에서 한 번만 스크래핑
+# 적중률과 내보낸 항목 수는 /cache/stats의 "search"에서 확인하여 SEARCH_CACHE_SIZE를 조정
+search_cache = TieredCache("search", LRUTTLCache(
+    ttl=int(os.environ.get("SEARCH_CACHE_TTL", "300")),
+    max_entries=int(os.environ.get("SEARCH_CACHE_SIZE", "1000")),
+), shared_cache_backend)
+
+def scrape_search_candidates(keyword, candidate_count):
+    """
+    검색 페이지 스크래핑 결과를 정규화된 검색어 단위로 캐시합니다.
+    같은 검색어의 동시 미스는 (다른 워커의 요청까지) 한 번의 스크래핑 결과를 함께 사용합니다. 실패(빈 결과)는 캐시하지 않습니다.
+    """
+    key = (normalize_keyword(keyword), candidate_count)
+    return search_cache.get_or_load(key, lambda: fetch_donga_search_news(keyword, max_count=candidate_count))
+
+# 검색어별 마지막 정상 스크래핑 결과: 검색 페이지가 실패하거나 회로가 열려 있을 때 대신 응답
+search_last_good = TTLCache(ttl=int(os.environ.get("SEARCH_STALE_TTL", "21600")), max_entries=2000)
+
+def with_search_fallback(keyword, scraped, candidate_count):
+    """
+    스크래핑에 성공하면 결과를 기억해 두고, 실패하면 마지막 정상 결과 → 기사 색인의 부분 결과 순으로 대체합니다.
+    반환: (후보 기사 리스트, 마지막 정상 결과 사용 여부)
+    """
+    key = normalize_keyword(keyword)
+    if scraped:
+        search_last_good.set(key, scraped)
+        return scraped, False
+    last_good = search_last_good.get(key)
+    if last_good:
+        return last_good, True
+    return article_index.search(keyword, limit=candidate_count), False
+
+# 마지막 정상 결과로 먼저 응답한 검색어의 백그라운드 재스크래핑 (검색어당 동시에 하나만)
+search_refresh_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("SEARCH_REFRESH_WORKERS", "2")), thread_name_prefix="search-refresh")
+_search_refreshing = set()
+_search_refresh_lock = threading.Lock()
+
+def refresh_search_in_background(keyword, candidate_count):
+    """검색 페이지를 백그라운드에서 다시 스크래핑해 검색 결과 캐시와 마지막 정상 결과를 갱신합니다."""
+    key = (normalize_keyword(keyword), candidate_count)
+    with _search_refresh_lock:
+        if key in _search_refreshing:
+            return
+        _search_refreshing.add(key)
+
+    def refresh():
+        try:
+            with_search_fallback(keyword, scrape_search_candidates(keyword, candidate_count), candidate_count)
+        except Exception as e:
+            print(f"Error refreshing Donga search news for '{keyword}': {e}")
+            sys.stdout.flush()
+        finally:
+            with _search_refresh_lock:
+                _search_refreshing.discard(key)
+
+    search_refresh_executor.submit(refresh)
+
+def cached_search_candidates(keyword, candidate_count):
+    """
+    스크래핑 없이 검색 결과 캐시 → 마지막 정상 결과 순으로 후보 기사를 찾습니다.
+    마지막 정상 결과로 답할 때는 백그라운드에서 다시 스크래핑합니다. 반환: (후보 기사 리스트, 마지막 정상 결과 사용 여부) 또는 None
+    """
+    cached = search_cache.get((normalize_keyword(keyword), candidate_count))
+    if cached is not None:
+        return cached, False
+    last_good = search_last_good.get(normalize_keyword(keyword))
+    if last_good:
+        refresh_search_in_background(keyword, candidate_count)
+        return last_good, True
+    return None
+
+def search_news_articles(keyword, max_count=5, candidates=None, stale=False):
+    """
+    검색어의 기사 목록을 연관도 순으로 max_count개 찾습니다.
+    candidates(기사 색인 또는 캐시된 결과)가 없으면 검색 결과 캐시를 거쳐 검색 페이지를 스크래핑합니다.
+    반환: (기사 리스트, 마지막 정상 결과 사용 여부)
+    """
+    if candidates is None:
+        candidate_count = search_candidate_count(max_count)
+        candidates, stale = with_search_fallback(
+            keyword, scrape_search_candidates(keyword, candidate_count), candidate_count)
+    return rank_search_results(keyword, candidates, max_count=max_count), stale
+
+def search_news_response(keyword, max_count=5, candidates=None, stale=False):
+    """키워드 검색 뉴스 ListCard 응답을 생성합니다."""
+    articles, stale = search_news_articles(keyword, max_count=max_count, candidates=candidates, stale=stale)
+    return cached_json_response(("search", keyword), (articles_version(articles), stale),
+                                lambda: build_search_card(keyword, articles, stale=stale))
 
 # --- 날씨 관련 함수 및 라우트 ---
 
@@ -541,164 +890,355 @@ def get_latest_base_time(current_time):
     return base_datetime.strftime("%Y%m%d"), base_datetime.strftime("%H%M")
 
 
-def fetch_weather_data(nx, ny, region_full_name="서울"):
-    """
-    기상청 API에서 날씨 데이터를 가져오고, 에어코리아 API에서 미세먼지 데이터를 가져옵니다.
-    """
-    start_time = time.time() # 시작 시간 기록
-    # 기상청 API 서비스 키 (디코딩된 키 사용)
-    # 이 부분을 발급받으신 API 키로 교체해주세요!
-    weather_service_key_encoded = "N%2FRBXLEXYr%2FO1xxA7qcJZY5LK63c1D44dWsoUszF%2BDHGpY%2Bn2xAea7ruByvKh566Qf69vLarJBgGRXdVe4DlkA%3D%3D"
-    weather_service_key = urllib.parse.unquote(weather_service_key_encoded) # 명시적 디코딩
-    
-    # 에어코리아 API 서비스 키 (디코딩된 키 사용)
-    # 이 부분을 발급받으신 API 키로 교체해주세요!
-    airkorea_service_key_encoded = "N%2FRBXLEXYr%2FO1xxA7qcJZY5LK63c1D44dWsoUszF%2BDHGpY%2Bn2xAea7ruByvKh566Qf69vLarJBgGRXdVe4DlkA%3D%3D"
-    airkorea_service_key = urllib.parse.unquote(airkorea_service_key_encoded) # 명시적 디코딩
+# 기상청 초단기실황 캐시: (nx, ny, base_date, base_time) 단위로 저장 (워커 간 공유)
+# 여러 지역이 같은 격자를 공유하고, 자료는 base_time 슬롯마다 한 번만 바뀌므로 슬롯 내에서는 재사용
+kma_weather_cache = TieredCache("kma", TTLCache(ttl=15 * 60, max_entries=4096), shared_cache_backend)
+# 격자별 마지막 정상 관측값: 기상청이 실패하거나 느릴 때 '업데이트 지연' 표시와 함께 대신 사용 (최대 3시간)
+kma_last_good = TTLCache(ttl=int(os.environ.get("KMA_STALE_MAX_AGE", "10800")), max_entries=4096)
 
-    weather = {}
+KMA_ULTRA_SRT_NCST_URL = "http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getUltraSrtNcst"
 
-    print(f"--- Starting fetch_weather_data for region: {region_full_name} ---")
-    sys.stdout.flush()
+def kma_observation_params(nx, ny, base_date, base_time, service_key):
+    """기상청 초단기실황 API 요청 파라미터를 생성합니다."""
+    return {
+        "serviceKey": service_key, 
+        "pageNo": "1",
+        "numOfRows": "100",
+        "dataType": "JSON",
+        "base_date": base_date,
+        "base_time": base_time,
+        "nx": nx,
+        "ny": ny
+    }
 
-    # requests session을 사용하여 SSL 문제 회피 시도
-    session = requests.Session()
-    # 에어코리아 문서를 기반으로 SSL 인증서 검증 비활성화 유지
-    session.verify = False 
+def parse_kma_observation(weather_data_json):
+    """기상청 초단기실황 응답 JSON에서 T1H/REH/SKY/PTY 값을 추출합니다. 오류 응답이면 빈 딕셔너리를 반환합니다."""
+    weather = {}
+    if weather_data_json.get('response', {}).get('header', {}).get('resultCode') == '00':
+        weather_items = weather_data_json['response']['body']['items']['item']
+        for item in weather_items:
+            category = item['category']
+            value = item['obsrValue']
+            if category in ["T1H", "REH", "SKY", "PTY"]: 
+                weather[category] = value
+        print(f"Successfully fetched KMA weather data: {weather}")
+        sys.stdout.flush()
+    else:
+        error_msg = weather_data_json.get('response', {}).get('header', {}).get('resultMsg', '알 수 없는 기상청 오류')
+        print(f"KMA API error: {error_msg}. Full Response: {json.dumps(weather_data_json, indent=2)}")
+        sys.stdout.flush()
+    return weather
 
+def fetch_kma_observation(nx, ny, base_date, base_time, service_key):
+    """기상청 초단기실황 API를 호출하여 T1H/REH/SKY/PTY 값을 반환합니다. 실패 시 빈 딕셔너리를 반환합니다."""
+    weather = {}
+    kma_api_start_time = time.time()
     try:
-        # 1. 기상청 초단기 실황 API 호출
-        # Render 서버가 UTC로 설정되어 있을 가능성이 높으므로, KST로 변환
-        KST = timezone(timedelta(hours=9))
-        now_kst = datetime.now(KST)
-
-        base_date, base_time = get_latest_base_time(now_kst.replace(tzinfo=None)) # get_latest_base_time에 naive datetime 전달
-
-        weather_url = "http://apis.data.go.kr/1360000/VilageFcstInfoService_2.0/getUltraSrtNcst"
-        weather_params = {
-            "serviceKey": weather_service_key, 
-            "pageNo": "1",
-            "numOfRows": "100",
-            "dataType": "JSON",
-            "base_date": base_date,
-            "base_time": base_time,
-            "nx": nx,
-            "ny": ny
-        }
+        weather_url = KMA_ULTRA_SRT_NCST_URL
+        weather_params = kma_observation_params(nx, ny, base_date, base_time, service_key)
 
         print(f"Calling KMA API with base_date={base_date}, base_time={base_time}, nx={nx}, ny={ny}")
         sys.stdout.flush()
         kma_api_start_time = time.time()
-        weather_res = session.get(weather_url, params=weather_params, timeout=5) # Timeout 5초로 변경
+        weather_res = upstream.get(weather_url, params=weather_params, timeout=5, breaker=circuit_breakers["kma"]) # Timeout 5초로 변경
         kma_api_end_time = time.time()
         print(f"KMA API call took {kma_api_end_time - kma_api_start_time:.2f} seconds. Status Code: {weather_res.status_code}")
         sys.stdout.flush()
         weather_res.raise_for_status() # HTTP 에러 발생 시 예외 발생
-        weather_data_json = weather_res.json()
-
-        if weather_data_json.get('response', {}).get('header', {}).get('resultCode') == '00':
-            weather_items = weather_data_json['response']['body']['items']['item']
-            for item in weather_items:
-                category = item['category']
-                value = item['obsrValue']
-                if category in ["T1H", "REH", "SKY", "PTY"]: 
-                    weather[category] = value
-            print(f"Successfully fetched KMA weather data: {weather}")
-            sys.stdout.flush()
-        else:
-            error_msg = weather_data_json.get('response', {}).get('header', {}).get('resultMsg', '알 수 없는 기상청 오류')
-            print(f"KMA API error: {error_msg}. Full Response: {json.dumps(weather_data_json, indent=2)}")
-            sys.stdout.flush()
+        weather = parse_kma_observation(weather_res.json())
+        metrics.observe_upstream("kma", time.time() - kma_api_start_time)
 
     except requests.exceptions.RequestException as e:
+        metrics.observe_upstream("kma", time.time() - kma_api_start_time, error=True)
         print(f"Error fetching weather data from KMA API: {e}")
         sys.stdout.flush()
     except Exception as e:
+        metrics.observe_upstream("kma", time.time() - kma_api_start_time, error=True)
         print(f"Error processing KMA weather data: {e}")
         sys.stdout.flush()
+    return weather
 
+def get_kma_observation(nx, ny, base_date, base_time, service_key):
+    """
+    격자·발표 슬롯 단위 캐시를 거쳐 기상청 실황을 조회합니다.
+    같은 키의 동시 미스는 (다른 워커의 요청까지) 하나의 API 호출로 합쳐지며, 실패 결과(빈 딕셔너리)는 캐시하지 않습니다.
+    """
+    key = (nx, ny, base_date, base_time)
+    cached = kma_weather_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+    # 기상청 회로가 열려 있으면 호출하지 않고 마지막 정상 관측값으로 바로 응답
+    if circuit_breakers["kma"].is_open():
+        return kma_stale_observation(nx, ny)
+
+    observation = kma_weather_cache.get_or_load(
+        key, lambda: fetch_kma_observation(nx, ny, base_date, base_time, service_key))
+    if not observation:
+        return kma_stale_observation(nx, ny)
+    kma_last_good.set((nx, ny), observation)
+    return dict(observation)
+
+def kma_stale_observation(nx, ny):
+    """격자의 마지막 정상 관측값을 STALE 표시와 함께 반환합니다. 없으면 빈 딕셔너리."""
+    last_good = kma_last_good.get((nx, ny))
+    return dict(last_good, STALE=True) if last_good else {}
+
+# 에어코리아 sidoName 매핑: 광역 시도 전체 이름 → API 시도명
+AIRKOREA_SIDO_MAPPING = {
+    "서울특별시": "서울", "부산광역시": "부산", "대구광역시": "대구",
+    "인천광역시": "인천", "광주광역시": "광주", "대전광역시": "대전",
+    "울산광역시": "울산", "세종특별자치시": "세종", "경기도": "경기",
+    "강원특별자치도": "강원", "충청북도": "충북", "충청남도": "충남",
+    "전라북도": "전북", "전북특별자치도": "전북", "전라남도": "전남",
+    "경상북도": "경북", "경상남도": "경남", "제주특별자치도": "제주"
+}
+
+def to_airkorea_sido(region_full_name):
+    """'서울특별시 종로구' 같은 지역명에서 에어코리아 API용 시도명('서울')을 추출합니다."""
+    main_sido_part = region_full_name.split(' ')[0]
+    # 매핑된 시도명 사용, 없으면 원본에서 추출한 광역 시도명 그대로 사용 (혹시모를 예외처리)
+    airkorea_sido_name = AIRKOREA_SIDO_MAPPING.get(main_sido_part, main_sido_part)
+    # '서울시', '경기' 처럼 축약된 이름이 들어올 경우를 대비해 시도명 포함 여부로 한 번 더 확인
+    for sido in AIRKOREA_SIDOS:
+        if airkorea_sido_name.startswith(sido):
+            return sido
+    return airkorea_sido_name
+
+def fetch_airkorea_page(sido, page_no, num_rows):
+    """에어코리아 시도별 실시간 측정정보 API의 한 페이지를 가져옵니다. (측정소 리스트, totalCount)를 반환합니다."""
+    # 에어코리아 API URL을 HTTP로 변경 (SSL 호환성 문제 해결 시도)
+    airkorea_url = "http://apis.data.go.kr/B552584/ArpltnInforInqireSvc/getCtprvnRltmMesureDnsty"
+    airkorea_params = {
+        "serviceKey": AIRKOREA_SERVICE_KEY, # 디코딩된 키 사용
+        "returnType": "json",
+        "numOfRows": str(num_rows),
+        "pageNo": str(page_no),
+        "sidoName": sido,
+        "ver": "1.3" 
+    }
+    airkorea_api_start_time = time.time()
     try:
-        # 2. 에어코리아 대기오염정보 조회 API 호출 (시도별 실시간 측정정보)
-        # sidoName을 위한 매핑: region_full_name에서 광역 시도명 추출
-        main_sido_part = region_full_name.split(' ')[0]
-        sido_mapping = {
-            "서울특별시": "서울", "부산광역시": "부산", "대구광역시": "대구",
-            "인천광역시": "인천", "광주광역시": "광주", "대전광역시": "대전",
-            "울산광역시": "울산", "세종특별자치시": "세종", "경기도": "경기",
-            "강원특별자치도": "강원", "충청북도": "충북", "충청남도": "충남",
-            "전라북도": "전북", "전라남도": "전남", "경상북도": "경북",
-            "경상남도": "경남", "제주특별자치도": "제주"
-        }
-        # 매핑된 시도명 사용, 없으면 원본에서 추출한 광역 시도명 그대로 사용 (혹시모를 예외처리)
-        airkorea_sido_name = sido_mapping.get(main_sido_part, main_sido_part)
-        
-        # region_coords.json에 있는 "서울특별시 종로구" 같은 상세 이름이 들어올 경우
-        # airkorea_sido_name에 "서울"만 들어가도록 다시 한번 확인
-        # 이 부분은 sido_mapping으로 충분할 수 있지만, 혹시 모를 경우를 대비
-        if "특별시" in airkorea_sido_name or "광역시" in airkorea_sido_name or "특별자치시" in airkorea_sido_name or "도" in airkorea_sido_name:
-            if "서울" in airkorea_sido_name: airkorea_sido_name = "서울"
-            elif "부산" in airkorea_sido_name: airkorea_sido_name = "부산"
-            elif "대구" in airkorea_sido_name: airkorea_sido_name = "대구"
-            elif "인천" in airkorea_sido_name: airkorea_sido_name = "인천"
-            elif "광주" in airkorea_sido_name: airkorea_sido_name = "광주"
-            elif "대전" in airkorea_sido_name: airkorea_sido_name = "대전"
-            elif "울산" in airkorea_sido_name: airkorea_sido_name = "울산"
-            elif "세종" in airkorea_sido_name: airkorea_sido_name = "세종"
-            elif "경기" in airkorea_sido_name: airkorea_sido_name = "경기"
-            elif "강원" in airkorea_sido_name: airkorea_sido_name = "강원"
-            elif "충북" in airkorea_sido_name: airkorea_sido_name = "충북"
-            elif "충남" in airkorea_sido_name: airkorea_sido_name = "충남"
-            elif "전북" in airkorea_sido_name: airkorea_sido_name = "전북"
-            elif "전남" in airkorea_sido_name: airkorea_sido_name = "전남"
-            elif "경북" in airkorea_sido_name: airkorea_sido_name = "경북"
-            elif "경남" in airkorea_sido_name: airkorea_sido_name = "경남"
-            elif "제주" in airkorea_sido_name: airkorea_sido_name = "제주"
-
-        # 에어코리아 API URL을 HTTP로 변경 (SSL 호환성 문제 해결 시도)
-        airkorea_url = "http://apis.data.go.kr/B552584/ArpltnInforInqireSvc/getCtprvnRltmMesureDnsty"
-        airkorea_params = {
-            "serviceKey": airkorea_service_key, # 디코딩된 키 사용
-            "returnType": "json",
-            "numOfRows": "1", 
-            "pageNo": "1",
-            "sidoName": airkorea_sido_name, # 정확히 매핑된 시도명 사용
-            "ver": "1.3" 
-        }
-        
-        print(f"Calling Airkorea API with sidoName={airkorea_sido_name}")
-        sys.stdout.flush()
-        airkorea_api_start_time = time.time()
-        airkorea_res = session.get(airkorea_url, params=airkorea_params, timeout=5) # Timeout 5초로 변경
-        airkorea_api_end_time = time.time()
-        print(f"Airkorea API call took {airkorea_api_end_time - airkorea_api_start_time:.2f} seconds. Status Code: {airkorea_res.status_code}")
+        airkorea_res = upstream.get(airkorea_url, params=airkorea_params, timeout=5, breaker=circuit_breakers["airkorea"])
+        print(f"Airkorea API call (sidoName={sido}, pageNo={page_no}) took {time.time() - airkorea_api_start_time:.2f} seconds. Status Code: {airkorea_res.status_code}")
         sys.stdout.flush()
         airkorea_res.raise_for_status() # HTTP 에러 발생 시 예외 발생
         airkorea_data_json = airkorea_res.json()
 
-        if airkorea_data_json.get('response', {}).get('header', {}).get('resultCode') == '00':
-            airkorea_items = airkorea_data_json['response']['body']['items']
-            if airkorea_items:
-                # 에어코리아 API는 시도 내 여러 측정소를 반환할 수 있으므로, 첫 번째 측정소 데이터를 사용합니다.
-                # 더 정확하게 하려면, 해당 시도 내에서 가장 가까운 측정소를 찾아야 합니다.
-                first_station_data = airkorea_items[0] 
-                weather['PM10'] = first_station_data.get('pm10Value')
-                weather['PM25'] = first_station_data.get('pm25Value')
-                print(f"Successfully fetched Airkorea data: PM10={weather.get('PM10')}, PM25={weather.get('PM25')}")
-                sys.stdout.flush()
-            else:
-                print(f"No air quality data found for sidoName: {airkorea_sido_name}. Check API response structure or data availability for this region.")
-                sys.stdout.flush()
-        else:
+        if airkorea_data_json.get('response', {}).get('header', {}).get('resultCode') != '00':
             error_msg = airkorea_data_json.get('response', {}).get('header', {}).get('resultMsg', '알 수 없는 에어코리아 오류')
-            print(f"Airkorea API error: {error_msg}. Full Response: {json.dumps(airkorea_data_json, indent=2)}")
+            raise ValueError(f"Airkorea API error: {error_msg}")
+        body = airkorea_data_json['response']['body']
+    except Exception:
+        metrics.observe_upstream("airkorea", time.time() - airkorea_api_start_time, error=True)
+        raise
+    metrics.observe_upstream("airkorea", time.time() - airkorea_api_start_time)
+    return body.get('items') or [], int(body.get('totalCount') or 0)
+
+# 에어코리아 전국 스냅샷: 측정 시간마다 17개 시도를 일괄 수집하여 요청 경로에서는 API를 호출하지 않음
+airkorea_snapshot = AirKoreaSnapshot(fetch_airkorea_page)
+if os.environ.get("AIRKOREA_PREFETCH", "1") != "0":
+    airkorea_snapshot.start()
+
+
+# 기상청 / 에어코리아 조회를 병렬로 실행할 워커 풀과 전체 시간 예산(초)
+# 두 조회를 합쳐 WEATHER_DEADLINE 안에 끝난 결과만 사용하고, 늦은 조회는 기다리지 않음 (백그라운드에서 마저 끝나 캐시를 채움)
+weather_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("WEATHER_WORKERS", "16")), thread_name_prefix="weather")
+WEATHER_DEADLINE = float(os.environ.get("WEATHER_DEADLINE", "4.0"))
+
+# 업스트림별 조회 시간 통계 (어느 쪽이 병목인지 확인용)
+weather_source_timings = {}
+weather_source_timings_lock = threading.Lock()
+
+def record_weather_source_timing(source, elapsed=None, timed_out=False):
+    """날씨 업스트림(kma, airkorea) 조회 시간과 시간 예산 초과 횟수를 집계합니다."""
+    with weather_source_timings_lock:
+        stats = weather_source_timings.setdefault(source, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0, "timeouts": 0})
+        if elapsed is not None:
+            stats["count"] += 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+            stats["last"] = elapsed
+        if timed_out:
+            stats["timeouts"] += 1
+
+def weather_timing_stats():
+    with weather_source_timings_lock:
+        return {
+            source: dict(stats, avg=round(stats["total"] / stats["count"], 4) if stats["count"] else 0.0)
+            for source, stats in weather_source_timings.items()
+        }
+
+def current_base_slot():
+    """현재 시각 기준 최신 기상청 발표 슬롯 (base_date, base_time)을 반환합니다."""
+    # Render 서버가 UTC로 설정되어 있을 가능성이 높으므로, KST로 변환
+    KST = timezone(timedelta(hours=9))
+    now_kst = datetime.now(KST)
+
+    return get_latest_base_time(now_kst.replace(tzinfo=None)) # get_latest_base_time에 naive datetime 전달
+
+def lookup_kma_weather(nx, ny):
+    """기상청 초단기 실황을 조회합니다 (격자·발표 슬롯 단위 캐시 경유)."""
+    base_date, base_time = current_base_slot()
+    return get_kma_observation(nx, ny, base_date, base_time, WEATHER_SERVICE_KEY)
+
+# 날씨 미리 받기: 새 base_time이 공개된 직후(10분마다) 최근 요청이 많은 격자를 미리 조회하여
+# 발표 직후 첫 사용자도 캐시에서 응답받도록 함 (캐시가 워커 간 공유되므로 여러 워커가 돌아도 격자당 한 번만 호출)
+weather_prefetcher = WeatherPrefetcher(
+    lambda nx, ny, base_date, base_time: get_kma_observation(nx, ny, base_date, base_time, WEATHER_SERVICE_KEY),
+    current_base_slot,
+    top_n=int(os.environ.get("WEATHER_PREFETCH_TOP_N", "20")),
+    min_requests=int(os.environ.get("WEATHER_PREFETCH_MIN_REQUESTS", "2")),
+    publish_delay=int(os.environ.get("WEATHER_PREFETCH_DELAY", "20")),
+)
+if os.environ.get("WEATHER_PREFETCH", "1") != "0":
+    weather_prefetcher.start()
+
+def has_pm_value(station_data):
+    """측정소 데이터에 유효한 PM10 값이 있는지 확인합니다 (점검 중인 측정소는 '-'로 내려옴)."""
+    return station_data.get('pm10Value') not in (None, "", "-")
+
+# 에어코리아 스냅샷이 이보다 오래되면(갱신 실패가 이어지면) 카드에 '업데이트 지연'을 표시
+AIRKOREA_STALE_AFTER = int(os.environ.get("AIRKOREA_STALE_AFTER", "7200"))
+
+def fine_dust_result(sido, station_data):
+    """측정소 데이터에서 PM10/PM25 값을 꺼내고, 시도 스냅샷이 오래되었으면 STALE 표시를 붙입니다."""
+    result = {"PM10": station_data.get('pm10Value'), "PM25": station_data.get('pm25Value')}
+    age = airkorea_snapshot.age(sido)
+    if age is not None and age > AIRKOREA_STALE_AFTER:
+        result["STALE"] = True
+    return result
+
+def lookup_fine_dust(region_full_name):
+    """에어코리아 시간별 스냅샷에서 지역과 가장 가까운 측정소의 미세먼지를 조회합니다."""
+    # 미리 계산된 가까운 측정소 순서대로, 측정값이 있는 첫 측정소를 사용
+    for station_name, station_sido, distance in station_index.nearest_for_region(region_full_name):
+        station_data = airkorea_snapshot.get_station(station_sido, station_name)
+        if station_data and has_pm_value(station_data):
+            print(f"Using nearest Airkorea station '{station_name}' ({distance * 5:.1f} km) for {region_full_name}")
             sys.stdout.flush()
+            return fine_dust_result(station_sido, station_data)
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching airkorea data: {e}")
+    airkorea_sido_name = to_airkorea_sido(region_full_name)
+    airkorea_items = airkorea_snapshot.get_sido(airkorea_sido_name)
+    if not airkorea_items:
+        print(f"No air quality data found for sidoName: {airkorea_sido_name}. Check API response structure or data availability for this region.")
         sys.stdout.flush()
+        return {}
+    # 측정소 색인이 아직 없거나 지역을 찾지 못한 경우, 시도 내 측정값이 있는 첫 번째 측정소 데이터를 사용합니다.
+    first_station_data = next((s for s in airkorea_items if has_pm_value(s)), airkorea_items[0])
+    return fine_dust_result(airkorea_sido_name, first_station_data)
+
+def timed_lookup(source, fn, *args):
+    """조회 함수를 실행하고 소요 시간을 기록합니다."""
+    source_start_time = time.time()
+    try:
+        return fn(*args)
+    finally:
+        elapsed = time.time() - source_start_time
+        record_weather_source_timing(source, elapsed)
+        print(f"Weather source '{source}' took {elapsed:.2f} seconds.")
+        sys.stdout.flush()
+
+def fetch_station_list(num_rows=1000):
+    """에어코리아 측정소 목록(측정소명, 주소, 위경도)을 모두 가져옵니다."""
+    station_url = "http://apis.data.go.kr/B552584/MsrstnInfoInqireSvc/getMsrstnList"
+    stations = []
+    page_no = 1
+    while True:
+        params = {
+            "serviceKey": AIRKOREA_SERVICE_KEY,
+            "returnType": "json",
+            "numOfRows": str(num_rows),
+            "pageNo": str(page_no),
+        }
+        res = upstream.get(station_url, params=params, timeout=10)
+        res.raise_for_status()
+        body = res.json()['response']['body']
+        items = body.get('items') or []
+        for item in items:
+            # dmX는 위도, dmY는 경도 (WGS84)
+            stations.append({
+                "stationName": item.get("stationName"),
+                "sido": to_airkorea_sido(item.get("addr") or ""),
+                "lat": item.get("dmX"),
+                "lon": item.get("dmY"),
+            })
+        if not items or len(stations) >= int(body.get('totalCount') or 0):
+            break
+        page_no += 1
+    return stations
+
+# 측정소 좌표 캐시 파일: 측정소 위치는 거의 바뀌지 않으므로 한 번 받아온 목록을 재사용
+STATION_COORDS_PATH = os.environ.get("STATION_COORDS_PATH", "station_coords.json")
+
+def load_station_registry():
+    """측정소 목록을 캐시 파일에서 읽고, 없으면 API에서 받아 파일로 저장합니다."""
+    try:
+        with open(STATION_COORDS_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        pass
+    stations = fetch_station_list()
+    try:
+        with open(STATION_COORDS_PATH, "w", encoding="utf-8") as f:
+            json.dump(stations, f, ensure_ascii=False)
+    except OSError as e:
+        print(f"Warning: could not write {STATION_COORDS_PATH}: {e}")
+        sys.stdout.flush()
+    return stations
+
+# 측정소 공간 색인: 기동 시 백그라운드에서 구성하며, 구성 전에는 시도 첫 측정소로 대체
+station_index = StationIndex([])
+
+def build_station_index():
+    """측정소 색인을 만들고 지역별 가까운 측정소를 미리 계산합니다."""
+    global station_index
+    start_time = time.time()
+    try:
+        index = StationIndex(load_station_registry())
+        index.precompute_regions(region_coords)
+        station_index = index
+        print(f"Station index built with {len(index.stations)} stations in {time.time() - start_time:.2f} seconds.")
     except Exception as e:
-        print(f"Error processing airkorea data: {e}")
+        print(f"Error building station index: {e}")
+    sys.stdout.flush()
+
+if os.environ.get("AIRKOREA_PREFETCH", "1") != "0":
+    threading.Thread(target=build_station_index, name="station-index", daemon=True).start()
+
+def fetch_weather_data(nx, ny, region_full_name="서울", deadline=None):
+    """
+    기상청 API에서 날씨 데이터를, 에어코리아 스냅샷에서 미세먼지 데이터를 병렬로 조회합니다.
+    전체 시간 예산(deadline, 기본 WEATHER_DEADLINE초) 안에 끝난 부분만 합쳐서 반환합니다.
+    요청 마감 시각이 있으면 카드 생성 시간(RESPONSE_RESERVE)을 남기고 그 전까지만 기다립니다.
+    """
+    start_time = time.time() # 시작 시간 기록
+    deadline = WEATHER_DEADLINE if deadline is None else deadline
+    deadline = request_deadline.clamp(deadline, reserve=RESPONSE_RESERVE)
+    weather = {}
+
+    print(f"--- Starting fetch_weather_data for region: {region_full_name} ---")
+    sys.stdout.flush()
+    weather_prefetcher.record(nx, ny) # 미리 받을 인기 격자 순위용 요청 수
+
+    futures = {
+        request_deadline.submit(weather_executor, timed_lookup, "kma", lookup_kma_weather, nx, ny): "kma",
+        request_deadline.submit(weather_executor, timed_lookup, "airkorea", lookup_fine_dust, region_full_name): "airkorea",
+    }
+    done, not_done = wait(futures, timeout=deadline)
+    for future in done:
+        try:
+            weather.update(future.result())
+        except Exception as e:
+            print(f"Error in weather source '{futures[future]}': {e}")
+            sys.stdout.flush()
+    for future in not_done:
+        record_weather_source_timing(futures[future], timed_out=True)
+        print(f"Weather source '{futures[future]}' exceeded the {deadline:.1f}s budget; returning partial weather data.")
         sys.stdout.flush()
+        if futures[future] == "kma":
+            # 기상청이 느리면 기다리지 않고 마지막 정상 관측값을 사용 (늦은 응답은 백그라운드에서 캐시를 채움)
+            weather.update(kma_stale_observation(nx, ny))
 
     end_time = time.time() # 함수 종료 시간 기록
     print(f"--- Finished fetch_weather_data. Total time: {end_time - start_time:.2f} seconds. Final weather dict: {weather} ---")
@@ -742,7 +1282,7 @@ def create_weather_card(region_name, weather_data, web_url):
     sys.stdout.flush()
     return {
         "listCard": {
-            "header": {"title": f"☀️ '{region_name}' 현재 날씨"},
+            "header": {"title": stale_title(f"☀️ '{region_name}' 현재 날씨", weather_data.get("STALE"))},
             "items": [
                 # 기온 항목: 기온과 날씨 상태 함께 표시
                 {"title": f"기온 {TMP}℃, {weather_condition}", "description": ""},
@@ -763,84 +1303,187 @@ def create_weather_card(region_name, weather_data, web_url):
     }
 
 
-# --- 라우트 정의 ---
+def weather_payload(weather_card):
+    """날씨 카드를 카카오 응답 본문으로 감쌉니다."""
+    return {
+        "version": "2.0",
+        "template": {
+            "outputs": [weather_card]
+        }
+    }
 
-@app.route("/news/ask_keyword", methods=["POST"])
-def search_by_user_input():
-    """사용자 입력 키워드로 뉴스를 검색합니다."""
-    body = request.get_json()
+def simple_text_payload(text):
+    """simpleText 하나로 된 카카오 응답 본문을 생성합니다."""
+    return {
+        "version": "2.0",
+        "template": {
+            "outputs": [{
+                "simpleText": {"text": text}
+            }]
+        }
+    }
+
+def extract_keyword_param(body):
+    """스킬 요청 본문에서 검색 키워드를 추출합니다. ('삼성 관련 뉴스' → '삼성' 처럼 군더더기 말은 뺌)"""
     # 'keyword' 파라미터 우선 확인
     keyword = body.get("action", {}).get("params", {}).get("keyword", "").strip()
 
     # 파라미터에 'keyword'가 없으면 사용자 발화를 직접 검색어로 사용
     if not keyword:
         keyword = body.get("userRequest", {}).get("utterance", "").strip()
+    return strip_search_fillers(keyword)
+
+def extract_callback_url(body):
+    """콜백이 활성화된 블록에서 카카오가 보내는 callbackUrl을 추출합니다. 없으면 None."""
+    return (body or {}).get("userRequest", {}).get("callbackUrl")
+
+def extract_region_param(body):
+    """스킬 요청 본문에서 지역명을 추출합니다."""
+    # 'detailParams'에서 'region_name'을 먼저 시도하고, 없으면 'params'에서 시도
+    region = body.get("action", {}).get("detailParams", {}).get("region_name", {}).get("origin", "").strip()
+    if not region: # detailParams.origin이 비어있을 경우 params.region_name 확인
+        region = body.get("action", {}).get("params", {}).get("region_name", "서울").strip()
+    return region
+
+
+# 카카오 콜백 모드: 캐시에 없어 5초 제한을 넘길 수 있는 요청은 useCallback으로 즉시 응답하고,
+# 제한된 작업자 풀이 최종 카드를 만들어 callbackUrl로 보냅니다. (CALLBACK_MODE=0이면 항상 동기 응답)
+CALLBACK_MODE = os.environ.get("CALLBACK_MODE", "1") != "0"
+callback_dispatcher = CallbackDispatcher(
+    max_workers=int(os.environ.get("CALLBACK_WORKERS", "4")),
+    max_queue=int(os.environ.get("CALLBACK_QUEUE_SIZE", "100")),
+)
+
+def submit_callback(body, compute):
+    """
+    요청에 callbackUrl이 있으면 compute()(응답 dict 생성)를 콜백 작업자 풀에 넘기고 True를 반환합니다.
+    콜백 모드가 꺼져 있거나, callbackUrl이 없거나, 작업 큐가 가득 찼으면 False를 반환하므로 동기 응답으로 처리합니다.
+    """
+    callback_url = extract_callback_url(body)
+    if not CALLBACK_MODE or not callback_url:
+        return False
+    if not callback_dispatcher.submit(callback_url, compute):
+        print("Callback queue full; answering synchronously.")
+        sys.stdout.flush()
+        return False
+    return True
+
+def defer_to_callback(body, compute, waiting_text):
+    """콜백 작업으로 넘겼으면 useCallback 응답을, 아니면 None을 반환합니다."""
+    if submit_callback(body, compute):
+        return jsonify(callback_ack_payload(waiting_text))
+    return None
+
+KMA_WEB_URL = "https://www.weather.go.kr/w/weather/forecast/short-term.do"
+
+def weather_is_cached(nx, ny, region_full_name):
+    """기상청 실황(현재 발표 슬롯)과 에어코리아 시도 스냅샷이 모두 메모리에 있는지 확인합니다."""
+    base_date, base_time = current_base_slot()
+    return (kma_weather_cache.contains((nx, ny, base_date, base_time))
+            and airkorea_snapshot.is_loaded(to_airkorea_sido(region_full_name)))
+
+def weather_response_payload(region, nx, ny, region_full_name):
+    """날씨 ListCard 응답 본문(dict)을 생성합니다."""
+    weather_data = fetch_weather_data(nx, ny, region_full_name=region_full_name)
+    return weather_payload(create_weather_card(region, weather_data, KMA_WEB_URL))
+
+def display_region(region, region_full_name):
+    """카드에 표시할 지역명: 위경도로 입력했으면 가장 가까운 지역명을, 아니면 입력한 이름을 그대로 사용합니다."""
+    if region_full_name and parse_latlon(normalize_region_name(region)):
+        return region_full_name
+    return region
+
+def weather_response(body, region, nx, ny):
+    """날씨 응답을 생성합니다. 캐시에 없는 지역이고 callbackUrl이 있으면 콜백 모드로 응답합니다."""
+    # 미세먼지 데이터를 위해 해석된 전체 지역명(시도 포함)을 fetch_weather_data에 전달
+    region_full_name = resolve_region(region)
+    region = display_region(region, region_full_name)
+    if not weather_is_cached(nx, ny, region_full_name):
+        deferred = defer_to_callback(body, lambda: weather_response_payload(region, nx, ny, region_full_name),
+                                     f"{region} 날씨를 확인하고 있어요. 잠시만 기다려 주세요.")
+        if deferred is not None:
+            return deferred
+    return jsonify(weather_response_payload(region, nx, ny, region_full_name))
+
+
+# --- 라우트 정의 ---
+
+@app.route("/news/ask_keyword", methods=["POST"])
+def search_by_user_input():
+    """사용자 입력 키워드로 뉴스를 검색합니다."""
+    body = request.get_json()
+    keyword = extract_keyword_param(body)
 
     if not keyword:
-        return jsonify({
-            "version": "2.0",
-            "template": {
-                "outputs": [{
-                    "simpleText": {"text": "검색어를 찾을 수 없습니다."}
-                }]
-            }
-        })
-    return search_news_response(keyword, max_count=5)
+        return jsonify(simple_text_payload("검색어를 찾을 수 없습니다."))
+
+    # 기사 색인과 검색 결과 캐시로 답할 수 없을 때만 검색 페이지 스크래핑이 필요하므로 가능하면 콜백 모드로 응답
+    candidate_count = search_candidate_count()
+    candidates = search_article_index(keyword, candidate_count)
+    stale = False
+    if candidates is None:
+        candidates, stale = cached_search_candidates(keyword, candidate_count) or (None, False)
+    if candidates is None:
+        deferred = defer_to_callback(
+            body,
+            lambda: build_search_card(keyword, *search_news_articles(keyword)),
+            f"'{keyword}' 관련 뉴스를 찾고 있어요. 잠시만 기다려 주세요.",
+        )
+        if deferred is not None:
+            return deferred
+    return search_news_response(keyword, max_count=5, candidates=candidates, stale=stale)
 
 # 카테고리별 뉴스 라우트
 @app.route("/news/politics", methods=["POST"])
 def news_politics():
     """정치 뉴스 요청을 처리합니다."""
-    return list_card_response("정치", "https://rss.donga.com/politics.xml", "https://www.donga.com/news/Politics")
+    return news_category_response("정치")
 
 @app.route("/news/economy", methods=["POST"])
 def news_economy():
     """경제 뉴스 요청을 처리합니다."""
-    return list_card_response("경제", "https://rss.donga.com/economy.xml", "https://www.donga.com/news/Economy")
+    return news_category_response("경제")
 
 @app.route("/news/society", methods=["POST"])
 def news_society():
     """사회 뉴스 요청을 처리합니다."""
-    return list_card_response("사회", "https://rss.donga.com/national.xml", "https://www.donga.com/news/National")
+    return news_category_response("사회")
 
 @app.route("/news/world", methods=["POST"])
 def news_world():
     """국제 뉴스 요청을 처리합니다."""
-    return list_card_response("국제", "https://rss.donga.com/international.xml", "https://www.donga.com/news/Inter")
+    return news_category_response("국제")
 
 @app.route("/news/science", methods=["POST"])
 def news_science():
     """IT/과학 뉴스 요청을 처리합니다."""
-    # 사용자 요청에 따라 "IT 과학"으로 레이블 변경
-    return list_card_response("IT 과학", "https://rss.donga.com/science.xml", "https://www.donga.com/news/It")
+    return news_category_response("IT 과학")
 
 @app.route("/news/culture", methods=["POST"])
 def news_culture():
     """문화 뉴스 요청을 처리합니다."""
-    # 사용자 요청에 따라 "문화"로 레이블 변경 및 RSS/웹링크도 문화로 변경 필요
-    # 동아일보 RSS에 '문화' 단독 피드는 보이지 않으므로, '문화연예' 피드를 사용하고 레이블만 '문화'로 표시
-    return list_card_response("문화", "https://rss.donga.com/culture.xml", "https://www.donga.com/news/Culture")
+    return news_category_response("문화")
 
 @app.route("/news/sports", methods=["POST"])
 def news_sports():
     """스포츠 뉴스 요청을 처리합니다."""
-    return list_card_response("스포츠", "https://rss.donga.com/sports.xml", "https://www.donga.com/news/Sports")
+    return news_category_response("스포츠")
 
 @app.route("/news/entertainment", methods=["POST"])
 def news_entertainment():
     """연예 뉴스 요청을 처리합니다."""
-    return list_card_response("연예", "https://rss.donga.com/entertainment.xml", "https://www.donga.com/news/Entertainment")
+    return news_category_response("연예")
 
 # 트렌딩 뉴스 라우트
 @app.route("/news/trending", methods=["POST"])
 def trending_daily():
     """'일간 뉴스' 요청을 처리합니다."""
-    return trending_card_response("일간 뉴스", "https://www.donga.com/news/TrendNews/daily")
+    return trending_card_response("일간 뉴스", TRENDING_PAGES["일간 뉴스"])
 
 @app.route("/news/popular", methods=["POST"])
 def trending_monthly():
     """'월간 뉴스' 요청을 처리합니다."""
-    return trending_card_response("월간 뉴스", "https://www.donga.com/news/TrendNews/monthly")
+    return trending_card_response("월간 뉴스", TRENDING_PAGES["월간 뉴스"])
 
 # 날씨 정보 라우트 (기존 /weather/change-region 유지)
 @app.route("/weather/change-region", methods=["POST"])
@@ -850,10 +1493,7 @@ def weather_by_region():
     print(f"Received webhook body for /weather/change-region: {json.dumps(body, indent=2)}") # 웹훅 바디 로깅 추가
     sys.stdout.flush()
 
-    # 'detailParams'에서 'region_name'을 먼저 시도하고, 없으면 'params'에서 시도
-    region = body.get("action", {}).get("detailParams", {}).get("region_name", {}).get("origin", "").strip()
-    if not region: # detailParams.origin이 비어있을 경우 params.region_name 확인
-        region = body.get("action", {}).get("params", {}).get("region_name", "서울").strip()
+    region = extract_region_param(body)
 
     print(f"Extracted region for /weather/change-region: {region}") # 추출된 지역명 로깅 추가
     sys.stdout.flush()
@@ -861,25 +1501,9 @@ def weather_by_region():
     nx, ny = get_coords(region)
 
     if not nx or not ny:
-        return jsonify({
-            "version": "2.0",
-            "template": {
-                "outputs": [{
-                    "simpleText": {"text": f"'{region}' 지역의 날씨 정보를 찾을 수 없습니다. 다시 입력해 주세요."}
-                }]
-            }
-        })
-    
-    # 미세먼지 데이터를 위해 시도 이름을 fetch_weather_data에 전달
-    weather_data = fetch_weather_data(nx, ny, region_full_name=region) 
-    weather_card = create_weather_card(region, weather_data, "https://www.weather.go.kr/w/weather/forecast/short-term.do")
+        return jsonify(simple_text_payload(f"'{region}' 지역의 날씨 정보를 찾을 수 없습니다. 다시 입력해 주세요."))
 
-    return jsonify({
-        "version": "2.0",
-        "template": {
-            "outputs": [weather_card]
-        }
-    })
+    return weather_response(body, region, nx, ny)
 
 # /news/weather 라우트 추가 (기존 /news/briefing 대체)
 @app.route("/news/weather", methods=["POST"])
@@ -889,10 +1513,7 @@ def news_weather_route():
     print(f"Received webhook body for /news/weather: {json.dumps(body, indent=2)}") # 웹훅 바디 로깅 추가
     sys.stdout.flush()
 
-    # 'detailParams'에서 'region_name'을 먼저 시도하고, 없으면 'params'에서 시도
-    region = body.get("action", {}).get("detailParams", {}).get("region_name", {}).get("origin", "").strip()
-    if not region: # detailParams.origin이 비어있을 경우 params.region_name 확인
-        region = body.get("action", {}).get("params", {}).get("region_name", "서울").strip()
+    region = extract_region_param(body)
 
     print(f"Extracted region for /news/weather: {region}") # 추출된 지역명 로깅 추가
     sys.stdout.flush()
@@ -900,92 +1521,287 @@ def news_weather_route():
     nx, ny = get_coords(region)
 
     if not nx or not ny:
-        return jsonify({
-            "version": "2.0",
-            "template": {
-                "outputs": [{
-                    "simpleText": {"text": f"'{region}' 지역의 날씨 정보를 불러오지 못했습니다. 잠시 후 다시 시도해주세요."}
-                }]
-            }
-        })
-    
-    # 미세먼지 데이터를 위해 시도 이름을 fetch_weather_data에 전달
-    weather_data = fetch_weather_data(nx, ny, region_full_name=region)
+        return jsonify(simple_text_payload(f"'{region}' 지역의 날씨 정보를 불러오지 못했습니다. 잠시 후 다시 시도해주세요."))
+
     # create_weather_card 함수가 이미지처럼 ListCard를 생성하고 버튼 포함
-    weather_card = create_weather_card(region, weather_data, "https://www.weather.go.kr/w/weather/forecast/short-term.do")
+    return weather_response(body, region, nx, ny)
+
+# --- '알림 받기' 구독 ---
+
+# 구독 저장소와 시간대별 다이제스트 발송 스케줄러
+# 발송은 카카오 챗봇 이벤트 API를 사용하므로 KAKAO_BOT_ID, KAKAO_REST_API_KEY가 모두 설정된 경우에만 스케줄러를 시작
+# 스케줄러는 임포트 시점이 아니라 워커가 첫 요청을 받을 때 시작하며(start_alert_scheduler),
+# 워커마다 돌더라도 구독 저장소의 (날짜, 시간대, 주제) 선점으로 호스트 전체에서 한 번만 발송
+subscription_store = SubscriptionStore(os.environ.get("SUBSCRIPTION_DB", "subscriptions.db"))
+ALERT_DIGEST_SIZE = int(os.environ.get("ALERT_DIGEST_SIZE", "5"))
+
+def build_alert_digest(topic):
+    """피드 캐시의 기사로 주제의 다이제스트를 만듭니다. 등록되지 않은 주제이거나 기사가 없으면 None."""
+    feed = NEWS_FEEDS.get(topic)
+    if feed is None:
+        return None
+    articles, fetched_at = feed_cache.get(feed["rss"])
+    if not articles:
+        return None
+    articles = articles[:ALERT_DIGEST_SIZE]
+    return {
+        "topic": topic,
+        "title": f"{topic} 뉴스 알림",
+        "text": "\n".join(f"• {a['title']}" for a in articles),
+        "articles": [{"title": a["title"], "link": a["link"], "image": thumb_url(a["image"])} for a in articles],
+        "web_url": feed["web"],
+    }
 
-    return jsonify({
+def default_alert_sender():
+    bot_id = os.environ.get("KAKAO_BOT_ID")
+    rest_api_key = os.environ.get("KAKAO_REST_API_KEY")
+    if not bot_id or not rest_api_key:
+        return None
+    return KakaoEventSender(bot_id, rest_api_key, event_name=os.environ.get("KAKAO_ALERT_EVENT", "news_digest"))
+
+alert_sender = default_alert_sender()
+alert_scheduler = DigestScheduler(
+    subscription_store, build_alert_digest, alert_sender or FakeSender(),
+    batch_size=int(os.environ.get("ALERT_BATCH_SIZE", "100")),
+    concurrency=int(os.environ.get("ALERT_CONCURRENCY", "8")),
+    rate_limit=float(os.environ.get("ALERT_RATE_LIMIT", "1000")), # 초당 최대 발송 메시지 수
+)
+ALERT_SCHEDULER_ENABLED = alert_sender is not None and os.environ.get("ALERT_SCHEDULER", "1") != "0"
+
+def start_alert_scheduler():
+    """설정되어 있으면 발송 스케줄러를 시작합니다. 이미 시작했으면 아무것도 하지 않습니다."""
+    if ALERT_SCHEDULER_ENABLED:
+        alert_scheduler.start()
+
+def extract_user_id(body):
+    """카카오가 보내는 사용자 식별키(botUserKey)를 추출합니다."""
+    return (body or {}).get("userRequest", {}).get("user", {}).get("id")
+
+def extract_alarm_topic(body):
+    """
+    알림 주제를 추출합니다.
+    컨텍스트("news_alarm_context") → 블록 파라미터 → 발화("뉴스알림설정:주제") → action.extra 순서로 찾습니다.
+    """
+    # 1. userRequest.contexts에서 "news_alarm_context"를 찾아 topic 추출 (최우선)
+    for context in body.get("userRequest", {}).get("contexts") or []:
+        if context.get("name") == "news_alarm_context" and "topic" in context.get("params", {}):
+            return context["params"]["topic"].strip()
+
+    # 2. action.params에서 시도 (블록 파라미터가 웹훅으로 매핑된 경우)
+    topic = body.get("action", {}).get("params", {}).get("topic", "").strip()
+    if topic:
+        return topic
+
+    # 3. userRequest.utterance에서 "뉴스알림설정:TOPIC" 패턴을 파싱
+    utterance = body.get("userRequest", {}).get("utterance", "").strip()
+    if utterance.startswith("뉴스알림설정:"):
+        return utterance.split(":", 1)[1].strip()
+
+    # 4. userRequest.action.extra에서 시도 (과거 extra 전달 방식)
+    return body.get("userRequest", {}).get("action", {}).get("extra", {}).get("topic", "").strip()
+
+def extract_alarm_slot(body):
+    """알림 받을 시각을 'HH:MM' 시간대로 추출합니다. (time 파라미터 → 발화 순서, 찾지 못하면 None)"""
+    action = body.get("action", {})
+    for text in (
+        action.get("detailParams", {}).get("time", {}).get("origin", ""),
+        action.get("params", {}).get("time", ""),
+        body.get("userRequest", {}).get("utterance", ""),
+    ):
+        slot = normalize_slot(text)
+        if slot is not None:
+            return slot
+    return None
+
+def alarm_text_payload(text, topic=None):
+    return {
         "version": "2.0",
         "template": {
-            "outputs": [weather_card]
+            "outputs": [{
+                "simpleText": {"text": text}
+            }],
+            "quickReplies": common_quick_replies(topic=topic)
         }
-    })
-
-# # 새로운 알림 초기화 메시지 처리 엔드포인트
-# @app.route("/news/handle_alarm_init", methods=["POST"])
-# def handle_alarm_init_message():
-#     """
-#     카카오톡 챗봇 빌더의 '알림받기' 블록에서 호출되는 웹훅입니다.
-#     컨텍스트를 통해 전달받은 topic 파라미터를 사용하여 동적인 메시지를 생성합니다.
-#     """
-#     body = request.get_json()
-#     print(f"Received webhook body for /news/handle_alarm_init: {json.dumps(body, indent=2)}")
-#     sys.stdout.flush()
-
-#     topic = ""
-#     # 1. userRequest.contexts에서 "news_alarm_context"를 찾아 topic 추출 (최우선)
-#     if body.get("userRequest", {}).get("contexts"):
-#         for context in body["userRequest"]["contexts"]:
-#             # context.get("name")으로 컨텍스트 이름을 안전하게 확인
-#             if context.get("name") == "news_alarm_context" and "topic" in context.get("params", {}):
-#                 topic = context["params"]["topic"].strip()
-#                 print(f"Parsed topic from context ('news_alarm_context'): {topic}")
-#                 sys.stdout.flush()
-#                 break # 찾았으면 더 이상 검색하지 않음
-    
-#     # 2. action.params에서 시도 (블록 파라미터가 웹훅으로 매핑된 경우 - 컨텍스트 유입이 잘 안될 경우의 대비책)
-#     if not topic:
-#         topic = body.get("action", {}).get("params", {}).get("topic", "").strip()
-#         if topic:
-#             print(f"Parsed topic from action.params: {topic}")
-#             sys.stdout.flush()
-
-#     # 3. userRequest.utterance에서 "뉴스알림설정:TOPIC" 패턴을 파싱 (fallback - 혹시 모를 대비)
-#     if not topic:
-#         utterance = body.get("userRequest", {}).get("utterance", "").strip()
-#         if utterance.startswith("뉴스알림설정:"):
-#             topic = utterance.split(":", 1)[1].strip()
-#             print(f"Parsed topic from utterance (fallback): {topic}")
-#             sys.stdout.flush()
-#         else:
-#             print(f"Utterance does not match '뉴스알림설정:' pattern (fallback): {utterance}")
-#             sys.stdout.flush()
-
-#     # 4. userRequest.action.extra에서 시도 (과거 extra 전달 방식, fallback - 혹시 모를 대비)
-#     if not topic:
-#         topic = body.get("userRequest", {}).get("action", {}).get("extra", {}).get("topic", "").strip()
-#         if topic:
-#             print(f"Parsed topic from userRequest.action.extra (fallback): {topic}")
-#             sys.stdout.flush()
-
-
-#     if not topic:
-#         print("Warning: 'topic' parameter not found in webhook request for /news/handle_alarm_init after all attempts.")
-#         sys.stdout.flush()
-#         response_text = "알림 주제를 알 수 없습니다. 다시 시도해 주세요."
-#     else:
-#         response_text = f"언제 `{topic}` 뉴스를 보내드릴까요?\n원하는 방법을 선택해 주세요."
-#         print(f"Generated alarm init message for topic: {topic}")
-#         sys.stdout.flush()
-
-#     return jsonify({
-#         "version": "2.0",
-#         "template": {
-#             "outputs": [{
-#                 "simpleText": {"text": response_text}
-#             }]
-#         }
-#     })
+    }
+
+def alarm_init_payload(body):
+    """'알림받기' 블록 웹훅의 응답 본문(dict)을 생성합니다."""
+    topic = extract_alarm_topic(body)
+    if not topic:
+        print("Warning: 'topic' parameter not found in webhook request for /news/handle_alarm_init after all attempts.")
+        sys.stdout.flush()
+        return alarm_text_payload("알림 주제를 알 수 없습니다. 다시 시도해 주세요.")
+    return alarm_text_payload(f"언제 `{topic}` 뉴스를 보내드릴까요?\n원하는 시각을 입력해 주세요. (예: 오전 8시)", topic=topic)
+
+def subscribe_alarm_payload(body):
+    """구독을 저장하고 응답 본문(dict)을 생성합니다. (구독 저장소 SQLite를 쓰므로 비동기 모드에서는 스레드 풀에서 호출)"""
+    user_id = extract_user_id(body)
+    topic = extract_alarm_topic(body)
+    slot = extract_alarm_slot(body)
+    if not user_id:
+        return alarm_text_payload("사용자 정보를 확인할 수 없습니다. 잠시 후 다시 시도해 주세요.")
+    if topic not in NEWS_FEEDS:
+        return alarm_text_payload(f"알림을 받을 수 있는 주제는 {', '.join(NEWS_FEEDS)}입니다.")
+    if slot is None:
+        return alarm_text_payload("알림 받을 시각을 알 수 없습니다. '오전 8시'처럼 입력해 주세요.", topic=topic)
+    added = subscription_store.subscribe(user_id, topic, slot)
+    print(f"Alarm subscription {'added' if added else 'already exists'}: {topic} at {slot}")
+    sys.stdout.flush()
+    return alarm_text_payload(f"매일 {slot}에 `{topic}` 뉴스를 보내드릴게요.", topic=topic)
+
+def unsubscribe_alarm_payload(body):
+    """구독을 해지하고 응답 본문(dict)을 생성합니다."""
+    user_id = extract_user_id(body)
+    if not user_id:
+        return alarm_text_payload("사용자 정보를 확인할 수 없습니다. 잠시 후 다시 시도해 주세요.")
+    topic = extract_alarm_topic(body) or None
+    removed = subscription_store.unsubscribe(user_id, topic=topic)
+    if not removed:
+        return alarm_text_payload("해지할 알림이 없습니다.", topic=topic)
+    return alarm_text_payload(f"{'`' + topic + '` ' if topic else '모든 '}뉴스 알림을 해지했어요.", topic=topic)
+
+# 새로운 알림 초기화 메시지 처리 엔드포인트
+@app.route("/news/handle_alarm_init", methods=["POST"])
+def handle_alarm_init_message():
+    """
+    카카오톡 챗봇 빌더의 '알림받기' 블록에서 호출되는 웹훅입니다.
+    컨텍스트를 통해 전달받은 topic 파라미터를 사용하여 동적인 메시지를 생성합니다.
+    """
+    return jsonify(alarm_init_payload(request.get_json()))
+
+@app.route("/news/alarm/subscribe", methods=["POST"])
+def subscribe_alarm():
+    """주제와 시각을 받아 매일 그 시간대에 다이제스트를 보내도록 구독합니다."""
+    return jsonify(subscribe_alarm_payload(request.get_json()))
+
+@app.route("/news/alarm/unsubscribe", methods=["POST"])
+def unsubscribe_alarm():
+    """주제의 알림(주제가 없으면 모든 알림)을 해지합니다."""
+    return jsonify(unsubscribe_alarm_payload(request.get_json()))
+
+# --- 메트릭 ---
+
+def cache_hit_samples():
+    """캐시별 적중/미스 횟수를 메트릭 샘플 [((cache, result), 값)]로 변환합니다."""
+    kma = kma_weather_cache.stats()
+    search = search_cache.stats()
+    relevance = relevance_ranker.cache.stats()
+    rendered = rendered_responses.stats()
+    index = article_index.stats()
+    return [
+        (("kma_weather", "hit"), kma["hits"]),
+        (("kma_weather", "miss"), kma["misses"]),
+        (("kma_weather", "shared_hit"), kma["shared_hits"]),
+        (("kma_weather", "coalesced"), kma_weather_cache.coalesced),
+        (("search", "hit"), search["hits"]),
+        (("search", "miss"), search["misses"]),
+        (("search", "shared_hit"), search["shared_hits"]),
+        (("search", "coalesced"), search_cache.coalesced),
+        (("relevance", "hit"), relevance["hits"]),
+        (("relevance", "miss"), relevance["misses"]),
+        (("rendered_response", "hit"), rendered["hits"]),
+        (("rendered_response", "miss"), rendered["renders"]),
+        (("article_index", "hit"), index["searches_with_hits"]),
+        (("article_index", "miss"), index["searches"] - index["searches_with_hits"]),
+    ]
+
+metrics.REGISTRY.register_collector(
+    "kakao_bot_cache_requests_total", "Cache lookups by cache and result.", "counter", ("cache", "result"), cache_hit_samples)
+metrics.REGISTRY.register_collector(
+    "kakao_bot_circuit_open", "1 while the upstream circuit breaker is open or half-open.", "gauge", ("upstream",),
+    lambda: [((name,), int(breaker.state != "closed")) for name, breaker in circuit_breakers.items()])
+metrics.REGISTRY.register_collector(
+    "kakao_bot_alert_messages_total", "Alert digest messages by delivery result.", "counter", ("result",),
+    lambda: [(("delivered",), alert_scheduler.delivered), (("failed",), alert_scheduler.failed)])
+metrics.REGISTRY.register_collector(
+    "kakao_bot_weather_prefetch_total", "Grid cells prefetched after each KMA base_time release, by result.", "counter",
+    ("result",), lambda: [(("prefetched",), weather_prefetcher.prefetched), (("failed",), weather_prefetcher.failed)])
+metrics.REGISTRY.register_collector(
+    "kakao_bot_callback_queue_depth", "Callback jobs waiting for a worker.", "gauge", (),
+    lambda: [((), callback_dispatcher.stats()["queue_depth"])])
+
+@app.before_request
+def start_request_timer():
+    g.request_start_time = time.time()
+    start_alert_scheduler()
+    if request.method == "POST":
+        # 스킬 요청은 SKILL_BUDGET초 안에 응답하도록 요청 마감 시각을 설정 (업스트림 타임아웃과 처리 단계가 이를 따름)
+        request_deadline.start(SKILL_BUDGET)
+
+@app.teardown_request
+def clear_request_deadline(exc=None):
+    request_deadline.clear()
+
+@app.after_request
+def remember_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.teardown_request
+def record_request_metrics(exc=None):
+    """
+    라우트별 처리 시간과 실패 여부를 기록합니다. (카카오 5초 제한에 근접한 요청도 함께 집계)
+    처리 중 예외가 나면 after_request가 호출되지 않으므로, 예외 응답까지 집계되도록 teardown에서 기록합니다.
+    """
+    start_time = getattr(g, "request_start_time", None)
+    if start_time is None:
+        return
+    g.request_start_time = None # 같은 요청이 두 번 집계되지 않도록
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    error = exc is not None or getattr(g, "response_status", 500) >= 500
+    metrics.observe_route(route, time.time() - start_time, error=error)
+
+@app.route("/thumb", methods=["GET"])
+def thumbnail():
+    """카드 이미지 썸네일을 반환합니다. 처음 요청된 이미지만 원본을 받아 줄이고, 이후에는 디스크 캐시에서 읽습니다."""
+    status, content_hash = find_thumbnail(request.args.get("u", ""), request.args.get("s", ""))
+    if content_hash is None:
+        return Response(status=status)
+    headers = thumbnail_headers(content_hash)
+    if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        return Response(status=304, headers=headers)
+    data = thumb_cache.read(content_hash)
+    if data is None: # 조회와 읽기 사이에 용량 정리로 지워진 경우
+        return Response(status=404)
+    return Response(data, mimetype=image_content_type(data) or "application/octet-stream", headers=headers)
+
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    """Prometheus 텍스트 형식의 메트릭을 반환합니다."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# 캐시 통계 라우트 (캐시 크기 조정용)
+def cache_stats_payload():
+    """캐시 적중/미스 통계(dict)를 생성합니다."""
+    return {
+        "kma_weather": dict(kma_weather_cache.stats(), coalesced=kma_weather_cache.coalesced),
+        "search": dict(search_cache.stats(), coalesced=search_cache.coalesced),
+        "shared_feeds": dict(shared_feeds.stats(), coalesced=shared_feeds.coalesced),
+        "shared_cache": shared_cache_backend.stats() if shared_cache_backend is not None else None,
+        "feeds": feed_cache.status(),
+        "trending": trending_cache.status(),
+        "airkorea_snapshot": airkorea_snapshot.status(),
+        "weather_sources": weather_timing_stats(),
+        "weather_prefetch": weather_prefetcher.stats(),
+        "relevance": relevance_ranker.stats(),
+        "article_index": article_index.stats(),
+        "rendered_responses": rendered_responses.stats(),
+        "thumbnails": thumb_cache.stats(),
+        "callbacks": callback_dispatcher.stats(),
+        "alerts": dict(subscription_store.stats(), scheduler=alert_scheduler.stats()),
+        "circuit_breakers": {name: breaker.stats() for name, breaker in circuit_breakers.items()},
+        "upstream": upstream.stats(),
+        "scraper": {
+            "parser": HTML_PARSER,
+            "search": SEARCH_LIST_SELECTORS.stats(),
+            "trending": TRENDING_LIST_SELECTORS.stats(),
+        },
+    }
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """캐시 적중/미스 통계를 반환합니다."""
+    return jsonify(cache_stats_payload())
 
 # 헬스 체크 라우트
 @app.route("/", methods=["GET"])
@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+
+from text_utils import char_ngrams, normalize_keyword
+
+
+class ArticleIndex:
+    """
+    봇이 이미 수집한 기사(카테고리 RSS, 트렌딩 페이지)에 대한 메모리 전문 검색 색인입니다.
+    제목을 문자 2-gram으로 나눈 역색인을 사용하므로 띄어쓰기·조사 차이에 덜 민감하고,
+    점수는 검색어 2-gram 적중률(idf 가중)에 최신성 가중치를 곱해 계산합니다.
+    """
+
+    def __init__(self, max_docs=5000, half_life_hours=12.0, min_coverage=0.6):
+        self.max_docs = max_docs
+        self.half_life_hours = half_life_hours # 최신성 가중치가 절반이 되는 시간
+        self.min_coverage = min_coverage # 검색어 2-gram 중 이 비율 이상이 제목에 있어야 결과로 인정
+        self._docs = {} # doc_id -> 기사 dict (title, image, link, ts)
+        self._doc_grams = {} # doc_id -> 제목 2-gram 집합
+        self._by_link = {} # link -> doc_id
+        self._postings = {} # 2-gram -> doc_id 집합
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.index_hits = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add_articles(self, articles, source=None):
+        """기사들을 색인에 추가합니다. 같은 링크의 기사는 한 번만 색인하고, 가득 차면 가장 오래된 기사부터 지웁니다."""
+        now = time.time()
+        added = 0
+        with self._lock:
+            for article in articles:
+                link = article.get("link")
+                title = article.get("title")
+                if not link or not title or link in self._by_link:
+                    continue
+                doc_id = self._next_id
+                self._next_id += 1
+                grams = char_ngrams(title)
+                self._docs[doc_id] = {
+                    "title": title,
+                    "image": article.get("image"),
+                    "link": link,
+                    "ts": article.get("published") or now,
+                    "source": source,
+                }
+                self._doc_grams[doc_id] = grams
+                self._by_link[link] = doc_id
+                for gram in grams:
+                    self._postings.setdefault(gram, set()).add(doc_id)
+                added += 1
+            while len(self._docs) > self.max_docs:
+                self._remove(min(self._docs, key=lambda d: self._docs[d]["ts"]))
+        return added
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id)
+        self._by_link.pop(doc["link"], None)
+        for gram in self._doc_grams.pop(doc_id, ()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[gram]
+
+    def recency_weight(self, ts, now):
+        age_hours = max(0.0, (now - ts) / 3600.0)
+        return 0.5 ** (age_hours / self.half_life_hours)
+
+    def search(self, keyword, limit=10):
+        """검색어와 관련된 기사를 점수 순으로 반환합니다. (기사 dict에 title/image/link 포함)"""
+        query_grams = char_ngrams(normalize_keyword(keyword))
+        if not query_grams:
+            return []
+        now = time.time()
+        with self._lock:
+            self.searches += 1
+            doc_count = max(1, len(self._docs))
+            # 흔한 2-gram보다 드문 2-gram이 맞을 때 더 높은 점수를 주기 위한 idf 가중치
+            weights = {g: math.log(1 + doc_count / (1 + len(self._postings.get(g, ())))) for g in query_grams}
+            total_weight = sum(weights.values())
+            matched = {}
+            for gram in query_grams:
+                for doc_id in self._postings.get(gram, ()):
+                    matched[doc_id] = matched.get(doc_id, 0.0) + weights[gram]
+
+            results = []
+            for doc_id, weight in matched.items():
+                coverage = weight / total_weight
+                if coverage < self.min_coverage:
+                    continue
+                doc = self._docs[doc_id]
+                # 최신성 가중치는 절반까지만 반영하여, 오래됐지만 정확히 맞는 기사도 결과에 남도록 함
+                score = coverage * (0.5 + 0.5 * self.recency_weight(doc["ts"], now))
+                results.append((score, doc["ts"], doc))
+            results.sort(key=lambda r: (-r[0], -r[1]))
+            if results:
+                self.index_hits += 1
+        return [{"title": d["title"], "image": d["image"], "link": d["link"]} for _, _, d in results[:limit]]
+
+    def stats(self):
+        return {
+            "documents": len(self._docs),
+            "grams": len(self._postings),
+            "searches": self.searches,
+            "searches_with_hits": self.index_hits,
+        }
@@ -0,0 +1,478 @@
+"""
+카카오 스킬 엔드포인트의 비동기(asyncio) 서빙 모드입니다.
+뉴스·검색·날씨 핸들러가 코루틴으로 실행되고 업스트림 호출은 aiohttp 클라이언트로 보내므로,
+워커 스레드 수와 관계없이 한 프로세스에서 수백 개의 업스트림 요청을 동시에 처리할 수 있습니다.
+응답 형식과 캐시, 지역 색인은 동기 모드(app.py)와 그대로 공유하며, 동기 진입점(app:app)도 그대로 사용할 수 있습니다.
+
+실행: python async_app.py
+      gunicorn async_app:create_app --worker-class aiohttp.GunicornWebWorker
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import sys
+import time
+
+from aiohttp import ClientResponseError, ClientSession, ClientTimeout, TCPConnector, web
+
+import app as sync_app
+import metrics
+import request_deadline
+from circuit_breaker import CircuitOpenError
+from response_cache import etag_matches
+from text_utils import normalize_keyword
+from upstream import RETRY_STATUS_CODES
+
+# 카테고리 뉴스 라우트 경로 → NEWS_FEEDS 라벨
+CATEGORY_ROUTES = {
+    "/news/politics": "정치",
+    "/news/economy": "경제",
+    "/news/society": "사회",
+    "/news/world": "국제",
+    "/news/science": "IT 과학",
+    "/news/culture": "문화",
+    "/news/sports": "스포츠",
+    "/news/entertainment": "연예",
+}
+
+# 트렌딩 라우트 경로 → TRENDING_PAGES 라벨
+TRENDING_ROUTES = {
+    "/news/trending": "일간 뉴스",
+    "/news/popular": "월간 뉴스",
+}
+
+UPSTREAM_TIMEOUT = ClientTimeout(total=5) # 업스트림 호출 타임아웃 5초 (동기 모드와 동일)
+
+# 애플리케이션이 공유하는 업스트림 HTTP 세션 (on_startup에서 열고 on_cleanup에서 닫음)
+HTTP_SESSION = web.AppKey("http", ClientSession)
+
+# 같은 (격자, 발표 슬롯)에 대한 동시 기상청 조회를 하나로 합치기 위한 진행 중 작업
+_kma_in_flight = {}
+# 같은 정규화 검색어에 대한 동시 검색 페이지 스크래핑을 하나로 합치기 위한 진행 중 작업
+_search_in_flight = {}
+
+
+def cached_json_response(request, key, version, render):
+    """동기 모드와 같은 렌더링 캐시를 거쳐 ETag가 붙은 JSON 응답(또는 304)을 생성합니다."""
+    body, etag = sync_app.rendered_responses.get_or_render(key, version, render)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(body=body, content_type="application/json", charset="utf-8", headers={"ETag": etag})
+
+
+def defer_to_callback(body, compute, waiting_text):
+    """동기 모드와 같은 콜백 작업자 풀에 compute를 넘겼으면 useCallback 응답을, 아니면 None을 반환합니다."""
+    if sync_app.submit_callback(body, compute):
+        return web.json_response(sync_app.callback_ack_payload(waiting_text))
+    return None
+
+
+async def run_blocking(fn, *args):
+    """파싱처럼 CPU를 쓰는 동기 함수를 기본 스레드 풀에서 실행합니다. (요청 마감 시각이 전달되도록 컨텍스트를 복사)"""
+    call = functools.partial(contextvars.copy_context().run, fn, *args)
+    return await asyncio.get_running_loop().run_in_executor(None, call)
+
+
+async def cache_get(cache, key):
+    """TieredCache.get: 메모리 계층에 있으면 바로 읽고, 공유 계층(SQLite) 조회가 필요할 때만 스레드 풀에서 실행합니다."""
+    if cache.shared is None or cache.local.contains(key):
+        return cache.get(key)
+    return await run_blocking(cache.get, key)
+
+
+async def cache_get_or_load(cache, key, load, ttl=None, cache_if=bool):
+    """
+    TieredCache.get_or_load의 비동기판입니다. load는 코루틴 함수이며, 같은 공유 임대(lease)로 워커 간 중복 호출을 막습니다.
+    공유 계층 호출은 스레드 풀에서 실행하고, 다른 워커를 기다리는 동안에는 이벤트 루프를 막지 않고 잠듭니다.
+    """
+    value = await cache_get(cache, key)
+    if value is not None:
+        return value
+    if cache.shared is None:
+        return await _load_into(cache, key, load, ttl, cache_if)
+    shared_key = cache.shared_key(key)
+    # 요청 마감 시각이 있으면 그 전까지만 다른 워커를 기다림
+    wait_until = time.monotonic() + request_deadline.clamp(cache.lease_timeout)
+    while True:
+        if await run_blocking(cache.shared.acquire_lease, shared_key, cache.lease_timeout):
+            try:
+                return await _load_into(cache, key, load, ttl, cache_if)
+            finally:
+                await run_blocking(cache.shared.release_lease, shared_key)
+        # 다른 워커가 불러오는 중: 공유 계층에 결과가 들어오거나 임대가 풀릴 때까지 기다림
+        cache.lease_waits += 1
+        while time.monotonic() < wait_until:
+            await asyncio.sleep(cache.poll_interval)
+            entry = await run_blocking(cache.shared.get_entry, shared_key)
+            if entry is not None:
+                value, expires_at = entry
+                cache.shared_hits += 1
+                cache.local.set(key, value, ttl=max(1, expires_at - time.time()))
+                return value
+            if not await run_blocking(cache.shared.lease_held, shared_key):
+                break # 불러오던 워커가 실패함: 임대를 다시 시도
+        else:
+            # 기다려도 결과가 없으면 직접 불러옴
+            return await _load_into(cache, key, load, ttl, cache_if)
+
+
+async def _load_into(cache, key, load, ttl, cache_if):
+    cache.loads += 1
+    value = await load()
+    if cache_if(value):
+        await run_blocking(cache.set, key, value, ttl)
+    return value
+
+
+async def guarded(name, coro):
+    """업스트림 호출 코루틴을 동기 모드와 공유하는 회로 차단기를 거쳐 실행합니다. 회로가 열려 있으면 바로 실패합니다."""
+    breaker = sync_app.circuit_breakers[name]
+    if not breaker.allow():
+        coro.close()
+        raise CircuitOpenError(f"Circuit '{name}' is open")
+    try:
+        result = await coro
+    except ClientResponseError as e:
+        # 동기 모드와 같이 429/5xx만 실패로 보고, 그 밖의 4xx는 업스트림이 정상 응답한 것으로 기록
+        if e.status in RETRY_STATUS_CODES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    except Exception as e:
+        # 요청 예산이 끝나서 생긴 실패는 업스트림 장애로 보지 않음
+        if request_deadline.is_deadline_error(e):
+            breaker.release()
+        else:
+            breaker.record_failure()
+        raise
+    except BaseException:
+        # 취소 등 업스트림 결과와 무관한 종료: 시험 호출 자리만 반납
+        breaker.release()
+        raise
+    breaker.record_success()
+    return result
+
+
+def upstream_timeout():
+    """UPSTREAM_TIMEOUT을 요청의 남은 시간으로 줄인 타임아웃. 남은 시간이 없으면 DeadlineExceeded."""
+    return ClientTimeout(total=request_deadline.upstream_timeout(UPSTREAM_TIMEOUT.total))
+
+
+async def fetch_text(http, url, headers=None):
+    async with http.get(url, headers=headers, timeout=upstream_timeout()) as res:
+        res.raise_for_status()
+        return await res.text()
+
+
+async def fetch_json(http, url, params=None):
+    async with http.get(url, params=params, timeout=upstream_timeout()) as res:
+        res.raise_for_status()
+        return await res.json(content_type=None)
+
+
+async def news_category(request):
+    """카테고리 뉴스: 피드 캐시에서 바로 읽고, 캐시가 비어 있을 때만 스레드 풀에서 갱신합니다."""
+    title = CATEGORY_ROUTES[request.path]
+    feed = sync_app.NEWS_FEEDS[title]
+    articles, fetched_at = sync_app.feed_cache.peek(feed["rss"])
+    if not articles:
+        articles, fetched_at = await run_blocking(sync_app.feed_cache.get, feed["rss"])
+    stale = sync_app.feed_cache.is_stale(feed["rss"])
+    return cached_json_response(request, ("category", title), (sync_app.feed_cache.version(feed["rss"]), stale),
+                                lambda: sync_app.build_list_card(title, articles, feed["web"], stale=stale))
+
+
+async def trending(request):
+    """트렌딩 뉴스: 주기적으로 갱신되는 스냅샷에서 바로 읽고, 스냅샷이 비어 있을 때만 스레드 풀에서 갱신합니다."""
+    title = TRENDING_ROUTES[request.path]
+    url = sync_app.TRENDING_PAGES[title]
+    articles, fetched_at = sync_app.trending_cache.peek(url)
+    if not articles:
+        articles, fetched_at = await run_blocking(sync_app.trending_cache.get, url)
+    stale = sync_app.trending_cache.is_stale(url)
+    return cached_json_response(request, ("trending", title), (sync_app.trending_cache.version(url), stale),
+                                lambda: sync_app.build_trending_card(title, articles, url, stale=stale))
+
+
+async def scrape_search_candidates(http, keyword, candidate_count):
+    """동기 모드와 공유하는 검색 결과 캐시를 거쳐 검색 페이지를 비동기로 스크래핑합니다. 같은 검색어의 동시 미스는 한 번만 요청합니다."""
+    key = (normalize_keyword(keyword), candidate_count)
+    cached = await cache_get(sync_app.search_cache, key)
+    if cached is not None:
+        return cached
+
+    task = _search_in_flight.get(key)
+    if task is None:
+        async def scrape():
+            start_time = time.time()
+            try:
+                html = await guarded("donga_search", fetch_text(http, sync_app.donga_search_url(keyword), headers=sync_app.DONGA_SEARCH_HEADERS))
+                scraped = await run_blocking(sync_app.parse_donga_search_html, html, keyword, candidate_count)
+            except Exception:
+                metrics.observe_upstream("donga_search", time.time() - start_time, error=True)
+                raise
+            metrics.observe_upstream("donga_search", time.time() - start_time)
+            return scraped
+
+        async def load():
+            try:
+                return await cache_get_or_load(sync_app.search_cache, key, scrape)
+            finally:
+                _search_in_flight.pop(key, None)
+
+        task = asyncio.ensure_future(load())
+        _search_in_flight[key] = task
+    else:
+        sync_app.search_cache.single_flight.coalesced += 1
+    return await asyncio.shield(task)
+
+
+async def search_by_user_input(request):
+    """키워드 검색: 기사 색인을 먼저 찾고, 결과가 부족하면 동아일보 검색 페이지를 비동기로 받아 스레드 풀에서 파싱합니다."""
+    body = await request.json()
+    keyword = sync_app.extract_keyword_param(body)
+    if not keyword:
+        return web.json_response(sync_app.simple_text_payload("검색어를 찾을 수 없습니다."))
+
+    start_time = time.time()
+    candidate_count = sync_app.search_candidate_count()
+    articles = sync_app.search_article_index(keyword, candidate_count)
+    stale = False
+    if articles is None:
+        # 검색 결과 캐시(공유 계층은 SQLite)나 마지막 정상 결과가 있으면 콜백으로 넘기지 않고 바로 응답
+        articles, stale = await run_blocking(sync_app.cached_search_candidates, keyword, candidate_count) or (None, False)
+    if articles is None:
+        deferred = defer_to_callback(
+            body,
+            lambda: sync_app.build_search_card(keyword, *sync_app.search_news_articles(keyword)),
+            f"'{keyword}' 관련 뉴스를 찾고 있어요. 잠시만 기다려 주세요.",
+        )
+        if deferred is not None:
+            return deferred
+        scraped = []
+        try:
+            scraped = await scrape_search_candidates(request.app[HTTP_SESSION], keyword, candidate_count)
+        except Exception as e:
+            print(f"Error fetching Donga search news for '{keyword}' (async): {e}")
+        articles, stale = sync_app.with_search_fallback(keyword, scraped, candidate_count)
+    articles = await run_blocking(sync_app.rank_search_results, keyword, articles)
+    print(f"async search for '{keyword}' took {time.time() - start_time:.2f} seconds.")
+    sys.stdout.flush()
+    return cached_json_response(request, ("search", keyword), (sync_app.articles_version(articles), stale),
+                                lambda: sync_app.build_search_card(keyword, articles, stale=stale))
+
+
+async def get_kma_observation(http, nx, ny):
+    """격자·발표 슬롯 단위 캐시(동기 모드와 공유)를 거쳐 기상청 실황을 비동기로 조회합니다."""
+    base_date, base_time = sync_app.current_base_slot()
+    key = (nx, ny, base_date, base_time)
+    cached = await cache_get(sync_app.kma_weather_cache, key)
+    if cached is not None:
+        return dict(cached)
+    if sync_app.circuit_breakers["kma"].is_open():
+        return sync_app.kma_stale_observation(nx, ny)
+
+    task = _kma_in_flight.get(key)
+    if task is None:
+        async def fetch():
+            kma_start_time = time.time()
+            params = sync_app.kma_observation_params(nx, ny, base_date, base_time, sync_app.WEATHER_SERVICE_KEY)
+            params = {k: str(v) for k, v in params.items()}
+            try:
+                observation = sync_app.parse_kma_observation(
+                    await guarded("kma", fetch_json(http, sync_app.KMA_ULTRA_SRT_NCST_URL, params)))
+            except Exception:
+                metrics.observe_upstream("kma", time.time() - kma_start_time, error=True)
+                raise
+            metrics.observe_upstream("kma", time.time() - kma_start_time)
+            return observation
+
+        async def load():
+            try:
+                observation = await cache_get_or_load(sync_app.kma_weather_cache, key, fetch)
+                if observation:
+                    sync_app.kma_last_good.set((nx, ny), observation)
+                return observation
+            finally:
+                _kma_in_flight.pop(key, None)
+
+        task = asyncio.ensure_future(load())
+        _kma_in_flight[key] = task
+    try:
+        observation = dict(await asyncio.shield(task))
+    except Exception as e:
+        print(f"Error fetching weather data from KMA API (async): {e}")
+        sys.stdout.flush()
+        observation = {}
+    return observation or sync_app.kma_stale_observation(nx, ny)
+
+
+async def timed_source(source, coro):
+    source_start_time = time.time()
+    try:
+        return await coro
+    finally:
+        sync_app.record_weather_source_timing(source, time.time() - source_start_time)
+
+
+async def fetch_weather_data(http, nx, ny, region_full_name):
+    """기상청과 미세먼지 조회를 동시에 실행하고, WEATHER_DEADLINE(요청 마감 전까지) 안에 끝난 결과만 합칩니다."""
+    sync_app.weather_prefetcher.record(nx, ny)
+    tasks = {
+        asyncio.ensure_future(timed_source("kma", get_kma_observation(http, nx, ny))): "kma",
+        asyncio.ensure_future(timed_source("airkorea", run_blocking(sync_app.lookup_fine_dust, region_full_name))): "airkorea",
+    }
+    deadline = request_deadline.clamp(sync_app.WEATHER_DEADLINE, reserve=sync_app.RESPONSE_RESERVE)
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    weather = {}
+    for task in done:
+        try:
+            weather.update(task.result())
+        except Exception as e:
+            print(f"Error in weather source '{tasks[task]}' (async): {e}")
+            sys.stdout.flush()
+    for task in pending:
+        # 늦은 조회는 취소하지 않고 끝까지 실행되도록 두어 캐시를 채움
+        sync_app.record_weather_source_timing(tasks[task], timed_out=True)
+        if tasks[task] == "kma":
+            weather.update(sync_app.kma_stale_observation(nx, ny))
+    return weather
+
+
+async def weather(request):
+    """날씨: 지역 해석은 메모리 색인, 업스트림 조회는 비동기로 처리합니다."""
+    body = await request.json()
+    region = sync_app.extract_region_param(body)
+    nx, ny = sync_app.get_coords(region)
+    if not nx or not ny:
+        if request.path == "/weather/change-region":
+            text = f"'{region}' 지역의 날씨 정보를 찾을 수 없습니다. 다시 입력해 주세요."
+        else:
+            text = f"'{region}' 지역의 날씨 정보를 불러오지 못했습니다. 잠시 후 다시 시도해주세요."
+        return web.json_response(sync_app.simple_text_payload(text))
+
+    region_full_name = sync_app.resolve_region(region)
+    region = sync_app.display_region(region, region_full_name)
+    if not await run_blocking(sync_app.weather_is_cached, nx, ny, region_full_name):
+        deferred = defer_to_callback(
+            body,
+            lambda: sync_app.weather_response_payload(region, nx, ny, region_full_name),
+            f"{region} 날씨를 확인하고 있어요. 잠시만 기다려 주세요.",
+        )
+        if deferred is not None:
+            return deferred
+    weather_data = await fetch_weather_data(request.app[HTTP_SESSION], nx, ny, region_full_name)
+    weather_card = sync_app.create_weather_card(region, weather_data, sync_app.KMA_WEB_URL)
+    return web.json_response(sync_app.weather_payload(weather_card))
+
+
+async def thumbnail(request):
+    """카드 이미지 썸네일: 원본 다운로드와 축소, 디스크 읽기는 스레드 풀에서 처리합니다."""
+    status, content_hash = await run_blocking(sync_app.find_thumbnail, request.query.get("u", ""), request.query.get("s", ""))
+    if content_hash is None:
+        return web.Response(status=status)
+    headers = sync_app.thumbnail_headers(content_hash)
+    if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        return web.Response(status=304, headers=headers)
+    data = await run_blocking(sync_app.thumb_cache.read, content_hash)
+    if data is None:
+        return web.Response(status=404)
+    return web.Response(body=data, content_type=sync_app.image_content_type(data) or "application/octet-stream", headers=headers)
+
+
+async def alarm_init(request):
+    """'알림받기' 블록 웹훅: 동기 모드와 같은 응답을 생성합니다."""
+    return web.json_response(sync_app.alarm_init_payload(await request.json()))
+
+
+async def subscribe_alarm(request):
+    """알림 구독: 구독 저장소(SQLite) 쓰기는 스레드 풀에서 처리합니다."""
+    return web.json_response(await run_blocking(sync_app.subscribe_alarm_payload, await request.json()))
+
+
+async def unsubscribe_alarm(request):
+    """알림 해지: 구독 저장소(SQLite) 쓰기는 스레드 풀에서 처리합니다."""
+    return web.json_response(await run_blocking(sync_app.unsubscribe_alarm_payload, await request.json()))
+
+
+async def cache_stats(request):
+    """캐시 통계를 반환합니다 (동기 모드와 같은 내용, 공유 캐시·구독 저장소 조회는 스레드 풀에서)."""
+    return web.json_response(await run_blocking(sync_app.cache_stats_payload))
+
+
+async def metrics_route(request):
+    """Prometheus 텍스트 형식의 메트릭을 반환합니다 (동기 모드와 같은 레지스트리)."""
+    return web.Response(body=metrics.render().encode("utf-8"), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
+@web.middleware
+async def request_metrics(request, handler):
+    """라우트별 처리 시간과 실패 여부를 기록합니다. 스킬 요청(POST)에는 동기 모드와 같은 요청 마감 시각을 설정합니다."""
+    start_time = time.time()
+    if request.method == "POST":
+        # 요청마다 별도 태스크에서 처리되므로 마감 시각은 이 요청 안에서만 보임
+        request_deadline.start(sync_app.SKILL_BUDGET)
+    error = True
+    try:
+        response = await handler(request)
+        error = response.status >= 500
+        return response
+    except web.HTTPException as e:
+        error = e.status >= 500
+        raise
+    finally:
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else "unmatched"
+        metrics.observe_route(route, time.time() - start_time, error=error)
+
+
+async def health(request):
+    return web.Response(text="카카오 뉴스봇 정상 작동 중입니다. (async)")
+
+
+async def _open_http(application):
+    # 호스트별 동시 연결 수 제한을 둔 공유 커넥션 풀
+    connector = TCPConnector(
+        limit=int(os.environ.get("ASYNC_MAX_CONNECTIONS", "400")),
+        limit_per_host=int(os.environ.get("ASYNC_MAX_CONNECTIONS_PER_HOST", "100")),
+    )
+    application[HTTP_SESSION] = ClientSession(connector=connector, json_serialize=json.dumps)
+
+
+async def _close_http(application):
+    await application[HTTP_SESSION].close()
+
+
+async def _start_background_jobs(application):
+    # 알림 발송 스케줄러는 임포트가 아니라 서버가 뜰 때 시작 (발송은 호스트 전체에서 한 프로세스만 선점)
+    sync_app.start_alert_scheduler()
+
+
+def create_app():
+    """aiohttp 애플리케이션을 생성합니다."""
+    application = web.Application(middlewares=[request_metrics])
+    application.on_startup.append(_open_http)
+    application.on_startup.append(_start_background_jobs)
+    application.on_cleanup.append(_close_http)
+    for path in CATEGORY_ROUTES:
+        application.router.add_post(path, news_category)
+    for path in TRENDING_ROUTES:
+        application.router.add_post(path, trending)
+    application.router.add_post("/news/ask_keyword", search_by_user_input)
+    application.router.add_post("/weather/change-region", weather)
+    application.router.add_post("/news/weather", weather)
+    application.router.add_post("/news/handle_alarm_init", alarm_init)
+    application.router.add_post("/news/alarm/subscribe", subscribe_alarm)
+    application.router.add_post("/news/alarm/unsubscribe", unsubscribe_alarm)
+    application.router.add_get("/thumb", thumbnail)
+    application.router.add_get("/metrics", metrics_route)
+    application.router.add_get("/cache/stats", cache_stats)
+    application.router.add_get("/", health)
+    return application
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host="0.0.0.0", port=int(os.environ.get("PORT", "5000")))
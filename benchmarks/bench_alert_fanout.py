@@ -0,0 +1,67 @@
+"""
+'알림 받기' 다이제스트 발송 처리량 벤치마크입니다.
+메모리 SQLite 구독 저장소에 구독자 N명(기본 10만 명)을 한 주제·시간대로 넣고,
+FakeSender(묶음당 지연 시간을 흉내 냄)로 DigestScheduler.run_slot()을 실행하여 초당 발송 메시지 수를 측정합니다.
+
+실행: python benchmarks/bench_alert_fanout.py [--subscribers 100000] [--batch-size 100] [--concurrency 8]
+                                             [--rate-limit 0] [--latency 0.05]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from alert_scheduler import DigestScheduler, FakeSender # noqa: E402
+from subscription_store import SubscriptionStore # noqa: E402
+
+TOPIC = "정치"
+SLOT = "08:00"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate-limit", type=float, default=0, help="초당 최대 발송 메시지 수 (0이면 제한 없음)")
+    parser.add_argument("--latency", type=float, default=0.05, help="묶음 하나를 보내는 데 걸리는 시간(초)")
+    args = parser.parse_args()
+
+    store = SubscriptionStore(":memory:")
+    start = time.perf_counter()
+    store.subscribe_many((f"user-{i:07d}", TOPIC, SLOT) for i in range(args.subscribers))
+    load_seconds = time.perf_counter() - start
+
+    digest_builds = []
+
+    def build_digest(topic):
+        digest_builds.append(topic)
+        return {"topic": topic, "title": f"{topic} 뉴스 알림", "text": "• 합성 기사 제목"}
+
+    sender = FakeSender(latency=args.latency)
+    scheduler = DigestScheduler(store, build_digest, sender, batch_size=args.batch_size,
+                                concurrency=args.concurrency, rate_limit=args.rate_limit or None)
+    start = time.perf_counter()
+    [result] = scheduler.run_slot(SLOT)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "subscribers": args.subscribers,
+        "batch_size": scheduler.batch_size,
+        "concurrency": args.concurrency,
+        "rate_limit": args.rate_limit or None,
+        "sender_latency_s": args.latency,
+        "store_load_s": round(load_seconds, 3),
+        "digest_builds": len(digest_builds),
+        "batches": sender.batches,
+        "delivered": result["delivered"],
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_second": round(result["delivered"] / elapsed, 1),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
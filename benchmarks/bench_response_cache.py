@@ -0,0 +1,73 @@
+"""
+카테고리 뉴스 응답의 요청당 CPU 시간 벤치마크: 기존 방식(매 요청 dict 생성 + jsonify)과
+렌더링 응답 캐시(데이터 버전이 같으면 저장된 JSON 바이트를 그대로 응답)를 비교합니다.
+업스트림 호출 없이 피드 캐시를 합성 기사로 채운 뒤, Flask 요청 컨텍스트 안에서 응답 생성 비용만 측정합니다.
+
+실행: python benchmarks/bench_response_cache.py [--repeat 5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("FEED_PREFETCH", "0")
+os.environ.setdefault("AIRKOREA_PREFETCH", "0")
+os.environ.setdefault("WEATHER_PREFETCH", "0")
+
+from flask import jsonify # noqa: E402
+
+import app # noqa: E402
+
+CATEGORY = "정치"
+
+
+def fill_feed_cache():
+    feed = app.NEWS_FEEDS[CATEGORY]
+    articles = [{
+        "title": f"합성 정치 기사 제목 {i}",
+        "image": f"https://image.donga.com/{i}.jpg",
+        "link": f"https://www.donga.com/news/Politics/article/all/20261017/{i}/1",
+    } for i in range(30)]
+    app.feed_cache.fetcher = lambda url, **kwargs: {"articles": articles, "not_modified": False}
+    app.feed_cache.refresh(feed["rss"])
+    return feed
+
+
+def legacy_response(feed):
+    """user-013 이전 방식: 매 요청 카드 dict를 만들고 jsonify로 직렬화."""
+    articles, fetched_at = app.feed_cache.get(feed["rss"])
+    return jsonify(app.build_list_card(CATEGORY, articles, feed["web"]))
+
+
+def current_response(feed):
+    return app.list_card_response(CATEGORY, feed["rss"], feed["web"])
+
+
+def bench(fn, feed, repeat):
+    with app.app.test_request_context("/news/politics", method="POST", json={}):
+        fn(feed) # 워밍업 (렌더링 캐시 채우기)
+        start = time.process_time()
+        for _ in range(repeat):
+            fn(feed).get_data()
+        return (time.process_time() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    feed = fill_feed_cache()
+    legacy_us = bench(legacy_response, feed, args.repeat)
+    current_us = bench(current_response, feed, args.repeat)
+
+    print(f"repeat: {args.repeat}")
+    print(f"legacy (build dict + jsonify every request): {legacy_us:.1f} us CPU/request")
+    print(f"current (rendered response cache):          {current_us:.1f} us CPU/request")
+    print(f"speedup: {legacy_us / current_us:.2f}x")
+    print(f"cache: {app.rendered_responses.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+동아일보 HTML 파싱 벤치마크: 기존 방식(html.parser + 매 요청 셀렉터 순차 시도)과
+현재 스크래핑 엔진(lxml + 미리 컴파일한 셀렉터 + 성공 셀렉터 기억)의 페이지당 파싱 시간을 비교합니다.
+
+실행: python benchmarks/bench_scraper.py [--html 페이지.html] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("FEED_PREFETCH", "0")
+os.environ.setdefault("AIRKOREA_PREFETCH", "0")
+os.environ.setdefault("WEATHER_PREFETCH", "0")
+
+from bs4 import BeautifulSoup # noqa: E402
+
+import app # noqa: E402
+import scraper # noqa: E402
+
+TRENDING_URL = "https://www.donga.com/news/TrendNews/daily"
+
+LEGACY_SELECTORS = [
+    "ul.row_list li article",
+    "div.list ul li article",
+    "ul.article_list_type01 li",
+    "div.list_type01 ul li",
+    "ul.type_list li",
+    "div.news_list li",
+    "section.ranking_type01 li",
+    "ul li",
+]
+
+
+def legacy_parse_trending(html, max_count=5):
+    """user-010 이전의 파싱 방식 (html.parser, 문자열 셀렉터를 매번 순차 시도)."""
+    soup = BeautifulSoup(html, "html.parser")
+    potential_articles = []
+    for selector in LEGACY_SELECTORS:
+        found_items = soup.select(selector)
+        if found_items:
+            potential_articles = found_items
+            break
+    news_items = []
+    for item in potential_articles[:max_count]:
+        title_tag = item.select_one("h4 a") or item.select_one("a.link_news") or item.select_one("a")
+        link_tag = item.select_one("a")
+        image_tag = (item.select_one("img") or item.select_one("img.news_thumb")
+                     or item.select_one("div.thumb img") or item.select_one("header a img"))
+        title = title_tag.get_text(strip=True) if title_tag else "제목 없음"
+        link = link_tag["href"] if link_tag and link_tag.has_attr("href") else "#"
+        image = image_tag.get("src") if image_tag else "https://via.placeholder.com/200"
+        if title != "제목 없음" and link != "#":
+            news_items.append({"title": title, "image": image, "link": link})
+    return news_items
+
+
+def synthetic_trending_page(noise_blocks=300):
+    """실제 랭킹 페이지처럼 메뉴·광고 목록이 많고 기사 목록은 랭킹 섹션에 있는 페이지를 만듭니다."""
+    noise = "".join(
+        f'<div class="gnb"><ul><li><a href="/menu/{i}">메뉴 {i}</a></li><li><span>광고 {i}</span></li></ul></div>'
+        for i in range(noise_blocks)
+    )
+    articles = "".join(
+        f'<li><div class="thumb"><img src="//image.donga.com/{i}.jpg"></div>'
+        f'<h4><a href="/news/article/all/2026101{i}/1">랭킹 기사 제목 {i}</a></h4></li>'
+        for i in range(10)
+    )
+    return f'<html><body>{noise}<section class="ranking_type01"><ul>{articles}</ul></section></body></html>'
+
+
+def bench(fn, html, repeat):
+    fn(html) # 워밍업 (셀렉터 기억 포함)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--html", help="파싱할 트렌딩 페이지 HTML 파일 (기본: 합성 페이지)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.html:
+        with open(args.html, encoding="utf-8") as f:
+            html = f.read()
+    else:
+        html = synthetic_trending_page()
+
+    legacy_ms = bench(legacy_parse_trending, html, args.repeat)
+    current_ms = bench(lambda h: app.parse_donga_trending_html(h, TRENDING_URL), html, args.repeat)
+    assert [a["title"] for a in legacy_parse_trending(html)] == [a["title"] for a in app.parse_donga_trending_html(html, TRENDING_URL)]
+
+    print(f"page size: {len(html) / 1024:.1f} KiB, repeat: {args.repeat}, parser: {scraper.HTML_PARSER}")
+    print(f"legacy (html.parser, cascade every request): {legacy_ms:.2f} ms/page")
+    print(f"current (compiled selectors, remembered):     {current_ms:.2f} ms/page")
+    print(f"speedup: {legacy_ms / current_ms:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+콜드 스타트 임포트 시간 프로파일입니다.
+새 인터프리터에서 `python -X importtime -c "import app"`을 여러 번 실행하여
+전체 임포트 시간(중앙값), 최상위 모듈별 누적 임포트 시간, 시작 시 임포트되면 안 되는 무거운 모듈을 JSON으로 출력합니다.
+임포트 시간이 --budget-ms를 넘거나 지연 임포트 대상 모듈이 시작 시 임포트되면 종료 코드 1을 반환하므로 회귀 확인에 사용할 수 있습니다.
+
+실행: python benchmarks/profile_imports.py [--module app] [--repeat 5] [--budget-ms 250] [--top 15] [--output result.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# 처음 사용할 때 임포트하도록 바꾼 무거운 모듈: 시작 시 임포트되면 회귀로 봄
+LAZY_MODULES = ("feedparser", "bs4", "soupsieve", "lxml", "google.genai", "pandas", "PIL.Image", "numpy")
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def profile_once(module):
+    """새 인터프리터에서 module을 한 번 임포트하고 (벽시계 시간 ms, [(모듈, 자체 us, 누적 us, 깊이)])를 반환합니다."""
+    env = dict(os.environ, FEED_PREFETCH="0", AIRKOREA_PREFETCH="0", WEATHER_PREFETCH="0", CALLBACK_MODE="0", ALERT_SCHEDULER="0")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=REPO_DIR, env=env,
+                          capture_output=True, text=True, timeout=120)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return wall_ms, rows
+
+
+def interpreter_ms():
+    """인터프리터 자체 시작 시간(ms). 임포트와 무관한 고정 비용이라 벽시계 시간에서 따로 보여 줌."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], cwd=REPO_DIR, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="임포트할 진입점 모듈 (app 또는 async_app)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="진입점 모듈 누적 임포트 시간 예산(ms)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일")
+    args = parser.parse_args()
+
+    runs = [profile_once(args.module) for _ in range(args.repeat)]
+    interpreter = statistics.median(interpreter_ms() for _ in range(args.repeat))
+
+    # 진입점 모듈이 직접 임포트한(깊이 1) 모듈별 누적 시간의 중앙값
+    # (-X importtime은 하위 모듈을 상위 모듈보다 먼저 출력하므로, 진입점 줄 바로 앞의 깊이 1 줄들이 그 하위 모듈임)
+    per_module = {}
+    for _, rows in runs:
+        children = []
+        for name, _, cumulative_us, depth in rows:
+            if depth == 1:
+                children.append((name, cumulative_us))
+            elif depth == 0:
+                if name == args.module:
+                    for child, child_us in children:
+                        per_module.setdefault(child, []).append(child_us)
+                children = []
+    direct = sorted(((name, statistics.median(values) / 1000) for name, values in per_module.items()),
+                    key=lambda item: item[1], reverse=True)
+    entry_rows = [next(row for row in rows if row[0] == args.module and row[3] == 0) for _, rows in runs]
+    entry_ms = statistics.median(row[2] for row in entry_rows) / 1000
+    entry_self_ms = statistics.median(row[1] for row in entry_rows) / 1000
+    imported = {name for name, _, _, _ in runs[0][1]}
+    eager_lazy_modules = [name for name in LAZY_MODULES if name in imported]
+
+    report = {
+        "module": args.module,
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "import_ms": round(entry_ms, 1),
+        "module_self_ms": round(entry_self_ms, 1),
+        "wall_ms": round(statistics.median(wall for wall, _ in runs), 1),
+        "interpreter_ms": round(interpreter, 1),
+        "budget_ms": args.budget_ms,
+        "within_budget": entry_ms <= args.budget_ms and not eager_lazy_modules,
+        "eager_lazy_modules": eager_lazy_modules,
+        "modules_imported": len(imported),
+        "direct_imports_ms": {name: round(ms, 1) for name, ms in direct[:args.top]},
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if not report["within_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+오프라인 파싱·렌더링 벤치마크 모음입니다.
+업스트림 호출(upstream.get)을 benchmarks/fixtures의 응답 본문으로 바꿔 치운 뒤,
+RSS 파싱, 동아일보 검색/트렌딩 스크래퍼, get_coords, create_weather_card, Flask 라우트 핸들러의
+호출당 소요 시간을 측정하여 JSON으로 출력합니다. 커밋 간 비교는 --compare로 이전 결과 파일을 넘기면 됩니다.
+
+실행: python benchmarks/run_benchmarks.py [--repeat 200] [--output result.json] [--compare baseline.json]
+      python benchmarks/run_benchmarks.py --record   # 실제 업스트림 응답으로 픽스처를 다시 녹화
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+sys.path.insert(0, REPO_DIR)
+os.chdir(REPO_DIR) # app.py가 region_coords.json을 상대 경로로 읽음
+os.environ.setdefault("FEED_PREFETCH", "0")
+os.environ.setdefault("AIRKOREA_PREFETCH", "0")
+os.environ.setdefault("WEATHER_PREFETCH", "0")
+os.environ.setdefault("CALLBACK_MODE", "0")
+
+import requests # noqa: E402
+
+import app # noqa: E402
+import scraper # noqa: E402
+import upstream # noqa: E402
+
+# 픽스처 이름 → (파일명, URL 판별 함수)
+FIXTURES = {
+    "rss": ("rss_politics.xml", lambda url: "rss.donga.com" in url),
+    "donga_search": ("donga_search.html", lambda url: "/news/search" in url),
+    "donga_trending": ("donga_trending.html", lambda url: "/TrendNews/" in url),
+    "kma": ("kma_ultra_srt_ncst.json", lambda url: "getUltraSrtNcst" in url),
+    "airkorea": ("airkorea_ctprvn.json", lambda url: "getCtprvnRltmMesureDnsty" in url),
+}
+RECORD_INFO_PATH = os.path.join(FIXTURES_DIR, "recorded.json")
+
+SEARCH_KEYWORD = "경제"
+REGION_SAMPLES = ["서울", "부산", "수원시 장안구", "제주", "강남구", "광주", "없는지역", "대구광역시 수성구"]
+
+
+def fixture_name(url):
+    for name, (_, matches) in FIXTURES.items():
+        if matches(url):
+            return name
+    return None
+
+
+def load_fixtures():
+    fixtures = {}
+    for name, (filename, _) in FIXTURES.items():
+        with open(os.path.join(FIXTURES_DIR, filename), "rb") as f:
+            fixtures[name] = f.read()
+    return fixtures
+
+
+class FixtureResponse:
+    """requests.Response 대신 돌려주는 최소한의 응답 객체입니다."""
+
+    def __init__(self, content, url):
+        self.status_code = 200
+        self.content = content
+        self.url = url
+        self.headers = {}
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+def install_fixture_upstream(fixtures):
+    """upstream.get을 픽스처 응답으로 바꿉니다. 픽스처가 없는 URL은 연결 오류로 처리합니다."""
+    def fixture_get(url, params=None, headers=None, timeout=5, retries=None, breaker=None, stream=False):
+        name = fixture_name(url)
+        if name is None:
+            raise requests.exceptions.ConnectionError(f"No benchmark fixture for {url}")
+        return FixtureResponse(fixtures[name], url)
+    upstream.get = fixture_get
+
+
+def record_fixtures():
+    """실제 업스트림을 호출하면서 응답 본문을 가로채 픽스처 파일로 저장합니다."""
+    captured = {}
+    real_get = upstream.get
+
+    def recording_get(url, **kwargs):
+        res = real_get(url, **kwargs)
+        name = fixture_name(url)
+        if name is not None and res.status_code == 200:
+            captured[name] = res.content
+        return res
+
+    upstream.get = recording_get
+    base_date, base_time = app.current_base_slot()
+    app.fetch_rss_news(app.NEWS_FEEDS["정치"]["rss"], max_count=30)
+    app.fetch_donga_search_news(SEARCH_KEYWORD)
+    app.fetch_donga_trending_news(app.TRENDING_PAGES["일간 뉴스"])
+    app.fetch_kma_observation(60, 127, base_date, base_time, app.WEATHER_SERVICE_KEY)
+    app.fetch_airkorea_page("서울", 1, 100)
+    upstream.get = real_get
+
+    for name, content in captured.items():
+        with open(os.path.join(FIXTURES_DIR, FIXTURES[name][0]), "wb") as f:
+            f.write(content)
+    missing = sorted(set(FIXTURES) - set(captured))
+    with open(RECORD_INFO_PATH, "w", encoding="utf-8") as f:
+        json.dump({"recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "recorded": sorted(captured), "missing": missing},
+                  f, ensure_ascii=False, indent=2)
+    print(f"Recorded fixtures: {sorted(captured)}; failed: {missing}")
+
+
+def fixture_info():
+    if os.path.exists(RECORD_INFO_PATH):
+        with open(RECORD_INFO_PATH, encoding="utf-8") as f:
+            return dict(json.load(f), kind="recorded")
+    return {"kind": "synthetic"}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def bench(fn, repeat, warmup=3):
+    """fn을 repeat번 호출하고 호출당 시간(마이크로초) 통계를 반환합니다."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "repeat": repeat,
+        "mean_us": round(statistics.fmean(samples), 2),
+        "median_us": round(statistics.median(samples), 2),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+        "min_us": round(samples[0], 2),
+    }
+
+
+def benchmark_cases(fixtures):
+    """(이름, 함수) 목록. 라우트 벤치마크는 실제 서빙과 같이 캐시를 거친 경로를 측정합니다."""
+    rss_url = app.NEWS_FEEDS["정치"]["rss"]
+    trending_url = app.TRENDING_PAGES["일간 뉴스"]
+    search_html = fixtures["donga_search"].decode("utf-8")
+    trending_html = fixtures["donga_trending"].decode("utf-8")
+    weather_data = dict(app.parse_kma_observation(json.loads(fixtures["kma"])), PM10="35", PM25="12")
+    client = app.app.test_client()
+    region_cycle = {"i": 0}
+
+    def lookup_region():
+        region_cycle["i"] = (region_cycle["i"] + 1) % len(REGION_SAMPLES)
+        return app.get_coords(REGION_SAMPLES[region_cycle["i"]])
+
+    def post(path, body):
+        return lambda: client.post(path, json=body).get_data()
+
+    return [
+        ("parse_rss_entries", lambda: app.parse_rss_entries(fixtures["rss"], max_count=30)),
+        ("fetch_rss_news", lambda: app.fetch_rss_news(rss_url, max_count=5)),
+        ("parse_donga_search_html", lambda: app.parse_donga_search_html(search_html, SEARCH_KEYWORD)),
+        ("fetch_donga_search_news", lambda: app.fetch_donga_search_news(SEARCH_KEYWORD)),
+        ("parse_donga_trending_html", lambda: app.parse_donga_trending_html(trending_html, trending_url)),
+        ("fetch_donga_trending_news", lambda: app.fetch_donga_trending_news(trending_url)),
+        ("get_coords", lookup_region),
+        ("create_weather_card", lambda: app.create_weather_card("서울", weather_data, app.KMA_WEB_URL)),
+        ("route_news_category", post("/news/politics", {})),
+        ("route_news_trending", post("/news/trending", {})),
+        ("route_ask_keyword", post("/news/ask_keyword", {"userRequest": {"utterance": SEARCH_KEYWORD}})),
+        ("route_news_weather", post("/news/weather", {"action": {"params": {"region_name": "서울"}}})),
+    ]
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    lines = [f"{'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>8}"]
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median_us"], result["median_us"]
+        lines.append(f"{name:<28} {before:>10.1f}us {after:>10.1f}us {(after - before) / before * 100:>+7.1f}%")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 (기본: 표준 출력)")
+    parser.add_argument("--compare", help="이전 결과 JSON과 중앙값을 비교해 표준 에러로 출력")
+    parser.add_argument("--only", help="이름에 이 문자열이 들어간 벤치마크만 실행")
+    parser.add_argument("--record", action="store_true", help="실제 업스트림 응답으로 픽스처를 다시 녹화")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures()
+        return
+
+    fixtures = load_fixtures()
+    install_fixture_upstream(fixtures)
+    results = {}
+    # 앱의 처리 로그가 결과 JSON과 섞이지 않도록 벤치마크 중에는 표준 출력을 버림
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, fn in benchmark_cases(fixtures):
+            if args.only and args.only not in name:
+                continue
+            results[name] = bench(fn, args.repeat)
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "html_parser": scraper.HTML_PARSER,
+            "fixtures": fixture_info(),
+        },
+        "results": results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if args.compare:
+        print(compare(results, args.compare), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+워커 프로세스 간 공유 캐시 계층입니다.
+gunicorn 등으로 워커를 여러 개 띄우면 프로세스마다 메모리 캐시가 따로 데워져 업스트림 호출이 워커 수만큼 늘어나므로,
+TieredCache는 프로세스 안의 메모리 캐시(LRU/TTL) 뒤에 같은 호스트의 모든 워커가 읽는 공유 계층(SQLiteBackend)을 둡니다.
+
+- get(): 메모리 → 공유 계층 순으로 찾고, 공유 계층에서 찾은 값은 남은 TTL만큼 메모리에 채웁니다.
+- get_or_load(): 둘 다 없으면 프로세스 안에서는 SingleFlight로, 프로세스 사이에서는 공유 계층의 임대(lease)로
+  호스트 전체에서 한 워커만 업스트림을 호출하고, 나머지 워커는 공유 계층에 결과가 들어오기를 기다립니다.
+공유 계층의 값은 JSON으로 저장하므로 JSON으로 표현할 수 있는 값(기사 리스트, 관측값 dict 등)만 캐시합니다.
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import request_deadline
+from cache_utils import SingleFlight
+
+
+class CacheBackend:
+    """
+    공유 캐시 계층 인터페이스입니다. 다른 저장소(예: 메모리 맵 파일, Redis)를 쓰려면 이 메서드들을 구현하면 됩니다.
+    모든 메서드는 저장소 오류를 예외로 올리지 않고 미스(또는 임대 획득)로 처리해야 합니다. (캐시 장애가 응답 장애가 되지 않도록)
+    """
+
+    def get_entry(self, key):
+        """(값, 만료 시각) 또는 None."""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def acquire_lease(self, key, ttl):
+        """key를 불러올 권리를 ttl초 동안 얻으면 True. 다른 워커가 이미 가지고 있으면 False."""
+        raise NotImplementedError
+
+    def release_lease(self, key):
+        raise NotImplementedError
+
+    def lease_held(self, key):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    WAL 모드 SQLite 파일을 사용하는 호스트 공유 캐시입니다.
+    WAL 모드에서는 읽기가 쓰기를 막지 않으므로 여러 워커가 동시에 읽을 수 있습니다.
+    연결은 스레드(와 프로세스)마다 따로 열어, fork된 워커가 부모의 연결을 물려받아 쓰지 않도록 합니다.
+    """
+
+    def __init__(self, path, max_entries=50000, purge_every=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self.owner = None
+        self._local = threading.local()
+        self._writes = 0
+        self.errors = 0
+        conn = self._connection()
+        conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+
+    def _connection(self):
+        pid = os.getpid()
+        if getattr(self._local, "pid", None) != pid:
+            conn = sqlite3.connect(self.path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = pid
+            self.owner = str(pid)
+        return self._local.conn
+
+    def _error(self, operation, error):
+        self.errors += 1
+        if self.errors <= 10 or self.errors % 1000 == 0:
+            print(f"Shared cache {operation} failed ({self.path}): {error}")
+            sys.stdout.flush()
+
+    def get_entry(self, key):
+        try:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        except sqlite3.Error as e:
+            self._error("read", e)
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, ttl):
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False, separators=(",", ":")), time.time() + ttl))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self._error("write", e)
+            return
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self.purge()
+
+    def delete(self, key):
+        try:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self._error("delete", e)
+
+    def purge(self):
+        """만료된 항목을 지우고, 그래도 max_entries를 넘으면 가장 먼저 만료될 항목부터 지웁니다."""
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+            conn.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+            excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute("DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)", (excess,))
+        except sqlite3.Error as e:
+            self._error("purge", e)
+
+    def acquire_lease(self, key, ttl):
+        now = time.time()
+        try:
+            # 임대가 없거나 만료되었을 때만 이 프로세스가 가져감 (한 문장이라 워커 간 경쟁에도 하나만 성공)
+            cursor = self._connection().execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE leases.expires_at <= ?", (key, self.owner, now + ttl, now))
+        except sqlite3.Error as e:
+            self._error("lease", e)
+            return True
+        return cursor.rowcount > 0
+
+    def release_lease(self, key):
+        try:
+            self._connection().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, self.owner))
+        except sqlite3.Error as e:
+            self._error("lease release", e)
+
+    def lease_held(self, key):
+        try:
+            return self._connection().execute(
+                "SELECT 1 FROM leases WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone() is not None
+        except sqlite3.Error as e:
+            self._error("lease read", e)
+            return False
+
+    def stats(self):
+        try:
+            entries = self._connection().execute("SELECT COUNT(*) FROM cache WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {"backend": "sqlite", "path": self.path, "entries": entries, "max_entries": self.max_entries, "errors": self.errors}
+
+
+def open_backend(kind, path, max_entries=50000):
+    """
+    설정된 공유 캐시 계층을 엽니다. kind가 "memory"이거나 파일을 열 수 없으면 None(프로세스 메모리만 사용)을 반환합니다.
+    """
+    if kind == "memory":
+        return None
+    if kind != "sqlite":
+        print(f"Unknown cache backend '{kind}'; using in-process memory only.")
+        sys.stdout.flush()
+        return None
+    try:
+        return SQLiteBackend(path, max_entries=max_entries)
+    except sqlite3.Error as e:
+        print(f"Could not open shared cache at {path}: {e}; using in-process memory only.")
+        sys.stdout.flush()
+        return None
+
+
+class TieredCache:
+    """
+    프로세스 메모리 캐시(local: TTLCache/LRUTTLCache) + 호스트 공유 캐시(shared: CacheBackend, 없으면 None)입니다.
+    공유 계층 키는 "이름:JSON(키)" 형식이라 튜플 키도 그대로 사용할 수 있습니다.
+    """
+
+    def __init__(self, name, local, shared=None, lease_timeout=6.0, poll_interval=0.05):
+        self.name = name
+        self.local = local
+        self.shared = shared
+        self.lease_timeout = lease_timeout # 불러오는 워커를 기다릴 최대 시간 (업스트림 타임아웃보다 조금 길게)
+        self.poll_interval = poll_interval
+        self.single_flight = SingleFlight()
+        self.shared_hits = 0
+        self.loads = 0
+        self.lease_waits = 0
+
+    @property
+    def coalesced(self):
+        return self.single_flight.coalesced
+
+    def shared_key(self, key):
+        return f"{self.name}:{json.dumps(key, ensure_ascii=False)}"
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+        entry = self.shared.get_entry(self.shared_key(key))
+        if entry is None:
+            return None
+        value, expires_at = entry
+        self.shared_hits += 1
+        self.local.set(key, value, ttl=max(1, expires_at - time.time()))
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.local.set(key, value, ttl=ttl)
+        if self.shared is not None:
+            self.shared.set(self.shared_key(key), value, ttl or self.local.ttl)
+
+    def contains(self, key):
+        """적중/미스 통계에 영향을 주지 않고 어느 계층에든 만료되지 않은 값이 있는지 확인합니다."""
+        if self.local.contains(key):
+            return True
+        return self.shared is not None and self.shared.get_entry(self.shared_key(key)) is not None
+
+    def get_or_load(self, key, load, ttl=None, cache_if=bool):
+        """
+        캐시에 없으면 load()로 불러와 두 계층에 저장합니다. cache_if(값)가 거짓인 결과(실패)는 저장하지 않습니다.
+        같은 키를 동시에 찾는 스레드와 워커 중 하나만 load()를 호출합니다.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        return self.single_flight.do(key, lambda: self._load_once(key, load, ttl, cache_if))
+
+    def _load_once(self, key, load, ttl, cache_if):
+        if self.shared is None:
+            return self._load(key, load, ttl, cache_if)
+        shared_key = self.shared_key(key)
+        # 요청 마감 시각이 있으면 그 전까지만 다른 워커를 기다림
+        wait_until = time.monotonic() + request_deadline.clamp(self.lease_timeout)
+        while True:
+            if self.shared.acquire_lease(shared_key, self.lease_timeout):
+                try:
+                    return self._load(key, load, ttl, cache_if)
+                finally:
+                    self.shared.release_lease(shared_key)
+            # 다른 워커가 불러오는 중: 공유 계층에 결과가 들어오거나 임대가 풀릴 때까지 기다림
+            self.lease_waits += 1
+            while time.monotonic() < wait_until:
+                time.sleep(self.poll_interval)
+                entry = self.shared.get_entry(shared_key)
+                if entry is not None:
+                    value, expires_at = entry
+                    self.shared_hits += 1
+                    self.local.set(key, value, ttl=max(1, expires_at - time.time()))
+                    return value
+                if not self.shared.lease_held(shared_key):
+                    break # 불러오던 워커가 실패함: 임대를 다시 시도
+            else:
+                # 기다려도 결과가 없으면 직접 불러옴
+                return self._load(key, load, ttl, cache_if)
+
+    def _load(self, key, load, ttl, cache_if):
+        self.loads += 1
+        value = load()
+        if cache_if(value):
+            self.set(key, value, ttl)
+        return value
+
+    def stats(self):
+        return dict(
+            self.local.stats(),
+            shared=self.shared is not None,
+            shared_hits=self.shared_hits,
+            loads=self.loads,
+            lease_waits=self.lease_waits,
+        )
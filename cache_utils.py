@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class SingleFlight:
+    """
+    같은 키에 대한 동시 요청을 하나의 실행으로 합칩니다.
+    첫 호출자(리더)만 fn을 실행하고, 나머지는 리더의 결과(또는 예외)를 그대로 받습니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0 # 리더를 기다려 결과를 공유받은 호출 수
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["event"].set()
+
+
+class TTLCache:
+    """만료 시간과 최대 항목 수가 있는 스레드 안전 메모리 캐시입니다. 적중/미스 횟수를 집계합니다."""
+
+    def __init__(self, ttl, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > now:
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            if len(self._data) >= self.max_entries and key not in self._data:
+                self._purge(time.time())
+            self._data[key] = (time.time() + (ttl or self.ttl), value)
+
+    def contains(self, key):
+        """적중/미스 통계에 영향을 주지 않고 만료되지 않은 항목이 있는지 확인합니다."""
+        item = self._data.get(key)
+        return item is not None and item[0] > time.time()
+
+    def _purge(self, now):
+        """만료된 항목을 지우고, 그래도 가득 차 있으면 가장 먼저 만료될 항목부터 지웁니다."""
+        for key in [k for k, (expires, _) in self._data.items() if expires <= now]:
+            del self._data[key]
+        while len(self._data) >= self.max_entries:
+            oldest = min(self._data, key=lambda k: self._data[k][0])
+            del self._data[oldest]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class LRUTTLCache:
+    """
+    만료 시간이 있고, 가득 차면 가장 오래 사용하지 않은 항목부터 내보내는(LRU) 스레드 안전 메모리 캐시입니다.
+    적중/미스 외에 용량 때문에 내보낸 항목(evictions)과 만료된 항목(expirations) 수를 집계하여 크기 조정에 사용합니다.
+    """
+
+    def __init__(self, ttl, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict() # 키 -> (만료 시각, 값), 최근 사용한 항목이 뒤쪽
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._data[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.time() + (ttl or self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def contains(self, key):
+        """적중/미스 통계와 LRU 순서에 영향을 주지 않고 만료되지 않은 항목이 있는지 확인합니다."""
+        item = self._data.get(key)
+        return item is not None and item[0] > time.time()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,193 @@
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import request_deadline
+import upstream
+
+
+def callback_ack_payload(text):
+    """
+    콜백 모드 즉시 응답(useCallback)입니다.
+    카카오는 이 응답을 받은 뒤 1분 안에 callbackUrl로 도착하는 최종 응답을 사용자에게 보여줍니다.
+    """
+    return {
+        "version": "2.0",
+        "useCallback": True,
+        "data": {"text": text},
+    }
+
+
+class CallbackDispatcher:
+    """
+    느린 스킬 응답을 백그라운드에서 만들어 카카오 callbackUrl로 POST하는 제한된 작업자 풀입니다.
+    큐가 가득 차면 submit()이 False를 반환하므로, 호출한 쪽은 동기 응답으로 처리하면 됩니다.
+    작업은 접수 시각부터 budget초(카카오 콜백 유효 시간 1분보다 짧게) 안에 끝나도록 요청 마감 시각을 두고 실행합니다.
+    """
+
+    def __init__(self, max_workers=4, max_queue=100, post=None, post_timeout=5, budget=55.0):
+        self.max_workers = max_workers
+        self.budget = budget
+        self.post = post or upstream.post # post(url, json=, timeout=) -> 응답 객체
+        self.post_timeout = post_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._threads = []
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.total_latency = 0.0 # 접수부터 POST 완료까지 걸린 시간의 합
+
+    def submit(self, callback_url, compute):
+        """compute()가 만든 응답 dict를 callback_url로 보낼 작업을 큐에 넣습니다. 큐가 가득 차면 False."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((callback_url, compute, time.time()))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.max_workers):
+                thread = threading.Thread(target=self._run, name=f"callback-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        while True:
+            callback_url, compute, queued_at = self._queue.get()
+            with self._lock:
+                self.in_flight += 1
+            try:
+                # 큐에서 기다린 시간만큼 예산을 줄여서, 콜백 유효 시간 안에 POST까지 끝나도록 함
+                with request_deadline.scope(self.budget - (time.time() - queued_at)):
+                    payload = compute()
+                    res = self.post(callback_url, json=payload, timeout=self.post_timeout)
+                res.raise_for_status()
+                with self._lock:
+                    self.completed += 1
+                    self.total_latency += time.time() - queued_at
+                print(f"Callback delivered to {callback_url} in {time.time() - queued_at:.2f} seconds.")
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"Error delivering callback to {callback_url}: {e}")
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                self._queue.task_done()
+            sys.stdout.flush()
+
+    def join(self):
+        """큐에 들어간 작업이 모두 끝날 때까지 기다립니다 (테스트용)."""
+        self._queue.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_depth,
+                "queue_capacity": self._queue.maxsize,
+                "in_flight": self.in_flight,
+                "workers": self.max_workers,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_latency": round(self.total_latency / self.completed, 4) if self.completed else 0.0,
+            }
+
+
+class FakeCallbackReceiver:
+    """
+    오프라인 테스트용 가짜 카카오 콜백 수신 서버입니다.
+    127.0.0.1의 임의 포트에서 POST 본문(JSON)을 받아 received 리스트에 순서대로 쌓습니다.
+
+    사용 예:
+        with FakeCallbackReceiver() as receiver:
+            ... {"userRequest": {"callbackUrl": receiver.url}} 로 스킬 호출 ...
+            receiver.wait_for(1)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.received = []
+        self._cond = threading.Condition()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with receiver._cond:
+                    receiver.received.append({"path": self.path, "body": json.loads(body or b"null")})
+                    receiver._cond.notify_all()
+                response = json.dumps({"taskId": str(len(receiver.received)), "status": "SUCCESS"}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/callback"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-callback-receiver", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def wait_for(self, count, timeout=10):
+        """count개의 콜백을 받을 때까지 기다리고 받은 본문 리스트를 반환합니다."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.received) >= count, timeout=timeout)
+            return [r["body"] for r in self.received]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    # 로컬에서 가짜 콜백 서버만 띄워 두고 스킬 서버를 수동으로 호출해 볼 때 사용
+    receiver = FakeCallbackReceiver(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765).start()
+    print(f"Fake callback receiver listening on {receiver.url}")
+    sys.stdout.flush()
+    seen = 0
+    try:
+        while True:
+            bodies = receiver.wait_for(seen + 1, timeout=3600)
+            for body in bodies[seen:]:
+                print(json.dumps(body, ensure_ascii=False, indent=2))
+            seen = len(bodies)
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        receiver.stop()
@@ -0,0 +1,86 @@
+import sys
+import threading
+import time
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """회로가 열려 있어 업스트림을 호출하지 않고 바로 실패한 경우의 예외입니다. (기존 RequestException 처리 경로를 그대로 탐)"""
+
+
+class CircuitBreaker:
+    """
+    업스트림 하나에 대한 회로 차단기입니다.
+    연속 실패(오류·타임아웃·5xx)가 failure_threshold번 쌓이면 회로를 열어 reset_timeout초 동안 호출 없이 바로 실패시키고,
+    그 뒤에는 한 번의 시험 호출(half-open)만 허용하여 성공하면 닫고 실패하면 다시 엽니다.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.opened_count = 0
+        self.short_circuited = 0
+
+    def allow(self):
+        """지금 업스트림을 호출해도 되는지 반환합니다. 열린 회로에서 reset_timeout이 지나면 시험 호출 하나만 허용합니다."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def is_open(self):
+        """호출하지 않고도 실패할 것이 확실한 상태인지 확인합니다 (시험 호출 시간이 되었으면 False)."""
+        with self._lock:
+            return self.state == OPEN and time.time() - self.opened_at < self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"Circuit '{self.name}' closed after a successful probe.")
+                sys.stdout.flush()
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """성공도 실패도 아닌 결과(요청 예산 소진 등)로 끝난 호출입니다. 시험 호출 자리만 반납하고 상태는 그대로 둡니다."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opened_count += 1
+                    print(f"Circuit '{self.name}' opened after {self.consecutive_failures} consecutive failures; failing fast for {self.reset_timeout:.0f}s.")
+                    sys.stdout.flush()
+                self.state = OPEN
+                self.opened_at = time.time()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "opened_count": self.opened_count,
+                "short_circuited": self.short_circuited,
+            }
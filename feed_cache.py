@@ -0,0 +1,176 @@
+import sys
+import threading
+import time
+
+
+class FeedEntry:
+    """피드 하나의 캐시 상태(마지막 정상 기사 목록, 갱신 시각, 오류)를 보관합니다."""
+
+    def __init__(self, url, ttl):
+        self.url = url
+        self.ttl = ttl
+        self.articles = []
+        self.fetched_at = None # 마지막으로 정상 갱신된 시각 (freshness 타임스탬프)
+        self.last_attempt = None
+        self.last_error = None
+        # 조건부 GET 검증자 (서버가 내려준 ETag / Last-Modified)
+        self.etag = None
+        self.last_modified = None
+        self.not_modified_count = 0
+        self.version = 0 # 기사 목록이 바뀔 때마다 증가 (304 응답으로는 바뀌지 않음)
+
+    def age(self, now=None):
+        if self.fetched_at is None:
+            return None
+        return (now or time.time()) - self.fetched_at
+
+    def is_fresh(self, now=None):
+        age = self.age(now)
+        return age is not None and age < self.ttl
+
+
+class FeedCache:
+    """
+    카테고리 RSS 피드를 메모리에 보관하고 백그라운드 스레드로 주기적으로 갱신합니다.
+    라우트는 get()으로 파싱된 기사 목록을 바로 읽고, 갱신 실패 시에는 마지막 정상 데이터를 그대로 사용합니다.
+    """
+
+    def __init__(self, fetcher, default_ttl=180, refresh_interval=60, on_update=None):
+        # fetcher(url, etag=, last_modified=) -> {"articles", "not_modified", "etag", "last_modified"[, "fetched_at"]}
+        self.fetcher = fetcher
+        self.on_update = on_update # on_update(url, articles): 새 기사 목록을 받았을 때 호출 (예: 검색 색인)
+        self.default_ttl = default_ttl
+        self.refresh_interval = refresh_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, url, ttl=None):
+        """갱신 대상 피드를 등록합니다. 이미 등록된 피드면 TTL만 갱신합니다."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                entry = FeedEntry(url, ttl or self.default_ttl)
+                self._entries[url] = entry
+            elif ttl:
+                entry.ttl = ttl
+            return entry
+
+    def refresh(self, url):
+        """피드 하나를 갱신합니다. 실패하면 마지막 정상 기사 목록을 유지하고 False를 반환합니다."""
+        entry = self._entries.get(url) or self.register(url)
+        entry.last_attempt = time.time()
+        entry.last_error = None
+        # 기사 목록이 없으면 검증자를 보내지 않음 (304를 받아도 사용할 데이터가 없으므로)
+        etag = entry.etag if entry.articles else None
+        last_modified = entry.last_modified if entry.articles else None
+        try:
+            result = self.fetcher(url, etag=etag, last_modified=last_modified)
+        except Exception as e:
+            result = {"articles": [], "not_modified": False}
+            entry.last_error = str(e)
+        if result.get("not_modified"):
+            # 304: 피드가 바뀌지 않았으므로 파싱 없이 기존 기사 목록의 신선도만 연장
+            entry.fetched_at = result.get("fetched_at") or time.time()
+            entry.not_modified_count += 1
+            return True
+        articles = result.get("articles")
+        if not articles:
+            entry.last_error = entry.last_error or "empty feed"
+            print(f"Feed refresh failed for {url}, keeping last good copy ({len(entry.articles)} articles). Error: {entry.last_error}")
+            sys.stdout.flush()
+            return False
+        entry.articles = articles
+        entry.version += 1
+        # 다른 워커가 받아 둔 결과를 공유받았으면 그 워커가 받은 시각 기준으로 신선도를 계산
+        entry.fetched_at = result.get("fetched_at") or time.time()
+        entry.etag = result.get("etag")
+        entry.last_modified = result.get("last_modified")
+        if self.on_update is not None:
+            try:
+                self.on_update(url, articles)
+            except Exception as e:
+                print(f"Feed update hook failed for {url}: {e}")
+                sys.stdout.flush()
+        return True
+
+    def refresh_due(self):
+        """다음 갱신 주기 전에 TTL이 만료될 피드들을 미리 갱신합니다."""
+        now = time.time()
+        for entry in list(self._entries.values()):
+            age = entry.age(now)
+            if age is None or age + self.refresh_interval >= entry.ttl:
+                self.refresh(entry.url)
+
+    def peek(self, url):
+        """갱신을 시도하지 않고 현재 캐시된 기사 목록과 갱신 시각만 반환합니다."""
+        entry = self._entries.get(url)
+        if entry is None:
+            return [], None
+        return entry.articles, entry.fetched_at
+
+    def version(self, url):
+        """피드 기사 목록의 버전을 반환합니다. 렌더링된 응답 캐시의 무효화 기준으로 사용합니다."""
+        entry = self._entries.get(url)
+        return entry.version if entry is not None else 0
+
+    def is_stale(self, url):
+        """최근 갱신이 실패하여 TTL이 지난 마지막 정상 기사 목록을 응답하고 있는지 확인합니다."""
+        entry = self._entries.get(url)
+        return entry is not None and entry.last_error is not None and bool(entry.articles) and not entry.is_fresh()
+
+    def get(self, url):
+        """
+        캐시된 기사 목록과 갱신 시각을 반환합니다.
+        한 번도 받아오지 못한 피드이거나, 백그라운드 갱신기가 꺼진 상태에서 TTL이 지났다면 즉시 갱신합니다.
+        """
+        entry = self._entries.get(url) or self.register(url)
+        if not entry.articles or (not self.is_running() and not entry.is_fresh()):
+            self.refresh(url)
+        return entry.articles, entry.fetched_at
+
+    def status(self):
+        """피드별 캐시 상태를 반환합니다 (모니터링용)."""
+        now = time.time()
+        return {
+            entry.url: {
+                "articles": len(entry.articles),
+                "age": entry.age(now),
+                "ttl": entry.ttl,
+                "fresh": entry.is_fresh(now),
+                "last_error": entry.last_error,
+                "not_modified": entry.not_modified_count,
+            }
+            for entry in list(self._entries.values())
+        }
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """백그라운드 갱신 스레드를 시작합니다."""
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="feed-cache-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self):
+        print(f"Feed cache refresher started (interval={self.refresh_interval}s, feeds={len(self._entries)})")
+        sys.stdout.flush()
+        while not self._stop.is_set():
+            start_time = time.time()
+            try:
+                self.refresh_due()
+            except Exception as e:
+                print(f"Error in feed cache refresher: {e}")
+                sys.stdout.flush()
+            elapsed = time.time() - start_time
+            self._stop.wait(max(1.0, self.refresh_interval - elapsed))
@@ -0,0 +1,65 @@
+import math
+
+# 기상청 동네예보 격자 (Lambert Conformal Conic) 변환 상수
+RE = 6371.00877 # 지구 반경 (km)
+GRID = 5.0 # 격자 간격 (km)
+SLAT1 = 30.0 # 투영 위도 1 (degree)
+SLAT2 = 60.0 # 투영 위도 2 (degree)
+OLON = 126.0 # 기준점 경도 (degree)
+OLAT = 38.0 # 기준점 위도 (degree)
+XO = 43 # 기준점 X 좌표 (격자)
+YO = 136 # 기준점 Y 좌표 (격자)
+
+DEGRAD = math.pi / 180.0
+
+_re = RE / GRID
+_slat1 = SLAT1 * DEGRAD
+_slat2 = SLAT2 * DEGRAD
+_olon = OLON * DEGRAD
+_olat = OLAT * DEGRAD
+_sn = math.log(math.cos(_slat1) / math.cos(_slat2)) / math.log(
+    math.tan(math.pi * 0.25 + _slat2 * 0.5) / math.tan(math.pi * 0.25 + _slat1 * 0.5)
+)
+_sf = math.pow(math.tan(math.pi * 0.25 + _slat1 * 0.5), _sn) * math.cos(_slat1) / _sn
+_ro = _re * _sf / math.pow(math.tan(math.pi * 0.25 + _olat * 0.5), _sn)
+
+
+def latlon_to_grid_float(lat, lon):
+    """위경도를 반올림하지 않은 기상청 격자 좌표 (x, y)로 변환합니다."""
+    ra = _re * _sf / math.pow(math.tan(math.pi * 0.25 + lat * DEGRAD * 0.5), _sn)
+    theta = lon * DEGRAD - _olon
+    if theta > math.pi:
+        theta -= 2.0 * math.pi
+    if theta < -math.pi:
+        theta += 2.0 * math.pi
+    theta *= _sn
+    return ra * math.sin(theta) + XO, _ro - ra * math.cos(theta) + YO
+
+
+def latlon_to_grid(lat, lon):
+    """위경도를 기상청 격자 좌표 (nx, ny)로 변환합니다."""
+    x, y = latlon_to_grid_float(lat, lon)
+    return int(math.floor(x + 0.5)), int(math.floor(y + 0.5))
+
+
+def latlon_to_grid_batch(lats, lons):
+    """
+    여러 위경도를 한 번에 기상청 격자 좌표로 변환하여 (nx 리스트, ny 리스트)를 반환합니다.
+    NumPy가 있으면 배열 연산으로 한꺼번에 계산하고, 없으면 latlon_to_grid를 하나씩 호출합니다.
+    """
+    try:
+        import numpy as np # 색인을 만들 때만 쓰므로 콜드 스타트에 영향이 없도록 여기서 임포트
+    except ImportError:
+        cells = [latlon_to_grid(lat, lon) for lat, lon in zip(lats, lons)]
+        return [nx for nx, _ in cells], [ny for _, ny in cells]
+
+    lat = np.asarray(lats, dtype=np.float64)
+    lon = np.asarray(lons, dtype=np.float64)
+    ra = _re * _sf / np.power(np.tan(math.pi * 0.25 + lat * DEGRAD * 0.5), _sn)
+    theta = lon * DEGRAD - _olon
+    theta = np.where(theta > math.pi, theta - 2.0 * math.pi, theta)
+    theta = np.where(theta < -math.pi, theta + 2.0 * math.pi, theta)
+    theta *= _sn
+    x = ra * np.sin(theta) + XO
+    y = _ro - ra * np.cos(theta) + YO
+    return np.floor(x + 0.5).astype(np.int64).tolist(), np.floor(y + 0.5).astype(np.int64).tolist()
@@ -0,0 +1,176 @@
+"""
+Prometheus 텍스트 형식으로 내보내는 간단한 메트릭 모듈입니다.
+라우트·업스트림별 지연 시간 히스토그램과 카운터를 프로세스 메모리에 집계하고,
+/metrics 라우트가 render()의 결과를 그대로 응답합니다.
+"""
+import threading
+
+# 카카오 스킬 응답 제한(5초)에 근접한 요청으로 집계할 기준 시간(초)
+KAKAO_TIMEOUT_RISK_SECONDS = 4.5
+
+# 지연 시간 히스토그램 버킷(초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 4.5, 5.0, 10.0)
+
+
+def format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """단조 증가 카운터입니다. 레이블 값 조합별로 따로 집계합니다."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """누적 버킷 히스토그램입니다 (Prometheus histogram과 같은 _bucket/_sum/_count 형식)."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {} # 레이블 값 -> [버킷별 개수, 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * len(self.buckets), 0.0, 0]
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(tuple(str(labels.get(name, "")) for name in self.labelnames))
+        return series[2] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    labels = format_labels(self.labelnames, key, [("le", format_value(float(bound)))])
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {format_value(round(total, 6))}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """
+    메트릭 목록입니다. 직접 집계하는 Counter/Histogram 외에,
+    이미 다른 모듈이 집계하고 있는 값(캐시 적중 수 등)은 collector 함수로 등록해 render() 시점에 읽어 옵니다.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name, documentation, metric_type, labelnames, collect):
+        """collect() -> [(레이블 값 튜플, 값)]. 렌더링할 때마다 호출됩니다."""
+        self._collectors.append((name, documentation, metric_type, tuple(labelnames), collect))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, documentation, metric_type, labelnames, collect in self._collectors:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            try:
+                samples = collect()
+            except Exception as e:
+                lines.append(f"# collector error: {e}")
+                continue
+            for values, value in samples:
+                lines.append(f"{name}{format_labels(labelnames, values)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+ROUTE_LATENCY = REGISTRY.histogram(
+    "kakao_bot_route_duration_seconds", "Skill route handling time in seconds.", ("route",))
+SLOW_REQUESTS = REGISTRY.counter(
+    "kakao_bot_timeout_risk_requests_total",
+    f"Skill requests slower than {KAKAO_TIMEOUT_RISK_SECONDS}s (close to the Kakao 5s limit).", ("route",))
+ROUTE_ERRORS = REGISTRY.counter(
+    "kakao_bot_route_errors_total", "Skill requests that raised or answered with a 5xx status.", ("route",))
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "kakao_bot_upstream_duration_seconds", "Upstream call time in seconds, including parsing.", ("upstream",))
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "kakao_bot_upstream_errors_total", "Failed upstream calls.", ("upstream",))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def observe_route(route, elapsed, error=False):
+    """스킬 라우트 처리 시간과 실패 여부를 기록하고, 카카오 제한에 근접한 요청을 집계합니다."""
+    ROUTE_LATENCY.observe(elapsed, route=route)
+    if elapsed >= KAKAO_TIMEOUT_RISK_SECONDS:
+        SLOW_REQUESTS.inc(route=route)
+    if error:
+        ROUTE_ERRORS.inc(route=route)
+
+
+def observe_upstream(upstream, elapsed, error=False):
+    """업스트림 호출 시간(초)과 실패 여부를 기록합니다."""
+    UPSTREAM_LATENCY.observe(elapsed, upstream=upstream)
+    if error:
+        UPSTREAM_ERRORS.inc(upstream=upstream)
+
+
+def render():
+    return REGISTRY.render()
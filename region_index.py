@@ -0,0 +1,392 @@
+import csv
+import json
+import marshal
+import math
+import os
+import re
+import sys
+import tempfile
+
+from kma_grid import latlon_to_grid, latlon_to_grid_batch
+
+# 미리 만들어 둔 색인 파일 형식 버전 (색인 구조가 바뀌면 올려서 예전 파일을 다시 만들게 함)
+ARTIFACT_VERSION = 3
+
+# '37.5665,126.9780' 처럼 위경도로 입력된 위치 (쉼표 또는 공백으로 구분)
+LATLON_PATTERN = re.compile(r"^(-?\d{1,3}(?:\.\d+)?)\s*[,\s]\s*(-?\d{1,3}(?:\.\d+)?)$")
+
+# 경도·위도 순서로 입력된 값을 바로잡아도 되는 범위 (남한 영역을 넉넉히 감싸는 위도, 경도 구간)
+KOREA_LAT_RANGE = (32.5, 39.0)
+KOREA_LON_RANGE = (124.0, 132.0)
+
+# 위경도 입력을 가장 가까운 색인 지역으로 해석할 때 찾아볼 최대 거리 (격자 칸 수, 1칸 = 5km)
+NEAREST_MAX_RADIUS = 20
+
+# 광역 시도 전체 이름 → 사용자가 흔히 입력하는 별칭
+SIDO_ALIASES = {
+    "서울특별시": ["서울", "서울시"],
+    "부산광역시": ["부산", "부산시"],
+    "대구광역시": ["대구", "대구시"],
+    "인천광역시": ["인천", "인천시"],
+    "광주광역시": ["광주"], # '광주시'는 경기도 광주시의 정식 이름이므로 별칭에서 제외
+    "대전광역시": ["대전", "대전시"],
+    "울산광역시": ["울산", "울산시"],
+    "세종특별자치시": ["세종", "세종시"],
+    "경기도": ["경기"],
+    "강원특별자치도": ["강원", "강원도"],
+    "충청북도": ["충북"],
+    "충청남도": ["충남"],
+    "전북특별자치도": ["전북", "전라북도"],
+    "전라북도": ["전북"],
+    "전라남도": ["전남"],
+    "경상북도": ["경북"],
+    "경상남도": ["경남"],
+    "제주특별자치도": ["제주", "제주도"],
+}
+
+# 행정구역 접미사 (토큰에서 떼어낸 어간도 별칭으로 색인. 예: '종로구' → '종로')
+ADMIN_SUFFIXES = ("특별자치시", "특별자치도", "특별시", "광역시", "시", "군", "구", "읍", "면", "동", "리", "도")
+
+
+def normalize_region_name(name):
+    """공백을 정리하고 끝의 '날씨' 같은 군더더기를 제거합니다."""
+    name = re.sub(r"\s+", " ", name or "").strip()
+    if name.endswith(" 날씨"):
+        name = name[:-3].strip()
+    return name
+
+
+def in_korea(lat, lon):
+    return KOREA_LAT_RANGE[0] <= lat <= KOREA_LAT_RANGE[1] and KOREA_LON_RANGE[0] <= lon <= KOREA_LON_RANGE[1]
+
+
+def parse_latlon(text):
+    """
+    '위도,경도' 입력을 (위도, 경도)로 바꿉니다. 범위를 벗어난 값이면 None.
+    첫 값이 위도가 될 수 없을 때는 '경도,위도' 순서로 읽은 위치가 한국 안일 때만 순서를 바로잡습니다.
+    """
+    match = LATLON_PATTERN.match(text)
+    if match is None:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if abs(lat) > 90:
+        return (lon, lat) if in_korea(lon, lat) else None
+    if abs(lon) > 180:
+        return None
+    return lat, lon
+
+
+def split_compound_token(token):
+    """'수원시장안구' 처럼 시와 구가 붙어 있는 토큰을 ['수원시', '장안구']로 나눕니다."""
+    match = re.match(r"^(.{2,}?시)(.{2,}구)$", token)
+    if match:
+        return [match.group(1), match.group(2)]
+    return []
+
+
+def strip_admin_suffix(token):
+    for suffix in ADMIN_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            return token[:-len(suffix)]
+    return None
+
+
+class RegionIndex:
+    """
+    지역명 → 좌표 조회를 위한 사전 계산 색인입니다.
+    로드 시점에 시도/시군구(또는 읍면동) 토큰, 별칭, 접두사 색인을 만들어 두므로
+    조회 비용은 입력 길이에만 비례하고, 같은 입력은 항상 같은 지역으로 해석됩니다.
+    후보가 여러 개일 때는 region_coords.json에 먼저 나온 지역(더 상위 순위)을 선택합니다.
+    """
+
+    def __init__(self, region_coords, memo_size=10000):
+        self.region_coords = region_coords
+        self.memo_size = memo_size
+        self._rank = {name: i for i, name in enumerate(region_coords)}
+        self._sido_alias = {} # 별칭 → 시도 전체 이름
+        self._token_index = {} # 토큰/어간 → 가장 우선순위가 높은 전체 지역명
+        self._token_names = {} # 토큰/어간 → 해당 토큰을 가진 전체 지역명 리스트 (우선순위 순)
+        self._prefixes = {} # 접두사 → 그 접두사로 시작하는 이름 중 우선순위가 가장 높은 전체 지역명
+        self._cells = {} # 격자 (nx, ny) → 그 격자에 있는 지역 중 우선순위가 가장 높은 전체 지역명
+        self._memo = {}
+        self._build()
+
+    @classmethod
+    def from_state(cls, state, memo_size=10000):
+        """state()로 내보낸 색인으로 RegionIndex를 만듭니다. (색인을 다시 계산하지 않음)"""
+        index = cls.__new__(cls)
+        index.region_coords = state["region_coords"]
+        index.memo_size = memo_size
+        index._rank = {name: i for i, name in enumerate(index.region_coords)}
+        index._sido_alias = state["sido_alias"]
+        index._token_index = state["token_index"]
+        index._token_names = state["token_names"]
+        index._prefixes = state["prefixes"]
+        index._cells = state["cells"]
+        index._memo = {}
+        return index
+
+    def state(self):
+        """계산된 색인을 marshal로 저장할 수 있는 dict로 내보냅니다."""
+        return {
+            "region_coords": self.region_coords,
+            "sido_alias": self._sido_alias,
+            "token_index": self._token_index,
+            "token_names": self._token_names,
+            "prefixes": self._prefixes,
+            "cells": self._cells,
+        }
+
+    def _better(self, a, b):
+        if b is None:
+            return a
+        return a if self._rank[a] < self._rank[b] else b
+
+    def _add_token(self, token, full_name):
+        self._token_index[token] = self._better(full_name, self._token_index.get(token))
+        self._token_names.setdefault(token, []).append(full_name)
+
+    def _add_prefixes(self, key, full_name):
+        # 한 글자 접두사('구', '시', '동')는 어느 지역이든 될 수 있으므로 두 글자부터 색인
+        for end in range(2, len(key) + 1):
+            prefix = key[:end]
+            self._prefixes[prefix] = self._better(full_name, self._prefixes.get(prefix))
+
+    def _build(self):
+        for sido, aliases in SIDO_ALIASES.items():
+            self._sido_alias[sido] = sido
+            for alias in aliases:
+                self._sido_alias.setdefault(alias, sido)
+
+        for full_name in self.region_coords:
+            tokens = full_name.split(" ")
+            sido = tokens[0]
+            self._sido_alias.setdefault(sido, sido)
+            self._add_token(sido, full_name)
+            for alias in SIDO_ALIASES.get(sido, []):
+                self._add_token(alias, full_name)
+            for token in tokens[1:]:
+                for part in [token] + split_compound_token(token):
+                    self._add_token(part, full_name)
+                    stem = strip_admin_suffix(part)
+                    if stem:
+                        self._add_token(stem, full_name)
+            # 전체 이름과 시도를 뺀 나머지 이름 모두 접두사 검색 대상
+            self._add_prefixes(full_name, full_name)
+            self._add_prefixes("".join(tokens[1:]), full_name)
+            cell = tuple(self.region_coords[full_name])
+            self._cells[cell] = self._better(full_name, self._cells.get(cell))
+
+    def _resolve_uncached(self, name):
+        if name in self.region_coords:
+            return name
+
+        tokens = name.split(" ")
+        # '서울 종로구', '서울시 종로' 처럼 시도 별칭 + 하위 지역명으로 입력된 경우
+        sido = self._sido_alias.get(tokens[0])
+        if sido:
+            rest = tokens[1:]
+            if not rest:
+                return self._token_index.get(sido)
+            candidate = f"{sido} {''.join(rest)}"
+            if candidate in self.region_coords:
+                return candidate
+            for full_name in self._token_names.get(rest[-1], []):
+                if full_name.startswith(sido + " "):
+                    return full_name
+            prefix_hit = self._prefix_lookup(candidate)
+            if prefix_hit:
+                return prefix_hit
+
+        # 가장 구체적인(마지막) 토큰부터 색인에서 찾음
+        for token in reversed(tokens):
+            hit = self._token_index.get(token)
+            if hit:
+                return hit
+
+        # 마지막으로 접두사 검색 (예: '수원시장' → '경기도 수원시장안구')
+        return self._prefix_lookup(name) or self._prefix_lookup(name.replace(" ", ""))
+
+    def _prefix_lookup(self, key):
+        return self._prefixes.get(key) if key else None
+
+    def nearest_region(self, nx, ny, max_radius=NEAREST_MAX_RADIUS):
+        """격자 (nx, ny)에서 가장 가까운 색인 지역의 전체 이름을 반환합니다. max_radius칸 안에 없으면 None."""
+        best = None # (거리, 우선순위 비교용 이름)
+        for ring in range(max_radius + 1):
+            # 다음 고리의 격자는 최소 ring칸 떨어져 있으므로, 이미 찾은 지역이 그보다 가까우면 종료
+            if best is not None and best[0] <= ring:
+                break
+            for dx in range(-ring, ring + 1):
+                for dy in range(-ring, ring + 1):
+                    if max(abs(dx), abs(dy)) != ring:
+                        continue # 이번 고리(ring)의 바깥 테두리 격자만 확인
+                    full_name = self._cells.get((nx + dx, ny + dy))
+                    if full_name is None:
+                        continue
+                    distance = math.hypot(dx, dy)
+                    if best is None or distance < best[0]:
+                        best = (distance, full_name)
+        return best[1] if best else None
+
+    def _lookup_latlon(self, name):
+        """위경도 입력이면 (가장 가까운 지역명, 해당 위치의 격자 [nx, ny]), 위경도가 아니면 None."""
+        if not name or not (name[0].isdigit() or name[0] == "-"): # 지역명 입력은 정규식 없이 바로 건너뜀
+            return None
+        latlon = parse_latlon(name)
+        if latlon is None:
+            return None
+        nx, ny = latlon_to_grid(*latlon)
+        full_name = self.nearest_region(nx, ny)
+        if full_name is None: # 국내 지역에서 너무 먼 위치 (기상청 격자 범위 밖일 수 있음)
+            return None, None
+        return full_name, [nx, ny]
+
+    def resolve(self, region_name):
+        """
+        입력된 지역명을 region_coords.json의 전체 지역명으로 해석합니다. 찾지 못하면 None.
+        위경도('37.5665,126.9780')로 입력하면 가장 가까운 지역으로 해석합니다.
+        """
+        name = normalize_region_name(region_name)
+        if not name:
+            return None
+        latlon_hit = self._lookup_latlon(name)
+        if latlon_hit is not None:
+            return latlon_hit[0]
+        if name in self._memo:
+            return self._memo[name]
+        full_name = self._resolve_uncached(name)
+        if len(self._memo) >= self.memo_size:
+            self._memo.clear()
+        self._memo[name] = full_name
+        return full_name
+
+    def lookup(self, region_name):
+        """
+        (전체 지역명, 좌표)를 반환합니다. 찾지 못하면 (None, None).
+        위경도로 입력하면 좌표는 가장 가까운 지역의 좌표가 아니라 입력한 위치의 격자입니다.
+        """
+        latlon_hit = self._lookup_latlon(normalize_region_name(region_name))
+        if latlon_hit is not None:
+            return latlon_hit
+        full_name = self.resolve(region_name)
+        if full_name is None:
+            return None, None
+        return full_name, self.region_coords[full_name]
+
+
+def source_signature(path):
+    """원본 파일이 바뀌었는지 판단하는 값 [크기, 수정 시각(ns)]. 파일을 읽지 않고 stat 한 번으로 구합니다."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def optional_signature(path):
+    """선택 원본(읍면동 중심점)의 source_signature. 설정되지 않았거나 파일이 없으면 None."""
+    if not path:
+        return None
+    try:
+        return source_signature(path)
+    except FileNotFoundError:
+        return None
+
+
+def load_dong_centroids(path):
+    """
+    읍면동 중심점 CSV(열: sido, sigungu, dong, lat, lon)를 읽어 {'시도 시군구 읍면동': [nx, ny]}로 반환합니다.
+    시도·시군구 이름은 region_coords.json과 같은 표기여야 하며, '수원시 장안구' 처럼 띄어 쓴 시군구는 붙여서 색인합니다.
+    격자 변환은 모든 중심점을 한 번에 배치로 계산합니다. (NumPy가 있으면 벡터 연산)
+    """
+    names, lats, lons = [], [], []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            try:
+                lat, lon = float(row["lat"]), float(row["lon"])
+                name = " ".join((row["sido"].strip(), row["sigungu"].replace(" ", ""), row["dong"].strip()))
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            names.append(name)
+            lats.append(lat)
+            lons.append(lon)
+    nxs, nys = latlon_to_grid_batch(lats, lons)
+    return {name: [nx, ny] for name, nx, ny in zip(names, nxs, nys)}
+
+
+def build_region_coords(source_path, centroids_path=None):
+    """
+    region_coords.json(시군구)에 읍면동 중심점을 덧붙인 지역 → 격자 dict를 만듭니다.
+    읍면동은 시군구 뒤에 붙이므로 같은 토큰을 가진 시군구가 항상 우선합니다.
+    """
+    with open(source_path, encoding="utf-8") as f:
+        region_coords = json.load(f)
+    if optional_signature(centroids_path) is not None:
+        for name, coords in load_dong_centroids(centroids_path).items():
+            region_coords.setdefault(name, coords)
+    return region_coords
+
+
+def read_artifact(path):
+    """미리 만들어 둔 색인 파일을 한 번에 읽습니다. 없거나, 손상되었거나, 형식 버전이 다르면 None."""
+    try:
+        with open(path, "rb") as f:
+            artifact = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(artifact, dict) or artifact.get("version") != ARTIFACT_VERSION:
+        return None
+    return artifact
+
+
+def write_artifact(path, index, signature):
+    """색인을 marshal 형식으로 저장합니다. 임시 파일에 쓴 뒤 이름을 바꿔서 동시에 시작한 워커가 절반만 쓰인 파일을 읽지 않게 합니다."""
+    artifact = dict(index.state(), version=ARTIFACT_VERSION, source=signature)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".region_index-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(marshal.dumps(artifact))
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_region_index(source_path, artifact_path, centroids_path=None, memo_size=10000):
+    """
+    미리 만들어 둔 색인 파일(artifact_path)을 한 번 읽어 RegionIndex를 만듭니다.
+    색인 파일이 없거나 원본 JSON(source_path)이나 읍면동 중심점 CSV(centroids_path)가 바뀌었으면
+    원본으로 색인을 계산하고 색인 파일을 다시 씁니다.
+    원본 없이 색인 파일만 배포된 경우에는 색인 파일을 그대로 사용합니다. 둘 다 없으면 FileNotFoundError.
+    """
+    try:
+        signature = [source_signature(source_path), optional_signature(centroids_path)]
+    except FileNotFoundError:
+        signature = None
+    artifact = read_artifact(artifact_path)
+    if artifact is not None and (signature is None or artifact["source"] == signature):
+        return RegionIndex.from_state(artifact, memo_size=memo_size)
+    if signature is None:
+        raise FileNotFoundError(source_path)
+
+    index = RegionIndex(build_region_coords(source_path, centroids_path), memo_size=memo_size)
+    try:
+        write_artifact(artifact_path, index, signature)
+    except OSError as e:
+        # 읽기 전용 파일 시스템 등: 이번 시작에는 계산한 색인을 그대로 사용
+        print(f"Could not write region index artifact {artifact_path}: {e}")
+        sys.stdout.flush()
+    return index
+
+
+if __name__ == "__main__":
+    # 배포 빌드 단계에서 색인 파일을 미리 만들어 둠:
+    # python region_index.py [region_coords.json] [region_index.bin] [dong_centroids.csv]
+    source = sys.argv[1] if len(sys.argv) > 1 else "region_coords.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else "region_index.bin"
+    centroids = sys.argv[3] if len(sys.argv) > 3 else "dong_centroids.csv"
+    built = RegionIndex(build_region_coords(source, centroids))
+    write_artifact(target, built, [source_signature(source), optional_signature(centroids)])
+    print(f"Wrote region index for {len(built.region_coords)} regions to {target} ({os.path.getsize(target)} bytes).")
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from cache_utils import TTLCache
+from text_utils import char_ngrams, normalize_keyword
+
+RELEVANCE_PROMPT = (
+    "다음은 뉴스 제목 목록입니다. 각 제목이 검색어 \"{keyword}\"와 얼마나 연관되어 있는지 0~100 사이 정수로 평가하세요.\n"
+    "제목 순서대로 JSON 정수 배열만 출력하고 다른 내용은 출력하지 마세요. 예: [90, 10, 55]\n\n"
+    "{titles}"
+)
+
+
+def local_relevance_score(keyword, title):
+    """
+    모델 없이 계산하는 빠른 연관도 점수 (0~100).
+    검색어가 제목에 그대로 들어 있으면 높은 점수를 주고, 아니면 문자 2-gram 겹침 비율로 계산합니다.
+    """
+    normalized = normalize_keyword(keyword)
+    if not normalized:
+        return 0
+    if normalized.replace(" ", "") in re.sub(r"\s+", "", title.casefold()):
+        return 100
+    keyword_grams = char_ngrams(normalized)
+    if not keyword_grams:
+        return 0
+    overlap = len(keyword_grams & char_ngrams(title)) / len(keyword_grams)
+    return int(round(overlap * 90))
+
+
+def build_relevance_prompt(keyword, titles):
+    numbered = "\n".join(f"{i + 1}. {title}" for i, title in enumerate(titles))
+    return RELEVANCE_PROMPT.format(keyword=keyword, titles=numbered)
+
+
+def parse_relevance_scores(text, expected_count):
+    """모델 응답에서 JSON 정수 배열을 찾아 점수 리스트로 변환합니다. 형식이 맞지 않으면 ValueError."""
+    match = re.search(r"\[[^\[\]]*\]", text or "")
+    if not match:
+        raise ValueError(f"No score array in model response: {text!r}")
+    scores = json.loads(match.group(0))
+    if len(scores) != expected_count:
+        raise ValueError(f"Expected {expected_count} scores, got {len(scores)}")
+    return [max(0, min(100, int(str(score).rstrip('%')))) for score in scores]
+
+
+class GeminiClient:
+    """google-genai 클라이언트를 한 번만 만들어 재사용하는 모델 클라이언트입니다."""
+
+    def __init__(self, api_key, model):
+        self.api_key = api_key
+        self.model = model
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from google import genai # 무거운 모듈이므로 실제로 사용할 때 한 번만 임포트
+                    self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    def generate(self, prompt):
+        response = self._get_client().models.generate_content(model=self.model, contents=prompt)
+        return response.text
+
+
+class LocalModelClient:
+    """
+    테스트와 오프라인 실행을 위한 모델 대역입니다.
+    프롬프트의 제목 목록을 읽어 local_relevance_score로 점수를 매기고, 실제 모델과 같은 형식으로 응답합니다.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        keyword = re.search(r'검색어 "(.*?)"', prompt).group(1)
+        titles = re.findall(r"^\d+\. (.*)$", prompt, flags=re.MULTILINE)
+        return json.dumps([local_relevance_score(keyword, title) for title in titles])
+
+
+class RelevanceRanker:
+    """
+    검색 결과 제목들을 검색어와의 연관도로 정렬·필터링합니다.
+    캐시에 없는 제목만 모아 한 번의 배치 호출로 점수를 매기고, (정규화된 검색어, 제목 해시) 단위로 점수를 캐시합니다.
+    시간 예산 안에 모델 응답이 오지 않거나 오류가 나면 로컬 점수로 대체합니다 (로컬 점수는 캐시하지 않음).
+    """
+
+    def __init__(self, client=None, time_budget=1.5, min_score=50, cache_ttl=3600, max_workers=4):
+        self.client = client
+        self.time_budget = time_budget
+        self.min_score = min_score
+        self.cache = TTLCache(ttl=cache_ttl, max_entries=20000)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="relevance")
+        self.model_calls = 0
+        self.fallbacks = 0
+
+    @staticmethod
+    def cache_key(keyword, title):
+        return normalize_keyword(keyword), hashlib.sha1(title.encode("utf-8")).hexdigest()
+
+    def score(self, keyword, titles, time_budget=None):
+        """제목 리스트의 점수 리스트를 반환합니다."""
+        budget = self.time_budget if time_budget is None else time_budget
+        scores = {}
+        missing = []
+        for title in titles:
+            cached = self.cache.get(self.cache_key(keyword, title))
+            if cached is not None:
+                scores[title] = cached
+            elif title not in missing:
+                missing.append(title)
+
+        if missing and self.client is not None and budget > 0:
+            start_time = time.time()
+            future = self._executor.submit(self.client.generate, build_relevance_prompt(keyword, missing))
+            self.model_calls += 1
+            try:
+                model_scores = parse_relevance_scores(future.result(timeout=budget), len(missing))
+                for title, model_score in zip(missing, model_scores):
+                    scores[title] = model_score
+                    self.cache.set(self.cache_key(keyword, title), model_score)
+                missing = []
+                print(f"Relevance model scored {len(model_scores)} titles for '{keyword}' in {time.time() - start_time:.2f} seconds.")
+            except FutureTimeoutError:
+                # 늦게 도착한 응답도 버리지 않고 캐시에 저장하여 다음 요청에서 사용
+                future.add_done_callback(lambda f, k=keyword, t=list(missing): self._cache_late_scores(f, k, t))
+                print(f"Relevance model exceeded {budget:.1f}s budget for '{keyword}'; using local ranker.")
+            except Exception as e:
+                print(f"Relevance model error for '{keyword}': {e}; using local ranker.")
+            sys.stdout.flush()
+
+        if missing:
+            self.fallbacks += 1
+            for title in missing:
+                scores[title] = local_relevance_score(keyword, title)
+        return [scores[title] for title in titles]
+
+    def _cache_late_scores(self, future, keyword, titles):
+        try:
+            model_scores = parse_relevance_scores(future.result(), len(titles))
+        except Exception:
+            return
+        for title, model_score in zip(titles, model_scores):
+            self.cache.set(self.cache_key(keyword, title), model_score)
+
+    def rank(self, keyword, articles, max_count=5, time_budget=None):
+        """
+        기사들을 연관도 높은 순으로 정렬하고 min_score 이하인 기사를 제외합니다.
+        모두 제외되면 원래 순서의 기사를 그대로 반환합니다.
+        """
+        if not articles:
+            return []
+        scores = self.score(keyword, [a["title"] for a in articles], time_budget=time_budget)
+        ranked = sorted(zip(scores, range(len(articles)), articles), key=lambda x: (-x[0], x[1]))
+        relevant = [article for score, _, article in ranked if score > self.min_score]
+        return (relevant or articles)[:max_count]
+
+    def stats(self):
+        return dict(self.cache.stats(), model_calls=self.model_calls, fallbacks=self.fallbacks)
+
+
+def default_model_client():
+    """GEMINI_API_KEY가 설정되어 있으면 Gemini 클라이언트를, 아니면 None(로컬 점수만 사용)을 반환합니다."""
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    return GeminiClient(api_key, os.environ.get("GEMINI_MODEL", "gemini-2.5-flash-preview-05-20"))
@@ -0,0 +1,78 @@
+"""
+요청 단위 마감 시각(deadline)입니다.
+스킬 라우트 진입 시 start(예산)로 마감 시각을 정하면, 같은 요청 안의 업스트림 호출과 처리 단계가
+remaining()/upstream_timeout()으로 남은 시간을 확인하여 마감을 넘기지 않도록 자신의 타임아웃을 줄입니다.
+contextvars를 사용하므로 스레드 풀로 넘기는 작업은 submit()으로 컨텍스트를 복사해야 마감이 전달됩니다.
+"""
+import contextlib
+import contextvars
+import time
+
+import requests
+
+# 업스트림 호출에 이보다 적은 시간이 남았으면 호출하지 않고 바로 DeadlineExceeded
+MIN_UPSTREAM_TIMEOUT = 0.05
+
+_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """요청 예산을 다 써서 업스트림을 호출하지 않은 경우의 예외입니다. (기존 Timeout 처리 경로를 그대로 탐)"""
+
+
+def start(budget):
+    """현재 컨텍스트의 마감 시각을 지금부터 budget초 뒤로 설정합니다. budget이 None이면 마감을 없앱니다."""
+    _deadline.set(None if budget is None else time.monotonic() + budget)
+
+
+def clear():
+    _deadline.set(None)
+
+
+@contextlib.contextmanager
+def scope(budget):
+    """with 블록 안에서만 마감 시각을 적용합니다 (콜백 작업자 등)."""
+    token = _deadline.set(time.monotonic() + budget)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """남은 시간(초). 마감이 설정되지 않았으면 None."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def expired():
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def is_deadline_error(error):
+    """요청 예산이 끝나서 생긴 실패인지 확인합니다. (남은 시간이 MIN_UPSTREAM_TIMEOUT보다 적어 호출하지 않은 경우 포함)"""
+    return isinstance(error, DeadlineExceeded) or expired()
+
+
+def clamp(seconds, reserve=0.0):
+    """seconds와 (남은 시간 - reserve) 중 작은 값을 반환합니다. 마감이 없으면 seconds 그대로."""
+    left = remaining()
+    if left is None:
+        return seconds
+    return max(0.0, min(seconds, left - reserve))
+
+
+def upstream_timeout(timeout):
+    """업스트림 호출에 사용할 타임아웃. 남은 시간이 거의 없으면 DeadlineExceeded를 발생시킵니다."""
+    effective = clamp(timeout)
+    if effective < MIN_UPSTREAM_TIMEOUT:
+        raise DeadlineExceeded("Request deadline exceeded before upstream call")
+    return effective
+
+
+def submit(executor, fn, *args):
+    """현재 컨텍스트(마감 시각 포함)를 복사해 executor에서 fn을 실행합니다."""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
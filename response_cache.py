@@ -0,0 +1,64 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def encode_payload(payload):
+    """카카오 응답 dict를 UTF-8 JSON 바이트로 직렬화합니다."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def payload_etag(body):
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 헤더 값에 etag가 포함되어 있는지 확인합니다."""
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or ("W/" + etag) in tags
+
+
+class RenderedResponseCache:
+    """
+    최종 JSON 바이트와 ETag를 (카테고리/검색어 등) 키별로 보관하는 렌더링 결과 캐시입니다.
+    각 항목은 원본 데이터의 버전(예: 피드 갱신 시각)과 함께 저장되며,
+    버전이 같으면 dict 생성·직렬화 없이 저장된 바이트를 그대로 반환하고 버전이 바뀌면 다시 렌더링합니다.
+    """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (version, body, etag), 최근 사용 순
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+
+    def get_or_render(self, key, version, render):
+        """(body, etag)를 반환합니다. render()는 캐시가 없거나 버전이 바뀌었을 때만 호출되어 응답 dict를 만듭니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+
+        body = encode_payload(render())
+        etag = payload_etag(body)
+        with self._lock:
+            self.renders += 1
+            self._entries[key] = (version, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body, etag
+
+    def stats(self):
+        total = self.hits + self.renders
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "renders": self.renders,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,97 @@
+import importlib.util
+import re
+import threading
+import urllib.parse
+
+# bs4/soupsieve/lxml은 임포트 비용이 커서(콜드 스타트의 수십 ms) 처음 HTML을 파싱할 때 임포트함
+# lxml이 설치되어 있으면 훨씬 빠른 lxml 파서를 사용하고, 없으면 내장 html.parser로 대체 (설치 여부만 확인하고 임포트는 미룸)
+HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+
+def make_soup(html):
+    """설정된 파서 백엔드로 HTML을 파싱합니다."""
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+def compile_selector(selector):
+    import soupsieve
+    return soupsieve.compile(selector)
+
+
+def url_pattern(url):
+    """쿼리스트링과 숫자를 지운 URL 패턴을 만듭니다. (예: www.donga.com/news/search)"""
+    parts = urllib.parse.urlsplit(url)
+    return parts.netloc + re.sub(r"\d+", "{n}", parts.path)
+
+
+class CompiledSelectors:
+    """한 요소를 찾기 위한 대체 셀렉터들을 처음 사용할 때 한 번 컴파일해 두고, 처음으로 찾은 요소를 반환합니다."""
+
+    def __init__(self, *selectors):
+        self.selectors = selectors
+        self._compiled = None
+
+    def compiled(self):
+        # 동시에 처음 호출되면 두 번 컴파일될 수 있지만 결과가 같으므로 잠그지 않음
+        if self._compiled is None:
+            self._compiled = [compile_selector(s) for s in self.selectors]
+        return self._compiled
+
+    def select_one(self, tag):
+        for compiled in self.compiled():
+            found = compiled.select_one(tag)
+            if found is not None:
+                return found
+        return None
+
+
+class SelectorCascade:
+    """
+    기사 목록을 찾기 위한 셀렉터 후보들을 우선순위대로 시도하여, 요소를 하나라도 찾은 첫 셀렉터를 사용합니다.
+    URL 패턴별로 마지막에 기사를 추출한 구체적인 셀렉터를 기억해 두었다가 다음 요청에서 가장 먼저 시도합니다.
+    fallbacks(예: 'ul li')는 구체적인 셀렉터가 모두 실패했을 때만 시도하며 기억하지 않으므로,
+    한 번 이상한 페이지(개편, 오류 페이지)를 만나도 메뉴 항목 같은 요소를 계속 기사로 받아들이지 않습니다.
+    """
+
+    def __init__(self, name, selectors, fallbacks=()):
+        self.name = name
+        self.selectors = list(selectors)
+        self.fallbacks = list(fallbacks)
+        self._compiled = None # 셀렉터 -> 컴파일된 셀렉터 (처음 사용할 때 채움)
+        self._preferred = {} # URL 패턴 -> 마지막으로 성공한 구체적인 셀렉터
+        self._lock = threading.Lock()
+        self.preferred_hits = 0
+        self.full_scans = 0
+        self.fallback_hits = 0
+
+    def first_match(self, soup, pattern):
+        """요소를 찾은 첫 (셀렉터, 찾은 요소 리스트)를 반환합니다. 기억해 둔 셀렉터 → 구체적인 셀렉터 → fallbacks 순. 없으면 None."""
+        if self._compiled is None:
+            self._compiled = {s: compile_selector(s) for s in self.selectors + self.fallbacks}
+        preferred = self._preferred.get(pattern)
+        order = self.selectors if preferred is None else [preferred] + [s for s in self.selectors if s != preferred]
+        for selector in order + self.fallbacks:
+            found = self._compiled[selector].select(soup)
+            if found:
+                return selector, found
+        return None
+
+    def remember(self, pattern, selector):
+        """selector로 기사를 추출했음을 기록합니다. fallbacks는 기억하지 않습니다."""
+        with self._lock:
+            if selector not in self.selectors:
+                self.fallback_hits += 1
+            elif self._preferred.get(pattern) == selector:
+                self.preferred_hits += 1
+            else:
+                self.full_scans += 1
+                self._preferred[pattern] = selector
+
+    def stats(self):
+        return {
+            "preferred": dict(self._preferred),
+            "preferred_hits": self.preferred_hits,
+            "full_scans": self.full_scans,
+            "fallback_hits": self.fallback_hits,
+        }
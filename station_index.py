@@ -0,0 +1,67 @@
+import math
+
+from kma_grid import latlon_to_grid_float
+
+
+class StationIndex:
+    """
+    에어코리아 측정소 위치를 기상청 격자 좌표계로 옮겨 격자 버킷으로 색인합니다.
+    생성 시점에 region_coords.json의 지역마다 가까운 측정소 목록을 미리 계산해 두므로
+    요청 시에는 딕셔너리 조회 한 번으로 측정소를 찾습니다.
+    """
+
+    def __init__(self, stations, bucket_size=10, k=3):
+        # stations: [{"stationName", "sido", "lat", "lon"}, ...]
+        self.bucket_size = bucket_size # 버킷 한 변의 격자 수 (격자 1칸 = 5km)
+        self.k = k
+        self.stations = []
+        self._buckets = {}
+        self._region_nearest = {}
+        for station in stations:
+            try:
+                x, y = latlon_to_grid_float(float(station["lat"]), float(station["lon"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            entry = (x, y, station["stationName"], station["sido"])
+            self.stations.append(entry)
+            self._buckets.setdefault(self._bucket(x, y), []).append(entry)
+
+    def _bucket(self, x, y):
+        return int(x // self.bucket_size), int(y // self.bucket_size)
+
+    def nearest(self, x, y, k=None):
+        """격자 좌표 (x, y)에서 가까운 측정소 k개를 [(stationName, sido, 격자거리), ...]로 반환합니다."""
+        k = k or self.k
+        if not self.stations:
+            return []
+        bx, by = self._bucket(x, y)
+        found = []
+        ring = 0
+        max_ring = max(abs(b[0] - bx) + abs(b[1] - by) for b in self._buckets) + 1
+        while ring <= max_ring:
+            for dx in range(-ring, ring + 1):
+                for dy in range(-ring, ring + 1):
+                    if max(abs(dx), abs(dy)) != ring:
+                        continue # 이번 고리(ring)의 바깥 테두리 버킷만 확인
+                    for sx, sy, name, sido in self._buckets.get((bx + dx, by + dy), ()):
+                        found.append((math.hypot(sx - x, sy - y), name, sido))
+            # 다음 고리의 버킷은 최소 ring * bucket_size 만큼 떨어져 있으므로, 그보다 가까운 k개가 모이면 종료
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= ring * self.bucket_size:
+                    break
+            ring += 1
+        found.sort()
+        return [(name, sido, dist) for dist, name, sido in found[:k]]
+
+    def precompute_regions(self, region_coords):
+        """지역별 가까운 측정소 목록을 미리 계산합니다."""
+        self._region_nearest = {
+            full_name: self.nearest(coords[0], coords[1])
+            for full_name, coords in region_coords.items()
+        }
+        return self._region_nearest
+
+    def nearest_for_region(self, full_name):
+        """미리 계산된 지역의 가까운 측정소 목록을 반환합니다. 없으면 빈 리스트."""
+        return self._region_nearest.get(full_name, [])
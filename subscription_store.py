@@ -0,0 +1,170 @@
+"""
+'알림 받기' 구독 저장소입니다.
+구독은 (사용자, 주제, 발송 시간대) 한 줄씩 SQLite에 저장하고, (주제, 시간대) 인덱스로
+한 시간대의 구독자를 주제별로 묶음 단위로 읽어 발송 스케줄러(alert_scheduler)에 넘깁니다.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# 발송 시간대 단위(분): '8시 10분' 같은 입력은 이 단위로 내림하여 같은 시간대로 묶음
+SLOT_MINUTES = 30
+
+
+def normalize_slot(text):
+    """
+    '08:00', '8:30', '8시', '오후 6시 30분' 같은 입력을 'HH:MM' 시간대 문자열로 바꿉니다.
+    시각을 찾을 수 없으면 None을 반환합니다.
+    """
+    text = (text or "").strip()
+    match = re.search(r"(\d{1,2})\s*(?::|시)\s*(?:(\d{1,2})\s*분?)?", text)
+    if match is None:
+        return None
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    if "오후" in text and hour < 12:
+        hour += 12
+    elif "오전" in text and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    minute -= minute % SLOT_MINUTES
+    return f"{hour:02d}:{minute:02d}"
+
+
+class SubscriptionStore:
+    """
+    (주제, 시간대)로 색인된 구독 저장소입니다. path에 ':memory:'를 넘기면 메모리에서만 유지합니다.
+    한 연결을 여러 스레드가 공유하므로 모든 접근을 잠금으로 직렬화합니다.
+    fork된 워커는 부모의 연결을 물려받아 쓰지 않고 처음 접근할 때 자기 연결을 엽니다. (파일 저장소일 때)
+    """
+
+    def __init__(self, path="subscriptions.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._db = None
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS subscriptions ("
+                " user_id TEXT NOT NULL, topic TEXT NOT NULL, slot TEXT NOT NULL, created_at REAL NOT NULL,"
+                " PRIMARY KEY (user_id, topic, slot))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS subscriptions_topic_slot ON subscriptions (topic, slot, user_id)")
+            # (날짜, 시간대, 주제) 다이제스트를 보낼 권리: 먼저 INSERT한 프로세스 하나만 발송 (워커 여러 개가 같은 파일을 공유)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sent_slots ("
+                " date TEXT NOT NULL, slot TEXT NOT NULL, topic TEXT NOT NULL, owner TEXT NOT NULL, claimed_at REAL NOT NULL,"
+                " PRIMARY KEY (date, slot, topic))"
+            )
+
+    @property
+    def _conn(self):
+        # 잠금 안에서만 호출됨
+        pid = os.getpid()
+        if self._db is None or (self._pid != pid and self.path != ":memory:"):
+            self._db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            self._pid = pid
+        return self._db
+
+    def subscribe(self, user_id, topic, slot):
+        """구독을 추가합니다. 새로 추가되었으면 True, 이미 있었으면 False."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO subscriptions (user_id, topic, slot, created_at) VALUES (?, ?, ?, ?)",
+                (user_id, topic, slot, time.time()))
+            return cursor.rowcount > 0
+
+    def subscribe_many(self, rows):
+        """(user_id, topic, slot) 목록을 한 트랜잭션으로 추가합니다. (대량 이관·벤치마크용)"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO subscriptions (user_id, topic, slot, created_at) VALUES (?, ?, ?, ?)",
+                ((user_id, topic, slot, now) for user_id, topic, slot in rows))
+
+    def unsubscribe(self, user_id, topic=None, slot=None):
+        """구독을 지웁니다. topic/slot을 생략하면 해당 사용자의 그 범위 구독을 모두 지우고, 지운 개수를 반환합니다."""
+        query = "DELETE FROM subscriptions WHERE user_id = ?"
+        params = [user_id]
+        if topic is not None:
+            query += " AND topic = ?"
+            params.append(topic)
+        if slot is not None:
+            query += " AND slot = ?"
+            params.append(slot)
+        with self._lock, self._conn:
+            return self._conn.execute(query, params).rowcount
+
+    def subscriptions(self, user_id):
+        """사용자의 구독 목록 [(주제, 시간대)]을 반환합니다."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT topic, slot FROM subscriptions WHERE user_id = ? ORDER BY slot, topic", (user_id,)).fetchall()
+
+    def topics_for_slot(self, slot):
+        """시간대에 구독자가 한 명이라도 있는 주제 목록을 반환합니다."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT topic FROM subscriptions WHERE slot = ? ORDER BY topic", (slot,))]
+
+    def count(self, topic=None, slot=None):
+        query = "SELECT COUNT(*) FROM subscriptions"
+        conditions, params = [], []
+        if topic is not None:
+            conditions.append("topic = ?")
+            params.append(topic)
+        if slot is not None:
+            conditions.append("slot = ?")
+            params.append(slot)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def iter_subscribers(self, topic, slot, batch_size=100):
+        """
+        (주제, 시간대)의 구독자 ID를 batch_size개씩 리스트로 내보냅니다.
+        전체 목록을 한 번에 메모리에 올리지 않도록 user_id 기준 키셋 페이지로 나누어 읽습니다.
+        """
+        last_user_id = ""
+        while True:
+            with self._lock:
+                batch = [row[0] for row in self._conn.execute(
+                    "SELECT user_id FROM subscriptions WHERE topic = ? AND slot = ? AND user_id > ?"
+                    " ORDER BY user_id LIMIT ?", (topic, slot, last_user_id, batch_size))]
+            if not batch:
+                return
+            yield batch
+            last_user_id = batch[-1]
+
+    def claim_slot(self, date, slot, topic):
+        """
+        (날짜, 시간대, 주제)의 다이제스트를 보낼 권리를 얻습니다.
+        같은 저장소 파일을 쓰는 모든 프로세스 중 처음 호출한 하나만 True를 받습니다.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO sent_slots (date, slot, topic, owner, claimed_at) VALUES (?, ?, ?, ?, ?)",
+                (date, slot, topic, str(os.getpid()), time.time()))
+            return cursor.rowcount > 0
+
+    def slot_claimed(self, date, slot, topic):
+        """(날짜, 시간대, 주제)를 이미 어떤 프로세스가 선점했는지 확인합니다. (다이제스트를 만들기 전 빠른 확인용)"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM sent_slots WHERE date = ? AND slot = ? AND topic = ?", (date, slot, topic)).fetchone() is not None
+
+    def stats(self):
+        with self._lock:
+            total, users, topics = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT user_id), COUNT(DISTINCT topic) FROM subscriptions").fetchone()
+        return {"subscriptions": total, "users": users, "topics": topics}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,25 @@
+"""
+테스트 공통 설정입니다.
+app.py는 임포트 시점에 설정을 읽고 지역 색인 파일을 상대 경로로 읽으므로,
+임포트 전에 백그라운드 작업을 끄고 저장소·캐시 경로를 임시 디렉터리로 돌린 뒤 저장소 루트에서 실행합니다.
+"""
+import os
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.chdir(REPO_DIR)
+
+_TMP_DIR = tempfile.mkdtemp(prefix="kakao-news-bot-tests-")
+for _name, _value in {
+    "FEED_PREFETCH": "0",
+    "AIRKOREA_PREFETCH": "0",
+    "WEATHER_PREFETCH": "0",
+    "CALLBACK_MODE": "0",
+    "ALERT_SCHEDULER": "0",
+    "SUBSCRIPTION_DB": ":memory:",
+    "THUMB_CACHE_DIR": os.path.join(_TMP_DIR, "thumb_cache"),
+    "REGION_INDEX_PATH": os.path.join(_TMP_DIR, "region_index.bin"),
+}.items():
+    os.environ.setdefault(_name, _value)
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+from datetime import datetime
+
+import pytest
+
+from alert_scheduler import KST, DigestScheduler, FakeSender
+from subscription_store import SubscriptionStore
+
+SLOT_TIME = datetime(2026, 1, 1, 8, 1, tzinfo=KST)
+
+
+def build_digest(topic):
+    return {"topic": topic, "title": f"{topic} 뉴스 알림", "text": "• 제목"}
+
+
+def make_scheduler(store, sender):
+    return DigestScheduler(store, build_digest, sender, rate_limit=None)
+
+
+def test_slot_sent_once_per_process():
+    store = SubscriptionStore(":memory:")
+    store.subscribe_many((f"user-{i}", "정치", "08:00") for i in range(250))
+    sender = FakeSender()
+    scheduler = make_scheduler(store, sender)
+    [result] = scheduler.run_due(SLOT_TIME)
+    assert result["delivered"] == 250
+    assert scheduler.run_due(SLOT_TIME) == []
+    assert sender.sent == 250
+
+
+def test_second_scheduler_sharing_store_does_not_resend(tmp_path):
+    store = SubscriptionStore(str(tmp_path / "subscriptions.db"))
+    store.subscribe_many((f"user-{i}", "정치", "08:00") for i in range(10))
+    first, second = FakeSender(), FakeSender()
+    make_scheduler(store, first).run_due(SLOT_TIME)
+    other = make_scheduler(SubscriptionStore(str(tmp_path / "subscriptions.db")), second)
+    assert other.run_due(SLOT_TIME) == []
+    assert (first.sent, second.sent) == (10, 0)
+    assert other.claimed_elsewhere == 1
+
+
+def _run_due_in_child(path, queue):
+    sender = FakeSender()
+    make_scheduler(SubscriptionStore(path), sender).run_due(SLOT_TIME)
+    queue.put(sender.sent)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_run_due_in_other_processes_sends_once(tmp_path):
+    path = str(tmp_path / "subscriptions.db")
+    SubscriptionStore(path).subscribe_many((f"user-{i}", "정치", "08:00") for i in range(100))
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [context.Process(target=_run_due_in_child, args=(path, queue)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+    assert sorted(queue.get(timeout=5) for _ in workers) == [0, 0, 0, 100]
+
+
+def test_late_slot_is_skipped():
+    store = SubscriptionStore(":memory:")
+    store.subscribe("user-1", "정치", "08:00")
+    sender = FakeSender()
+    make_scheduler(store, sender).run_due(datetime(2026, 1, 1, 8, 20, tzinfo=KST))
+    assert sender.sent == 0
+
+
+def flaky_build_digest(failures):
+    def build(topic):
+        if failures:
+            raise failures.pop(0)
+        return build_digest(topic)
+    return build
+
+
+def test_failed_digest_build_does_not_claim_the_slot(tmp_path):
+    store = SubscriptionStore(str(tmp_path / "subscriptions.db"))
+    store.subscribe_many((f"user-{i}", "정치", "08:00") for i in range(5))
+    sender = FakeSender()
+    scheduler = DigestScheduler(store, flaky_build_digest([RuntimeError("feed is cold")]), sender, rate_limit=None)
+    assert scheduler.run_slot("08:00", "20260101") == []
+    assert not store.slot_claimed("20260101", "08:00", "정치")
+    [result] = scheduler.run_slot("08:00", "20260101")
+    assert result["delivered"] == 5
+    assert sender.sent == 5
+
+
+def test_run_due_retries_a_topic_whose_digest_failed():
+    store = SubscriptionStore(":memory:")
+    store.subscribe("user-1", "정치", "08:00")
+    sender = FakeSender()
+    scheduler = DigestScheduler(store, flaky_build_digest([RuntimeError("upstream down")]), sender, rate_limit=None)
+    assert scheduler.run_due(SLOT_TIME) == []
+    [result] = scheduler.run_due(SLOT_TIME)
+    assert result["delivered"] == 1
+    assert scheduler.run_due(SLOT_TIME) == []
+    assert sender.sent == 1
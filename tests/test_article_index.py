@@ -0,0 +1,57 @@
+import time
+
+from article_index import ArticleIndex
+
+HOUR = 3600
+NOW = time.time()
+
+# (제목, 몇 시간 전 기사인지)
+FIXTURE = [
+    ("삼성전자 반도체 투자 확대 발표", 30),
+    ("삼성전자, 반도체 감산 끝내나", 1),
+    ("반도체 수출 석 달 연속 증가", 2),
+    ("프로야구 삼성 라이온즈 개막전 승리", 1),
+    ("오늘 날씨 전국 맑음", 0),
+]
+
+
+def make_index(**kwargs):
+    index = ArticleIndex(**kwargs)
+    index.add_articles([
+        {"title": title, "link": f"https://www.donga.com/news/article/all/{i}", "image": "", "published": NOW - hours * HOUR}
+        for i, (title, hours) in enumerate(FIXTURE)
+    ], source="fixture")
+    return index
+
+
+def titles(results):
+    return [r["title"] for r in results]
+
+
+def test_bigram_match_ignores_spacing():
+    index = make_index()
+    # '삼성 전자'처럼 띄어 써도 2-gram으로 '삼성전자' 제목을 찾음
+    assert titles(index.search("삼성 전자", limit=2)) == ["삼성전자, 반도체 감산 끝내나", "삼성전자 반도체 투자 확대 발표"]
+    assert titles(index.search("반도체수출"))[0] == "반도체 수출 석 달 연속 증가"
+
+
+def test_recent_article_ranks_first_among_equal_matches():
+    index = make_index()
+    results = titles(index.search("삼성전자 반도체"))
+    assert results[:2] == ["삼성전자, 반도체 감산 끝내나", "삼성전자 반도체 투자 확대 발표"]
+    assert "오늘 날씨 전국 맑음" not in results
+
+
+def test_low_coverage_matches_are_dropped():
+    index = make_index()
+    # '신제품'·'출시' 같은 검색어 2-gram 대부분이 어느 제목에도 없으면 결과로 인정하지 않음
+    assert index.search("갤럭시 신제품 출시") == []
+    assert index.stats()["searches_with_hits"] == 0
+
+
+def test_duplicate_links_and_capacity():
+    index = make_index(max_docs=3)
+    assert len(index) == 3
+    # 가장 오래된 기사부터 지워짐
+    assert "삼성전자 반도체 투자 확대 발표" not in titles(index.search("삼성전자 반도체"))
+    assert index.add_articles([{"title": "중복", "link": "https://www.donga.com/news/article/all/4"}]) == 0
@@ -0,0 +1,81 @@
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+import app as sync_app
+import async_app
+
+ARTICLES = [{"title": "정치 기사", "link": "https://www.donga.com/news/article/all/1", "image": ""}]
+
+
+def post(path, json=None, headers=None):
+    async def scenario():
+        client = TestClient(TestServer(async_app.create_app()))
+        await client.start_server()
+        try:
+            res = await client.post(path, json=json or {}, headers=headers)
+            return res.status, res.headers, await res.json(content_type=None) if res.status == 200 else None
+        finally:
+            await client.close()
+    return asyncio.run(scenario())
+
+
+def test_news_category_marks_stale_feed(monkeypatch):
+    rss = sync_app.NEWS_FEEDS["정치"]["rss"]
+    monkeypatch.setattr(sync_app.feed_cache, "peek", lambda url: (ARTICLES, 0))
+    monkeypatch.setattr(sync_app.feed_cache, "version", lambda url: 7)
+    monkeypatch.setattr(sync_app.feed_cache, "is_stale", lambda url: url == rss)
+    _, _, payload = post("/news/politics")
+    header = payload["template"]["outputs"][0]["listCard"]["header"]["title"]
+    assert header == sync_app.stale_title("정치 뉴스 TOP 1", True)
+
+
+def run_guarded(breaker_name, status):
+    async def fail():
+        raise async_app.ClientResponseError(None, (), status=status)
+
+    async def scenario():
+        try:
+            await async_app.guarded(breaker_name, fail())
+        except async_app.ClientResponseError:
+            pass
+    asyncio.run(scenario())
+
+
+def test_guarded_counts_only_retryable_statuses_as_failures():
+    breaker = sync_app.circuit_breakers["donga_search"]
+    before = breaker.stats()["consecutive_failures"]
+    run_guarded("donga_search", 503)
+    assert breaker.stats()["consecutive_failures"] == before + 1
+    run_guarded("donga_search", 404)
+    assert breaker.stats()["consecutive_failures"] == 0
+    assert breaker.stats()["state"] == "closed"
+
+
+def test_alarm_routes_and_cache_stats_are_served():
+    body = {
+        "userRequest": {"user": {"id": "async-user"}, "utterance": "오전 8시"},
+        "action": {"params": {"topic": "경제"}},
+    }
+    status, _, payload = post("/news/alarm/subscribe", json=body)
+    assert status == 200
+    assert "매일 08:00에 `경제`" in payload["template"]["outputs"][0]["simpleText"]["text"]
+    assert sync_app.subscription_store.subscriptions("async-user") == [("경제", "08:00")]
+
+    status, _, payload = post("/news/alarm/unsubscribe", json=body)
+    assert "뉴스 알림을 해지했어요" in payload["template"]["outputs"][0]["simpleText"]["text"]
+
+    status, _, payload = post("/news/handle_alarm_init", json=body)
+    assert "`경제` 뉴스를 보내드릴까요" in payload["template"]["outputs"][0]["simpleText"]["text"]
+
+    async def get_stats():
+        client = TestClient(TestServer(async_app.create_app()))
+        await client.start_server()
+        try:
+            res = await client.get("/cache/stats")
+            return res.status, await res.json()
+        finally:
+            await client.close()
+    status, stats = asyncio.run(get_stats())
+    assert status == 200
+    assert "alerts" in stats and "circuit_breakers" in stats
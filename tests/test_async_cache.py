@@ -0,0 +1,49 @@
+import asyncio
+
+import async_app
+from cache_backend import SQLiteBackend, TieredCache
+from cache_utils import TTLCache
+
+
+def make_cache(tmp_path):
+    return TieredCache("t", TTLCache(ttl=60), SQLiteBackend(str(tmp_path / "shared.db")), poll_interval=0.01)
+
+
+def test_get_or_load_stores_in_both_layers(tmp_path):
+    cache = make_cache(tmp_path)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return {"T1H": "3"}
+
+    assert asyncio.run(async_app.cache_get_or_load(cache, ("a",), load)) == {"T1H": "3"}
+    assert asyncio.run(async_app.cache_get_or_load(cache, ("a",), load)) == {"T1H": "3"}
+    assert calls == [1]
+    assert cache.shared.get_entry(cache.shared_key(("a",)))[0] == {"T1H": "3"}
+
+
+def test_waits_for_lease_held_by_another_worker(tmp_path):
+    cache = make_cache(tmp_path)
+    other = SQLiteBackend(cache.shared.path)
+    other.owner = "other-worker"
+    shared_key = cache.shared_key(("b",))
+    assert other.acquire_lease(shared_key, 5)
+
+    async def load():
+        raise AssertionError("임대를 가진 워커가 있으면 직접 불러오지 않아야 함")
+
+    async def scenario():
+        waiter = asyncio.ensure_future(async_app.cache_get_or_load(cache, ("b",), load))
+        ticks = 0
+        while not waiter.done() and ticks < 5:
+            # 기다리는 동안 이벤트 루프가 막히지 않아야 함
+            await asyncio.sleep(0.01)
+            ticks += 1
+        other.set(shared_key, ["x"], 60)
+        return await waiter, ticks
+
+    value, ticks = asyncio.run(scenario())
+    assert value == ["x"]
+    assert ticks == 5
+    assert cache.lease_waits == 1
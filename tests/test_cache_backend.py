@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from cache_backend import SQLiteBackend, TieredCache, open_backend
+from cache_utils import TTLCache
+
+
+def test_open_backend_memory_means_no_shared_layer(tmp_path):
+    assert open_backend("memory", str(tmp_path / "cache.db")) is None
+    assert isinstance(open_backend("sqlite", str(tmp_path / "cache.db")), SQLiteBackend)
+
+
+def test_lease_is_exclusive_until_released(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    first.owner, second.owner = "worker-1", "worker-2"
+    assert first.acquire_lease("k", 5)
+    assert not second.acquire_lease("k", 5)
+    assert second.lease_held("k")
+    second.release_lease("k") # 다른 워커의 임대는 풀 수 없음
+    assert not second.acquire_lease("k", 5)
+    first.release_lease("k")
+    assert not second.lease_held("k")
+    assert second.acquire_lease("k", 5)
+
+
+def test_expired_lease_can_be_taken_over(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    first.owner, second.owner = "worker-1", "worker-2"
+    assert first.acquire_lease("k", 0.05)
+    time.sleep(0.1)
+    assert second.acquire_lease("k", 5)
+    first.release_lease("k") # 만료 뒤 늦게 푼 이전 주인이 새 임대를 지우지 않음
+    assert second.lease_held("k")
+
+
+def _acquire_in_child(path, start, queue):
+    backend = SQLiteBackend(path)
+    start.wait(5)
+    queue.put(backend.acquire_lease("contended", 5))
+
+
+def _load_in_child(path, start, queue):
+    cache = TieredCache("t", TTLCache(ttl=60), SQLiteBackend(path), poll_interval=0.01)
+    start.wait(5)
+
+    def load():
+        time.sleep(0.3)
+        return {"pid": os.getpid()}
+    value = cache.get_or_load("shared-key", load)
+    queue.put((value["pid"], cache.loads))
+
+
+def run_children(target, path, count=4):
+    context = multiprocessing.get_context("fork")
+    start, queue = context.Event(), context.Queue()
+    workers = [context.Process(target=target, args=(path, start, queue)) for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    start.set()
+    results = [queue.get(timeout=10) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=10)
+    return results
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_only_one_process_wins_a_contended_lease(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteBackend(path)
+    assert sorted(run_children(_acquire_in_child, path)) == [False, False, False, True]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_get_or_load_loads_once_across_processes(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteBackend(path)
+    results = run_children(_load_in_child, path)
+    assert sum(loads for _, loads in results) == 1
+    assert len({pid for pid, _ in results}) == 1 # 모든 프로세스가 같은 결과를 받음
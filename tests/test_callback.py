@@ -0,0 +1,60 @@
+import threading
+
+import app
+from callback import CallbackDispatcher, FakeCallbackReceiver
+
+ARTICLES = [{"title": "반도체 수출 회복", "link": "https://www.donga.com/news/article/all/1", "image": ""}]
+
+
+def saturated_dispatcher():
+    """작업자 하나가 막혀 있고 큐(크기 1)도 가득 찬 디스패처와 막힌 작업을 풀어 줄 이벤트를 반환합니다."""
+    dispatcher = CallbackDispatcher(max_workers=1, max_queue=1, post=lambda url, json, timeout: None)
+    unblock = threading.Event()
+    started = threading.Event()
+
+    def blocked():
+        started.set()
+        unblock.wait(5)
+        return {}
+    assert dispatcher.submit("http://callback.invalid/1", blocked)
+    assert started.wait(5)
+    assert dispatcher.submit("http://callback.invalid/2", blocked)
+    return dispatcher, unblock
+
+
+def test_delivers_payload_to_callback_url():
+    with FakeCallbackReceiver() as receiver:
+        dispatcher = CallbackDispatcher(max_workers=2)
+        assert dispatcher.submit(receiver.url, lambda: app.build_search_card("반도체", ARTICLES))
+        [body] = receiver.wait_for(1)
+        dispatcher.join()
+    assert body["template"]["outputs"][0]["listCard"]["items"][0]["title"] == "반도체 수출 회복"
+    assert receiver.received[0]["path"] == "/callback"
+    stats = dispatcher.stats()
+    assert (stats["submitted"], stats["completed"], stats["failed"]) == (1, 1, 0)
+
+
+def test_saturated_queue_rejects_submission():
+    dispatcher, unblock = saturated_dispatcher()
+    try:
+        assert not dispatcher.submit("http://callback.invalid/3", dict)
+        assert dispatcher.stats()["rejected"] == 1
+    finally:
+        unblock.set()
+        dispatcher.join()
+
+
+def test_saturated_queue_falls_back_to_synchronous_response(monkeypatch):
+    dispatcher, unblock = saturated_dispatcher()
+    monkeypatch.setattr(app, "CALLBACK_MODE", True)
+    monkeypatch.setattr(app, "callback_dispatcher", dispatcher)
+    monkeypatch.setattr(app, "search_article_index", lambda keyword, count: None)
+    monkeypatch.setattr(app, "fetch_donga_search_news", lambda *a, **k: ARTICLES)
+    body = {"action": {"params": {"keyword": "콜백포화검색어"}}, "userRequest": {"callbackUrl": "http://callback.invalid/4"}}
+    try:
+        payload = app.app.test_client().post("/news/ask_keyword", json=body).get_json()
+    finally:
+        unblock.set()
+        dispatcher.join()
+    assert "useCallback" not in payload
+    assert payload["template"]["outputs"][0]["listCard"]["items"][0]["title"] == "반도체 수출 회복"
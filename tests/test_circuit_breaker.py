@@ -0,0 +1,107 @@
+import time
+
+import pytest
+import requests
+
+import request_deadline
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from upstream import PoolSaturatedError, UpstreamClient
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    return breaker
+
+
+def client_returning(result):
+    client = UpstreamClient(retries=0)
+
+    def get(url, params, headers, timeout, retries, stream=False):
+        if isinstance(result, BaseException):
+            raise result
+        return result
+    client._get_with_retries = get
+    return client
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_the_circuit():
+    breaker = half_open_breaker()
+    client = client_returning(FakeResponse(503))
+    assert client.get("https://upstream.example/", breaker=breaker).status_code == 503
+    assert breaker.stats()["state"] == "open"
+    with pytest.raises(CircuitOpenError):
+        client.get("https://upstream.example/", breaker=breaker)
+
+
+def test_client_error_is_a_successful_probe():
+    breaker = half_open_breaker()
+    client_returning(FakeResponse(404)).get("https://upstream.example/", breaker=breaker)
+    assert breaker.stats()["state"] == "closed"
+
+
+def test_unexpected_error_releases_the_probe():
+    breaker = half_open_breaker()
+    with pytest.raises(ValueError):
+        client_returning(ValueError("bad payload")).get("https://upstream.example/", breaker=breaker)
+    # 시험 호출 자리가 반납되어 다음 호출이 다시 시험 호출이 됨
+    assert breaker.allow()
+
+
+def test_deadline_exceeded_before_call_is_not_an_upstream_failure():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    with request_deadline.scope(0.03):
+        # 남은 시간이 MIN_UPSTREAM_TIMEOUT보다 적지만 아직 마감 전 (expired()는 거짓)
+        assert not request_deadline.expired()
+        with pytest.raises(request_deadline.DeadlineExceeded):
+            UpstreamClient(retries=0).get("https://upstream.example/", breaker=breaker)
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.stats()["consecutive_failures"] == 0
+
+
+def test_upstream_timeout_is_a_failure():
+    breaker = CircuitBreaker("test", failure_threshold=1)
+    with pytest.raises(requests.exceptions.Timeout):
+        client_returning(requests.exceptions.ReadTimeout("slow")).get("https://upstream.example/", breaker=breaker)
+    assert breaker.stats()["state"] == "open"
+
+
+def test_pool_saturation_does_not_trip_the_breaker():
+    client = UpstreamClient(host_config={"upstream.example": {"max_concurrency": 1}}, retries=0)
+    pool = client.pool_for("https://upstream.example/")
+    breaker = half_open_breaker()
+    # 다른 요청이 호스트의 동시 요청 자리를 모두 차지한 상태
+    assert pool.semaphore.acquire()
+    try:
+        with pytest.raises(PoolSaturatedError):
+            client.get("https://upstream.example/", timeout=0.05, breaker=breaker)
+    finally:
+        pool.semaphore.release()
+    assert breaker.stats()["state"] == "half_open"
+    assert breaker.allow() # 시험 호출 자리가 반납됨
+
+    closed = CircuitBreaker("closed", failure_threshold=1)
+    assert pool.semaphore.acquire()
+    try:
+        for _ in range(3):
+            with pytest.raises(PoolSaturatedError):
+                client.get("https://upstream.example/", timeout=0.05, breaker=closed)
+    finally:
+        pool.semaphore.release()
+    assert closed.stats()["state"] == "closed"
+    assert closed.stats()["consecutive_failures"] == 0
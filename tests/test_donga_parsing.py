@@ -0,0 +1,15 @@
+import app
+
+NAV_ONLY_TRENDING = """
+<nav><ul><li><a href="/menu">메뉴</a></li></ul></nav>
+<div class="list"><ul><li><article><p>제목 없는 항목</p></article></li></ul></div>
+"""
+
+
+def test_empty_extraction_does_not_fall_through_to_broader_selectors():
+    # 첫 번째로 맞는 셀렉터에서 기사를 추출하지 못하면 'ul li' 같은 넓은 셀렉터로 넘어가지 않음 (메뉴를 기사로 받지 않음)
+    items, potential = app.parse_with_cascade(
+        NAV_ONLY_TRENDING, "https://www.donga.com/news/TrendNews/test", app.TRENDING_LIST_SELECTORS,
+        app.TRENDING_TITLE_SELECTORS, app.TRENDING_IMAGE_SELECTORS)
+    assert items == []
+    assert potential == 1
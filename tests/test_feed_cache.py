@@ -0,0 +1,73 @@
+import time
+
+from feed_cache import FeedCache
+
+URL = "https://rss.donga.com/politics.xml"
+ARTICLES = [{"title": "첫 기사", "link": "https://www.donga.com/news/article/all/1"}]
+
+
+class StubFetcher:
+    """미리 정한 결과(dict) 또는 예외를 차례로 돌려주고, 받은 조건부 GET 검증자를 기록합니다."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def __call__(self, url, etag=None, last_modified=None):
+        self.calls.append({"etag": etag, "last_modified": last_modified})
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def expire(cache, url):
+    cache._entries[url].fetched_at = time.time() - cache._entries[url].ttl - 1
+
+
+def test_failed_refresh_serves_last_good_copy_as_stale():
+    fetcher = StubFetcher(
+        {"articles": ARTICLES, "not_modified": False, "etag": '"v1"'},
+        OSError("connection reset"),
+    )
+    updates = []
+    cache = FeedCache(fetcher, default_ttl=60, on_update=lambda url, articles: updates.append(url))
+    articles, fetched_at = cache.get(URL)
+    assert articles == ARTICLES
+    assert cache.version(URL) == 1
+    assert not cache.is_stale(URL)
+
+    expire(cache, URL)
+    articles, _ = cache.get(URL) # 갱신기가 꺼져 있으므로 TTL이 지나면 즉시 갱신을 시도
+    assert articles == ARTICLES
+    assert cache.is_stale(URL)
+    assert cache.version(URL) == 1
+    assert cache.status()[URL]["last_error"] == "connection reset"
+    assert updates == [URL]
+
+
+def test_not_modified_reuses_articles_and_extends_freshness():
+    fetcher = StubFetcher(
+        {"articles": ARTICLES, "not_modified": False, "etag": '"v1"', "last_modified": "Mon, 01 Jan 2026 00:00:00 GMT"},
+        {"articles": [], "not_modified": True},
+    )
+    cache = FeedCache(fetcher, default_ttl=60)
+    cache.get(URL)
+    expire(cache, URL)
+    articles, fetched_at = cache.get(URL)
+
+    assert fetcher.calls[0] == {"etag": None, "last_modified": None}
+    assert fetcher.calls[1] == {"etag": '"v1"', "last_modified": "Mon, 01 Jan 2026 00:00:00 GMT"}
+    assert articles == ARTICLES
+    assert cache.version(URL) == 1 # 304는 버전을 올리지 않으므로 렌더링된 응답을 그대로 재사용
+    assert time.time() - fetched_at < 5
+    assert not cache.is_stale(URL)
+    assert cache.status()[URL]["not_modified"] == 1
+
+
+def test_first_load_failure_sends_no_validators():
+    fetcher = StubFetcher(OSError("down"), {"articles": ARTICLES, "not_modified": False, "etag": '"v2"'})
+    cache = FeedCache(fetcher, default_ttl=60)
+    assert cache.get(URL) == ([], None)
+    assert cache.get(URL)[0] == ARTICLES
+    assert fetcher.calls == [{"etag": None, "last_modified": None}] * 2
@@ -0,0 +1,48 @@
+import threading
+import time
+
+import app
+
+OBSERVATION = {"T1H": "21.5", "REH": "40"}
+
+
+def test_concurrent_identical_grid_lookups_make_one_upstream_call(monkeypatch):
+    calls = []
+    calls_lock = threading.Lock()
+
+    def slow_fetch(nx, ny, base_date, base_time, service_key):
+        with calls_lock:
+            calls.append((nx, ny, base_date, base_time))
+        time.sleep(0.2) # 다른 스레드가 모두 같은 키를 찾기 시작할 시간
+        return dict(OBSERVATION)
+    monkeypatch.setattr(app, "fetch_kma_observation", slow_fetch)
+
+    threads_count = 16
+    barrier = threading.Barrier(threads_count)
+    results = [None] * threads_count
+
+    def lookup(i):
+        barrier.wait()
+        results[i] = app.get_kma_observation(61, 125, "20260101", "0800", "test-key")
+
+    threads = [threading.Thread(target=lookup, args=(i,)) for i in range(threads_count)]
+    coalesced_before = app.kma_weather_cache.coalesced
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert calls == [(61, 125, "20260101", "0800")]
+    assert results == [OBSERVATION] * threads_count
+    # 리더를 뺀 나머지는 모두 진행 중인 호출의 결과를 함께 받음
+    assert app.kma_weather_cache.coalesced - coalesced_before == threads_count - 1
+    assert app.get_kma_observation(61, 125, "20260101", "0800", "test-key") == OBSERVATION
+    assert len(calls) == 1
+
+
+def test_failed_lookup_is_not_cached(monkeypatch):
+    calls = []
+    monkeypatch.setattr(app, "fetch_kma_observation", lambda *args: calls.append(args) or {})
+    assert app.get_kma_observation(62, 126, "20260101", "0800", "test-key") == {}
+    assert app.get_kma_observation(62, 126, "20260101", "0800", "test-key") == {}
+    assert len(calls) == 2
@@ -0,0 +1,64 @@
+import re
+
+import app
+import metrics
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text):
+    """Prometheus 텍스트 형식을 {(이름, ((레이블, 값), ...)): 값}과 {이름: 타입}으로 읽습니다. 형식이 틀리면 실패."""
+    samples, types = {}, {}
+    for line in text.splitlines():
+        if not line:
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, metric_type = line.split(" ", 3)
+            types[name] = metric_type
+            continue
+        if line.startswith("# HELP "):
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"malformed sample line: {line!r}"
+        labels = tuple(LABEL.findall(match.group(3) or ""))
+        samples[(match.group(1), labels)] = float(match.group(4))
+    return samples, types
+
+
+def scrape():
+    res = app.app.test_client().get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["Content-Type"] == metrics.CONTENT_TYPE
+    return parse_metrics(res.get_data(as_text=True))
+
+
+def test_metrics_output_is_valid_prometheus_text():
+    app.app.test_client().get("/")
+    samples, types = scrape()
+    assert types["kakao_bot_route_duration_seconds"] == "histogram"
+    assert types["kakao_bot_route_errors_total"] == "counter"
+    route = (("route", "/"),)
+    count = samples[("kakao_bot_route_duration_seconds_count", route)]
+    assert count >= 1
+    buckets = sorted(
+        (float("inf") if dict(labels)["le"] == "+Inf" else float(dict(labels)["le"]), value)
+        for (name, labels), value in samples.items()
+        if name == "kakao_bot_route_duration_seconds_bucket" and dict(labels).get("route") == "/")
+    values = [value for _, value in buckets]
+    assert values == sorted(values) # 누적 버킷
+    assert buckets[-1] == (float("inf"), count)
+
+
+def test_raising_route_is_counted_as_an_error(monkeypatch):
+    def boom(title):
+        raise RuntimeError("feed parser crashed")
+    monkeypatch.setattr(app, "news_category_response", boom)
+    route = (("route", "/news/politics"),)
+    before, _ = scrape()
+    res = app.app.test_client().post("/news/politics", json={})
+    assert res.status_code == 500
+    after, _ = scrape()
+    assert after[("kakao_bot_route_errors_total", route)] == before.get(("kakao_bot_route_errors_total", route), 0) + 1
+    assert (after[("kakao_bot_route_duration_seconds_count", route)]
+            == before.get(("kakao_bot_route_duration_seconds_count", route), 0) + 1)
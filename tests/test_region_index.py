@@ -0,0 +1,86 @@
+import pytest
+
+from kma_grid import latlon_to_grid, latlon_to_grid_batch
+from region_index import RegionIndex, load_region_index, parse_latlon
+
+SEOUL = (37.5665, 126.9780)
+
+
+# 기상청 동네예보 격자 기준표의 시청 위치 격자
+KMA_REFERENCE_CELLS = [
+    ((37.5663, 126.9779), (60, 127)), # 서울특별시청
+    ((35.1796, 129.0756), (98, 76)), # 부산광역시청
+    ((36.3504, 127.3845), (67, 100)), # 대전광역시청
+    ((35.1595, 126.8526), (58, 74)), # 광주광역시청
+]
+
+
+def test_seoul_maps_to_kma_grid_60_127():
+    assert latlon_to_grid(*SEOUL) == (60, 127)
+    assert latlon_to_grid_batch([SEOUL[0]], [SEOUL[1]]) == ([60], [127])
+
+
+@pytest.mark.parametrize("latlon, cell", KMA_REFERENCE_CELLS)
+def test_matches_kma_reference_cells(latlon, cell):
+    assert latlon_to_grid(*latlon) == cell
+
+
+def test_batch_conversion_matches_scalar():
+    lats = [latlon for latlon, _ in KMA_REFERENCE_CELLS]
+    nxs, nys = latlon_to_grid_batch([lat for lat, _ in lats], [lon for _, lon in lats])
+    assert list(zip(nxs, nys)) == [cell for _, cell in KMA_REFERENCE_CELLS]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("37.5665,126.9780", SEOUL),
+    ("37.5665 126.9780", SEOUL),
+    ("126.9780,37.5665", SEOUL), # 경도·위도 순서지만 한국 안이므로 바로잡음
+    ("-33.87,151.21", (-33.87, 151.21)),
+])
+def test_parse_latlon(text, expected):
+    assert parse_latlon(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "151.21,-33.87", # 바꿔 읽어도 한국 밖
+    "95,10",
+    "37.5,181",
+    "120,200",
+    "서울",
+])
+def test_parse_latlon_rejects_out_of_range(text):
+    assert parse_latlon(text) is None
+
+
+def test_latlon_input_resolves_to_the_seoul_grid(tmp_path):
+    index = load_region_index("region_coords.json", str(tmp_path / "region_index.bin"))
+    full_name, coords = index.lookup("37.5665,126.9780")
+    assert full_name.startswith("서울특별시")
+    assert coords == [60, 127]
+    assert index.lookup("10,10") == (None, None)
+    # 경도·위도 순서로 입력한 서울시청은 바로잡고, 범위를 벗어난 값은 지역으로 해석하지 않음
+    assert index.lookup("126.9779,37.5663")[1] == [60, 127]
+    for text in ("95,10", "37.5,181", "151.21,-33.87"):
+        assert index.lookup(text) == (None, None)
+
+
+def test_artifact_round_trip_keeps_lookups(tmp_path):
+    artifact = str(tmp_path / "region_index.bin")
+    built = load_region_index("region_coords.json", artifact)
+    loaded = load_region_index("region_coords.json", artifact)
+    assert type(built) is type(loaded) is RegionIndex
+    assert loaded._rank == built._rank
+    for name in ("서울", "종로", "수원시장안구", "제주"):
+        assert loaded.lookup(name) == built.lookup(name)
+
+
+@pytest.mark.parametrize("text", ["구", "시", "동", "서"])
+def test_single_syllable_does_not_match_a_region(tmp_path, text):
+    index = load_region_index("region_coords.json", str(tmp_path / "region_index.bin"))
+    assert index.lookup(text) == (None, None)
+
+
+def test_two_syllable_prefix_still_matches(tmp_path):
+    index = load_region_index("region_coords.json", str(tmp_path / "region_index.bin"))
+    full_name, _ = index.lookup("수원시장")
+    assert full_name == "경기도 수원시장안구"
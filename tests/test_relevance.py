@@ -0,0 +1,83 @@
+import threading
+import time
+
+from relevance import LocalModelClient, RelevanceRanker, local_relevance_score, parse_relevance_scores
+
+ARTICLES = [
+    {"title": "오늘의 날씨 맑음"},
+    {"title": "삼성전자 반도체 투자 확대"},
+    {"title": "프로야구 개막전 결과"},
+    {"title": "삼성 갤럭시 신제품 공개"},
+]
+
+
+class FailingClient:
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, prompt):
+        self.calls += 1
+        raise RuntimeError("model unavailable")
+
+
+class SlowClient(LocalModelClient):
+    """응답이 시간 예산보다 늦게 도착하는 모델입니다."""
+
+    def __init__(self, delay):
+        super().__init__(delay=delay)
+        self.answered = threading.Event()
+
+    def generate(self, prompt):
+        try:
+            return super().generate(prompt)
+        finally:
+            self.answered.set()
+
+
+def test_scores_missing_titles_in_one_batched_call_and_caches_them():
+    client = LocalModelClient()
+    ranker = RelevanceRanker(client, time_budget=2.0)
+    ranked = ranker.rank("삼성", ARTICLES, max_count=5)
+    assert [a["title"] for a in ranked] == ["삼성전자 반도체 투자 확대", "삼성 갤럭시 신제품 공개"]
+    assert client.calls == 1
+    assert ranker.model_calls == 1
+
+    # 같은 검색어(정규화 후)와 제목은 캐시에서 읽으므로 모델을 다시 부르지 않음
+    ranker.rank(" 삼성 ", ARTICLES)
+    assert client.calls == 1
+    # 새 제목만 모아 한 번 더 호출
+    ranker.rank("삼성", ARTICLES + [{"title": "삼성 라이온즈 승리"}])
+    assert client.calls == 2
+    assert ranker.fallbacks == 0
+
+
+def test_model_error_falls_back_to_local_scores_without_caching():
+    client = FailingClient()
+    ranker = RelevanceRanker(client)
+    titles = [a["title"] for a in ARTICLES]
+    assert ranker.score("삼성", titles) == [local_relevance_score("삼성", t) for t in titles]
+    assert ranker.fallbacks == 1
+    ranker.score("삼성", titles)
+    assert client.calls == 2 # 로컬 점수는 캐시하지 않으므로 다음 요청에서 다시 모델을 시도
+
+
+def test_timeout_falls_back_and_caches_the_late_answer():
+    client = SlowClient(delay=0.2)
+    ranker = RelevanceRanker(client, time_budget=0.02)
+    titles = [a["title"] for a in ARTICLES]
+    assert ranker.score("삼성", titles) == [local_relevance_score("삼성", t) for t in titles]
+    assert ranker.fallbacks == 1
+    assert client.answered.wait(2)
+    time.sleep(0.05) # 늦은 응답을 캐시에 넣는 완료 콜백
+    ranker.score("삼성", titles)
+    assert client.calls == 1
+    assert ranker.fallbacks == 1
+
+
+def test_everything_filtered_keeps_original_order():
+    ranker = RelevanceRanker(LocalModelClient())
+    assert ranker.rank("축구", ARTICLES, max_count=2) == ARTICLES[:2]
+
+
+def test_parse_relevance_scores_clamps_values():
+    assert parse_relevance_scores("점수: [120, -5, \"40%\"]", 3) == [100, 0, 40]
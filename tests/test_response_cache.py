@@ -0,0 +1,39 @@
+import app
+from response_cache import RenderedResponseCache, etag_matches
+
+ARTICLES = [{"title": "경제 기사", "link": "https://www.donga.com/news/article/all/3", "image": ""}]
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"other"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_rendered_once_per_version():
+    cache = RenderedResponseCache()
+    renders = []
+
+    def render():
+        renders.append(1)
+        return {"n": len(renders)}
+    body, etag = cache.get_or_render("k", 1, render)
+    assert cache.get_or_render("k", 1, render) == (body, etag)
+    assert cache.get_or_render("k", 2, render)[1] != etag
+    assert len(renders) == 2
+
+
+def test_category_route_returns_304_for_matching_etag(monkeypatch):
+    monkeypatch.setattr(app.feed_cache, "get", lambda url: (ARTICLES, 0))
+    monkeypatch.setattr(app.feed_cache, "version", lambda url: 11)
+    monkeypatch.setattr(app.feed_cache, "is_stale", lambda url: False)
+    client = app.app.test_client()
+    first = client.post("/news/economy", json={})
+    assert first.status_code == 200
+    not_modified = client.post("/news/economy", json={}, headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == first.headers["ETag"]
+    changed = client.post("/news/economy", json={}, headers={"If-None-Match": '"stale-etag"'})
+    assert changed.status_code == 200
@@ -0,0 +1,52 @@
+from scraper import SelectorCascade, make_soup
+
+PATTERN = "www.donga.com/news/TrendNews/daily"
+
+ARTICLE_PAGE = """
+<div class="list"><ul><li><article><h4><a href="/news/1">기사 1</a></h4></article></li></ul></div>
+<ul class="type_list"><li><a href="/news/2">기사 2</a></li></ul>
+"""
+TYPE_LIST_PAGE = """
+<nav><ul><li><a href="/menu">메뉴</a></li></ul></nav>
+<ul class="type_list"><li><a href="/news/2">기사 2</a></li></ul>
+"""
+ERROR_PAGE = """
+<nav><ul><li><a href="/menu">메뉴</a></li><li><a href="/login">로그인</a></li></ul></nav>
+"""
+
+
+def make_cascade():
+    return SelectorCascade("test", ["div.list ul li article", "ul.type_list li"], fallbacks=["ul li"])
+
+
+def selected(cascade, html):
+    selector, _ = cascade.first_match(make_soup(html), PATTERN)
+    return selector
+
+
+def test_first_matching_selector_in_order():
+    cascade = make_cascade()
+    assert selected(cascade, ARTICLE_PAGE) == "div.list ul li article"
+    assert selected(cascade, TYPE_LIST_PAGE) == "ul.type_list li"
+
+
+def test_remember_never_stores_the_fallback():
+    cascade = make_cascade()
+    assert selected(cascade, ERROR_PAGE) == "ul li"
+    cascade.remember(PATTERN, "ul li")
+    assert cascade.stats()["preferred"] == {}
+    assert cascade.stats()["fallback_hits"] == 1
+    # 구체적인 셀렉터가 다시 맞는 페이지에서는 catch-all이 아니라 구체적인 셀렉터를 사용
+    assert selected(cascade, TYPE_LIST_PAGE) == "ul.type_list li"
+
+
+def test_remembered_specific_selector_is_tried_first():
+    cascade = make_cascade()
+    cascade.remember(PATTERN, "ul.type_list li")
+    assert selected(cascade, ARTICLE_PAGE) == "ul.type_list li"
+    cascade.remember(PATTERN, "ul.type_list li")
+    assert cascade.stats()["preferred_hits"] == 1
+
+
+def test_no_match_returns_none():
+    assert make_cascade().first_match(make_soup("<p>없음</p>"), PATTERN) is None
@@ -0,0 +1,36 @@
+import app
+
+ARTICLES = [{"title": "반도체 수출 회복", "link": "https://www.donga.com/news/article/all/1", "image": "", "description": ""}]
+
+
+def ask(keyword, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(app, "search_article_index", lambda keyword, count: None)
+    monkeypatch.setattr(app, "submit_callback", lambda body, compute: submitted.append(body) or True)
+    monkeypatch.setattr(app, "fetch_donga_search_news", lambda *a, **k: [])
+    body = {"action": {"params": {"keyword": keyword}}, "userRequest": {"callbackUrl": "https://callback.example/1"}}
+    response = app.app.test_client().post("/news/ask_keyword", json=body)
+    return response.get_json(), submitted
+
+
+def test_search_cache_hit_is_answered_without_callback(monkeypatch):
+    app.search_cache.set((app.normalize_keyword("반도체캐시"), app.search_candidate_count()), ARTICLES)
+    payload, submitted = ask("반도체캐시", monkeypatch)
+    assert submitted == []
+    assert "useCallback" not in payload
+
+
+def test_last_good_hit_is_answered_without_callback(monkeypatch):
+    app.search_last_good.set(app.normalize_keyword("반도체지난결과"), ARTICLES)
+    refreshed = []
+    monkeypatch.setattr(app, "refresh_search_in_background", lambda keyword, count: refreshed.append(keyword))
+    payload, submitted = ask("반도체지난결과", monkeypatch)
+    assert submitted == []
+    assert refreshed == ["반도체지난결과"]
+    assert "useCallback" not in payload
+
+
+def test_cold_miss_is_deferred_to_callback(monkeypatch):
+    payload, submitted = ask("아무도찾지않은검색어", monkeypatch)
+    assert len(submitted) == 1
+    assert payload["useCallback"] is True
@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+
+import pytest
+
+import app
+from thumb_cache import ThumbnailCache
+
+
+def test_secret_is_stable_across_instances(tmp_path):
+    first = ThumbnailCache(str(tmp_path)).secret()
+    assert len(first) == 64
+    assert ThumbnailCache(str(tmp_path)).secret() == first
+
+
+def _secret_in_child(directory, queue):
+    queue.put(ThumbnailCache(directory).secret())
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_concurrent_processes_agree_on_secret(tmp_path):
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [context.Process(target=_secret_in_child, args=(str(tmp_path), queue)) for _ in range(6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+    assert len({queue.get(timeout=5) for _ in workers}) == 1
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")]
+
+
+def test_thumb_url_signature_accepted_by_fresh_process_secret(tmp_path):
+    import app
+    assert app.THUMB_SECRET == ThumbnailCache(app.thumb_cache.directory).secret()
+
+
+class StreamingResponse:
+    def __init__(self, chunks, content_length=None):
+        self.status_code = 200
+        self.headers = {} if content_length is None else {"Content-Length": str(content_length)}
+        self.chunks = chunks
+        self.read = 0
+        self.closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+def test_declared_oversize_source_is_not_downloaded():
+    res = StreamingResponse([b"x" * 10] * 3, content_length=30)
+    with pytest.raises(ValueError):
+        app.read_limited(res, 20)
+    assert res.read == 0
+
+
+def test_streaming_stops_once_the_budget_is_exceeded():
+    res = StreamingResponse([b"x" * 10] * 100)
+    with pytest.raises(ValueError):
+        app.read_limited(res, 25)
+    assert res.read == 3
+    assert app.read_limited(StreamingResponse([b"ab", b"cd"]), 4) == b"abcd"
+
+
+def test_fetch_thumbnail_streams_and_closes(monkeypatch):
+    res = StreamingResponse([b"x" * 10] * 100)
+    calls = []
+
+    def fake_get(url, **kwargs):
+        calls.append(kwargs)
+        return res
+    monkeypatch.setattr(app.upstream, "get", fake_get)
+    monkeypatch.setattr(app, "THUMB_MAX_SOURCE_BYTES", 25)
+    with pytest.raises(ValueError):
+        app.fetch_thumbnail("https://image.donga.com/big.jpg")
+    assert calls[0]["stream"] is True
+    assert res.closed
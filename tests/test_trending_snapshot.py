@@ -0,0 +1,47 @@
+import app
+from cache_backend import TieredCache
+from cache_utils import TTLCache
+from feed_cache import FeedCache
+
+ARTICLES = [{"title": "많이 본 기사", "link": "https://www.donga.com/news/article/all/2", "image": ""}]
+
+
+def fresh_snapshot(monkeypatch, scrape):
+    monkeypatch.setattr(app, "shared_feeds", TieredCache("feed", TTLCache(ttl=60)))
+    monkeypatch.setattr(app, "fetch_donga_trending_news", scrape)
+    cache = FeedCache(app.fetch_trending_shared, default_ttl=300)
+    for url in app.TRENDING_PAGES.values():
+        cache.register(url)
+    monkeypatch.setattr(app, "trending_cache", cache)
+    return cache
+
+
+def test_trending_is_served_from_the_snapshot(monkeypatch):
+    calls = []
+    fresh_snapshot(monkeypatch, lambda url: calls.append(url) or ARTICLES)
+    client = app.app.test_client()
+    first = client.post("/news/trending", json={})
+    second = client.post("/news/trending", json={})
+    assert calls == [app.TRENDING_PAGES["일간 뉴스"]]
+    assert first.get_json()["template"]["outputs"][0]["listCard"]["items"][0]["title"] == "많이 본 기사"
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+
+def test_matching_if_none_match_returns_304(monkeypatch):
+    fresh_snapshot(monkeypatch, lambda url: ARTICLES)
+    client = app.app.test_client()
+    etag = client.post("/news/popular", json={}).headers["ETag"]
+    res = client.post("/news/popular", json={}, headers={"If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.data == b""
+
+
+def test_failed_refresh_keeps_the_last_snapshot(monkeypatch):
+    results = [ARTICLES, []]
+    cache = fresh_snapshot(monkeypatch, lambda url: results.pop(0))
+    url = app.TRENDING_PAGES["일간 뉴스"]
+    cache.refresh(url)
+    # 다른 워커가 공유해 둔 결과도 없는 상태에서 다시 스크래핑
+    monkeypatch.setattr(app, "shared_feeds", TieredCache("feed", TTLCache(ttl=60)))
+    assert not cache.refresh(url)
+    assert cache.peek(url)[0] == ARTICLES
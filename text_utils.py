@@ -0,0 +1,40 @@
+import re
+
+# 검색어에 붙어도 검색 결과가 달라지지 않는 말 ('삼성 관련 뉴스', '삼성전자에 대한 기사' → '삼성', '삼성전자')
+SEARCH_FILLER_WORDS = {"뉴스", "기사", "소식", "관련", "관련뉴스", "관련기사", "최신", "대한", "관한"}
+# 띄어 쓰지 않고 붙여 쓴 경우에만 떼어 내는 꼬리말 ('삼성뉴스', '반도체관련')
+SEARCH_FILLER_SUFFIXES = ("관련뉴스", "관련기사", "뉴스", "관련")
+
+
+def strip_search_fillers(keyword):
+    """
+    검색어의 공백을 하나로 줄이고 '뉴스', '관련' 같은 군더더기 말을 뺍니다. (대소문자는 그대로 둠)
+    모두 군더더기 말이면('뉴스') 원래 검색어를 그대로 반환합니다.
+    """
+    tokens = re.sub(r"\s+", " ", keyword or "").strip().split(" ")
+    kept = []
+    for token in tokens:
+        if token in SEARCH_FILLER_WORDS:
+            # '삼성전자에 대한' 처럼 앞 낱말에 붙은 조사 '에'도 함께 뺌
+            if token in ("대한", "관한") and kept and len(kept[-1]) > 2 and kept[-1].endswith("에"):
+                kept[-1] = kept[-1][:-1]
+            continue
+        for suffix in SEARCH_FILLER_SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+                token = token[:-len(suffix)]
+                break
+        kept.append(token)
+    return " ".join(kept) or " ".join(tokens)
+
+
+def normalize_keyword(keyword):
+    """검색어의 공백을 하나로 줄이고 군더더기 말을 뺀 뒤 대소문자를 통일합니다. (캐시 키·색인 검색용)"""
+    return strip_search_fillers(keyword).casefold()
+
+
+def char_ngrams(text, n=2):
+    """공백을 뺀 문자 n-gram 집합을 만듭니다. 띄어쓰기나 조사 차이에 덜 민감해 한국어 비교에 적합합니다."""
+    compact = re.sub(r"\s+", "", (text or "").casefold())
+    if len(compact) < n:
+        return {compact} if compact else set()
+    return {compact[i:i + n] for i in range(len(compact) - n + 1)}
@@ -0,0 +1,240 @@
+"""
+카드 썸네일 프록시(/thumb)용 디스크 캐시입니다.
+원본 이미지를 한 번만 받아 listCard 이미지 크기로 줄인 뒤, 내용 해시(sha256) 이름의 파일로 저장합니다.
+원본 URL → 내용 해시 참조는 refs/에 따로 저장하므로 같은 이미지를 가리키는 URL들은 파일 하나를 공유합니다.
+디렉터리 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 파일부터 지웁니다.
+Pillow가 없으면 크기를 줄이지 않고 원본 이미지를 그대로 저장합니다.
+"""
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Pillow가 설치되어 있으면 썸네일 크기로 줄여서 저장하고, 없으면 원본을 그대로 저장
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# 카카오 listCard 항목 이미지 크기(정사각형)
+THUMB_SIZE = (200, 200)
+
+# 파일 앞부분(매직 바이트)으로 판별하는 이미지 형식
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def image_content_type(data):
+    """이미지 바이트의 Content-Type을 반환합니다. 알 수 없는 형식이면 None."""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def downscale(data, size=THUMB_SIZE, quality=80):
+    """
+    이미지를 size에 맞게 가운데를 기준으로 잘라 줄이고 JPEG 바이트로 반환합니다.
+    Pillow가 없으면 원본을 그대로 반환합니다. 이미지가 아니면 ValueError를 발생시킵니다.
+    """
+    if Image is None:
+        if image_content_type(data) is None:
+            raise ValueError("Not a supported image")
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            thumb = ImageOps.fit(img, size, method=Image.LANCZOS)
+            out = io.BytesIO()
+            thumb.save(out, "JPEG", quality=quality, optimize=True)
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Not a supported image: {e}")
+    return out.getvalue()
+
+
+class ThumbnailCache:
+    """
+    내용 해시로 주소를 매기는 썸네일 디스크 캐시입니다.
+    파일 목록과 크기는 시작할 때 디렉터리를 훑어 메모리에 올려 두고(LRU 순서), 사용할 때마다 순서와 수정 시각을 갱신합니다.
+    """
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024, size=THUMB_SIZE, quality=80):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = size
+        self.quality = quality
+        self._objects_dir = os.path.join(directory, "objects")
+        self._refs_dir = os.path.join(directory, "refs")
+        os.makedirs(self._objects_dir, exist_ok=True)
+        os.makedirs(self._refs_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes = OrderedDict() # 내용 해시 -> 파일 크기, 가장 최근에 사용한 파일이 뒤쪽
+        self._refs = {} # 원본 URL 해시 -> 내용 해시
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.evictions = 0
+        self._load()
+
+    def _load(self):
+        """디스크에 남아 있는 썸네일을 수정 시각(마지막 사용) 순으로 읽어 들입니다."""
+        entries = []
+        for name in os.listdir(self._objects_dir):
+            path = os.path.join(self._objects_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._sizes[name] = size
+            self.total_bytes += size
+        if entries:
+            print(f"Thumbnail cache loaded {len(entries)} files ({self.total_bytes} bytes) from {self.directory}.")
+            sys.stdout.flush()
+
+    def secret(self):
+        """
+        캐시 디렉터리에 저장된 서명 키를 반환합니다. 없으면 새로 만들어 저장합니다.
+        같은 디렉터리를 쓰는 모든 프로세스(와 재시작 후의 프로세스)가 같은 키를 얻도록,
+        임시 파일에 다 쓴 뒤 os.link로 게시하여 먼저 게시한 하나의 키만 남깁니다.
+        """
+        path = os.path.join(self.directory, "secret")
+        try:
+            with open(path, encoding="ascii") as f:
+                secret = f.read().strip()
+            if secret:
+                return secret
+        except OSError:
+            pass
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="ascii") as f:
+                f.write(os.urandom(32).hex())
+            try:
+                os.link(tmp_path, path) # 이미 있으면 FileExistsError: 다른 프로세스가 먼저 만든 키를 사용
+            except FileExistsError:
+                pass
+        finally:
+            os.remove(tmp_path)
+        with open(path, encoding="ascii") as f:
+            return f.read().strip()
+
+    @staticmethod
+    def url_key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def object_path(self, content_hash):
+        return os.path.join(self._objects_dir, content_hash)
+
+    def lookup(self, url):
+        """원본 URL의 썸네일이 있으면 내용 해시를, 없으면 None을 반환합니다."""
+        key = self.url_key(url)
+        with self._lock:
+            content_hash = self._refs.get(key)
+        if content_hash is None:
+            try:
+                with open(os.path.join(self._refs_dir, key), encoding="ascii") as f:
+                    content_hash = f.read().strip()
+            except OSError:
+                content_hash = None
+        with self._lock:
+            if content_hash is None or content_hash not in self._sizes:
+                self.misses += 1
+                return None
+            self._refs[key] = content_hash
+            self._sizes.move_to_end(content_hash)
+            self.hits += 1
+        try:
+            os.utime(self.object_path(content_hash)) # 다음 시작 때 LRU 순서를 복원하기 위한 마지막 사용 시각
+        except OSError:
+            pass
+        return content_hash
+
+    def store(self, url, data):
+        """원본 이미지를 썸네일로 줄여 저장하고 내용 해시를 반환합니다."""
+        thumb = downscale(data, self.size, self.quality)
+        content_hash = hashlib.sha256(thumb).hexdigest()
+        path = self.object_path(content_hash)
+        with self._lock:
+            exists = content_hash in self._sizes
+        if not exists:
+            self._write_atomic(path, thumb)
+        self._write_atomic(os.path.join(self._refs_dir, self.url_key(url)), content_hash.encode("ascii"))
+        with self._lock:
+            if content_hash not in self._sizes:
+                self._sizes[content_hash] = len(thumb)
+                self.total_bytes += len(thumb)
+                self.stored += 1
+            self._sizes.move_to_end(content_hash)
+            self._refs[self.url_key(url)] = content_hash
+            evicted = self._evict_locked()
+        for name in evicted:
+            try:
+                os.remove(self.object_path(name))
+            except OSError:
+                pass
+        return content_hash
+
+    def _write_atomic(self, path, data):
+        """임시 파일에 쓴 뒤 이름을 바꿔서, 읽는 쪽이 절반만 쓰인 파일을 보지 않도록 합니다."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _evict_locked(self):
+        """용량을 넘으면 가장 오래 사용하지 않은 파일부터 목록에서 빼고, 지울 파일 이름을 반환합니다."""
+        evicted = []
+        while self.total_bytes > self.max_bytes and len(self._sizes) > 1:
+            name, size = self._sizes.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            evicted.append(name)
+        # 지워진 파일을 가리키는 참조는 lookup()에서 미스로 처리됨
+        if evicted:
+            gone = set(evicted)
+            self._refs = {k: v for k, v in self._refs.items() if v not in gone}
+        return evicted
+
+    def read(self, content_hash):
+        """썸네일 바이트를 읽습니다. 그 사이에 지워졌으면 None."""
+        try:
+            with open(self.object_path(content_hash), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "files": len(self._sizes),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "stored": self.stored,
+                "evictions": self.evictions,
+                "downscale": Image is not None,
+            }
@@ -0,0 +1,245 @@
+import random
+import sys
+import threading
+import time
+import urllib.parse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import request_deadline
+from circuit_breaker import CircuitOpenError
+
+# 재시도 대상 HTTP 상태 코드 (일시적인 서버 오류)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class PoolSaturatedError(requests.exceptions.ConnectionError):
+    """호스트별 동시 요청 제한에 걸려 업스트림을 호출하지 못한 경우의 예외입니다. (프로세스 안의 경합이라 회로 차단기에는 실패로 기록하지 않음)"""
+
+
+class HostPool:
+    """호스트 하나에 대한 keep-alive 세션, 동시 요청 제한, 통계를 묶어 둡니다."""
+
+    def __init__(self, host, max_concurrency=10, pool_maxsize=None, verify=True):
+        self.host = host
+        self.max_concurrency = max_concurrency
+        self.session = requests.Session()
+        self.session.verify = verify
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize or max_concurrency)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.stats_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.queue_wait = 0.0
+
+    def connection_stats(self):
+        """urllib3 커넥션 풀이 기록한 새 연결 수와 요청 수로 연결 재사용률을 계산합니다."""
+        new_connections = 0
+        pooled_requests = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            new_connections += getattr(pool, "num_connections", 0)
+            pooled_requests += getattr(pool, "num_requests", 0)
+        reused = max(0, pooled_requests - new_connections)
+        return {
+            "new_connections": new_connections,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / pooled_requests, 4) if pooled_requests else 0.0,
+        }
+
+
+class UpstreamClient:
+    """
+    모든 외부 API 호출이 공유하는 프로세스 전역 HTTP 클라이언트입니다.
+    호스트별 커넥션 풀과 동시 요청 제한을 두고, 멱등 GET 요청은 지터가 들어간 지수 백오프로 재시도합니다.
+    """
+
+    def __init__(self, host_config=None, default_concurrency=10, retries=1, backoff_base=0.2, backoff_max=1.0):
+        # host_config: {호스트: {"max_concurrency": int, "verify": bool}}
+        self.host_config = host_config or {}
+        self.default_concurrency = default_concurrency
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def pool_for(self, url):
+        host = urllib.parse.urlsplit(url).hostname or ""
+        pool = self._pools.get(host)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(host)
+                if pool is None:
+                    config = self.host_config.get(host, {})
+                    pool = HostPool(
+                        host,
+                        max_concurrency=config.get("max_concurrency", self.default_concurrency),
+                        verify=config.get("verify", True),
+                    )
+                    self._pools[host] = pool
+        return pool
+
+    def backoff(self, attempt):
+        """full jitter 백오프: 0 ~ min(backoff_max, backoff_base * 2^attempt) 사이의 임의 시간."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, url, params=None, headers=None, timeout=5, retries=None, breaker=None, stream=False):
+        """
+        GET 요청을 보냅니다. 연결 오류, 타임아웃, 429/5xx 응답은 retries 횟수만큼 재시도합니다.
+        재시도 후에도 실패하면 마지막 예외를 그대로 발생시키고, 재시도 대상이 아닌 응답은 그대로 반환합니다.
+        breaker(CircuitBreaker)를 넘기면 회로가 열려 있을 때 호출 없이 CircuitOpenError를 발생시키고, 결과를 회로에 기록합니다.
+        요청 마감 시각(request_deadline)이 설정되어 있으면 timeout을 남은 시간으로 줄이고, 남은 시간이 없으면 재시도하지 않습니다.
+        stream=True면 본문을 받지 않은 응답을 반환하므로 호출한 쪽에서 iter_content()로 읽고 close()해야 합니다.
+        """
+        if breaker is None:
+            return self._get_with_retries(url, params, headers, timeout, retries, stream)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit '{breaker.name}' is open; skipping request to {url}")
+        try:
+            res = self._get_with_retries(url, params, headers, timeout, retries, stream)
+        except PoolSaturatedError:
+            # 이 프로세스의 동시 요청이 몰린 것일 뿐 업스트림은 호출하지 않았음
+            breaker.release()
+            raise
+        except requests.exceptions.Timeout as e:
+            # 요청 예산이 끝나서 생긴 타임아웃은 업스트림 장애로 보지 않음
+            if request_deadline.is_deadline_error(e):
+                breaker.release()
+            else:
+                breaker.record_failure()
+            raise
+        except requests.exceptions.RequestException:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # 업스트림 결과와 무관한 예외: 시험 호출 자리를 반납하지 않으면 회로가 계속 열린 채로 남음
+            breaker.release()
+            raise
+        if res.status_code in RETRY_STATUS_CODES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return res
+
+    def _get_with_retries(self, url, params, headers, timeout, retries, stream=False):
+        pool = self.pool_for(url)
+        retries = self.retries if retries is None else retries
+        attempt = 0
+        while True:
+            attempt_timeout = request_deadline.upstream_timeout(timeout)
+            wait_start = time.time()
+            if not pool.semaphore.acquire(timeout=attempt_timeout):
+                with pool.stats_lock:
+                    pool.errors += 1
+                raise PoolSaturatedError(f"Too many concurrent requests to {pool.host}")
+            with pool.stats_lock:
+                pool.queue_wait += time.time() - wait_start
+                pool.requests += 1
+                pool.in_flight += 1
+            try:
+                res = pool.session.get(url, params=params, headers=headers, timeout=attempt_timeout, stream=stream)
+                if res.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                    return res
+                error = requests.exceptions.HTTPError(f"{res.status_code} from {pool.host}", response=res)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+                with pool.stats_lock:
+                    pool.errors += 1
+                if attempt >= retries:
+                    raise
+            finally:
+                with pool.stats_lock:
+                    pool.in_flight -= 1
+                pool.semaphore.release()
+
+            delay = self.backoff(attempt)
+            left = request_deadline.remaining()
+            if left is not None and left < delay + request_deadline.MIN_UPSTREAM_TIMEOUT:
+                # 재시도할 시간이 남지 않았으면 마지막 결과(응답 또는 예외)를 그대로 돌려줌
+                if isinstance(error, requests.exceptions.HTTPError):
+                    return error.response
+                raise error
+            if stream and isinstance(error, requests.exceptions.HTTPError):
+                error.response.close() # 다시 시도하므로 버리는 응답의 연결은 바로 풀에 반납
+            attempt += 1
+            with pool.stats_lock:
+                pool.retries += 1
+            print(f"Retrying GET {pool.host} (attempt {attempt}/{retries}) in {delay:.2f}s after: {error}")
+            sys.stdout.flush()
+            time.sleep(delay)
+
+    def post(self, url, json=None, headers=None, timeout=5):
+        """
+        JSON 본문으로 POST 요청을 보냅니다 (카카오 콜백 응답 전송 등).
+        멱등 요청이 아니므로 재시도하지 않고, 실패하면 예외를 그대로 발생시킵니다.
+        """
+        pool = self.pool_for(url)
+        timeout = request_deadline.upstream_timeout(timeout)
+        wait_start = time.time()
+        if not pool.semaphore.acquire(timeout=timeout):
+            with pool.stats_lock:
+                pool.errors += 1
+            raise PoolSaturatedError(f"Too many concurrent requests to {pool.host}")
+        with pool.stats_lock:
+            pool.queue_wait += time.time() - wait_start
+            pool.requests += 1
+            pool.in_flight += 1
+        try:
+            return pool.session.post(url, json=json, headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            with pool.stats_lock:
+                pool.errors += 1
+            raise
+        finally:
+            with pool.stats_lock:
+                pool.in_flight -= 1
+            pool.semaphore.release()
+
+    def stats(self):
+        """호스트별 요청/오류/재시도 횟수와 연결 재사용 통계를 반환합니다."""
+        result = {}
+        for host, pool in list(self._pools.items()):
+            with pool.stats_lock:
+                stats = {
+                    "requests": pool.requests,
+                    "errors": pool.errors,
+                    "retries": pool.retries,
+                    "in_flight": pool.in_flight,
+                    "max_concurrency": pool.max_concurrency,
+                    "queue_wait_total": round(pool.queue_wait, 4),
+                }
+            stats.update(pool.connection_stats())
+            result[host] = stats
+        return result
+
+
+# 프로세스 전역 클라이언트
+# apis.data.go.kr는 에어코리아 문서를 기반으로 SSL 인증서 검증 비활성화 유지
+client = UpstreamClient(host_config={
+    "apis.data.go.kr": {"max_concurrency": 16, "verify": False},
+    "rss.donga.com": {"max_concurrency": 8},
+    "www.donga.com": {"max_concurrency": 8},
+})
+
+
+def get(url, params=None, headers=None, timeout=5, retries=None, breaker=None, stream=False):
+    """전역 클라이언트로 GET 요청을 보냅니다."""
+    return client.get(url, params=params, headers=headers, timeout=timeout, retries=retries, breaker=breaker, stream=stream)
+
+
+def post(url, json=None, headers=None, timeout=5):
+    """전역 클라이언트로 JSON POST 요청을 보냅니다."""
+    return client.post(url, json=json, headers=headers, timeout=timeout)
+
+
+def stats():
+    return client.stats()
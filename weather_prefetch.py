@@ -0,0 +1,167 @@
+"""
+기상청 초단기실황 발표 주기에 맞춘 날씨 미리 받기 스케줄러입니다.
+초단기실황 base_time은 10분마다 새로 공개되고(get_latest_base_time 참고), 캐시 키에 base_time이 들어가므로
+발표 직후 첫 사용자는 항상 기상청 응답을 기다려야 합니다.
+WeatherPrefetcher는 최근 요청 수가 많은 격자(nx, ny)를 세어 두었다가, 새 base_time이 공개된 직후
+상위 격자만 미리 조회하여 인기 지역은 항상 캐시에서 응답하도록 합니다.
+"""
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+
+class GridDemand:
+    """
+    격자별 최근 요청 수입니다. bucket_seconds 단위 카운터를 window_buckets개까지 유지하므로
+    오래된 요청(기본 24시간 이전)은 순위에서 자연스럽게 빠집니다.
+    """
+
+    def __init__(self, bucket_seconds=3600, window_buckets=24):
+        self.bucket_seconds = bucket_seconds
+        self._buckets = deque(maxlen=window_buckets) # (버킷 번호, Counter), 가장 최근 버킷이 뒤쪽
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, nx, ny, now=None):
+        bucket = int((now or time.time()) // self.bucket_seconds)
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != bucket:
+                self._buckets.append((bucket, Counter()))
+            self._buckets[-1][1][(nx, ny)] += 1
+            self.recorded += 1
+
+    def top(self, n, min_requests=1, now=None):
+        """최근 창 안에서 요청이 많은 격자 [((nx, ny), 요청 수)]를 많은 순으로 반환합니다."""
+        oldest = int((now or time.time()) // self.bucket_seconds) - self._buckets.maxlen + 1
+        totals = Counter()
+        with self._lock:
+            for bucket, counts in self._buckets:
+                if bucket >= oldest:
+                    totals.update(counts)
+        return [(cell, count) for cell, count in totals.most_common(n) if count >= min_requests]
+
+    def cells(self):
+        with self._lock:
+            return len(set().union(*(counts for _, counts in self._buckets))) if self._buckets else 0
+
+
+class WeatherPrefetcher:
+    """
+    새 base_time이 공개될 때마다 인기 격자의 초단기실황을 미리 조회합니다.
+    fetch(nx, ny, base_date, base_time) -> 관측값 dict(실패하면 빈 dict)는 캐시를 거치는 조회 함수여야 하며,
+    current_slot() -> (base_date, base_time)은 지금 조회할 수 있는 최신 발표 슬롯을 반환해야 합니다.
+    """
+
+    def __init__(self, fetch, current_slot, top_n=20, min_requests=2, concurrency=4,
+                 slot_minutes=10, publish_delay=20, demand=None):
+        self.fetch = fetch
+        self.current_slot = current_slot
+        # 기상청 API는 일일 호출 한도가 있으므로 슬롯마다 미리 받는 격자 수(top_n)를 작게 유지
+        self.top_n = top_n
+        self.min_requests = min_requests # 창 안에서 이보다 적게 요청된 격자는 미리 받지 않음
+        self.concurrency = concurrency
+        self.slot_minutes = slot_minutes
+        self.publish_delay = publish_delay # 슬롯 경계 후 이 시간(초)만큼 기다렸다가 조회 (공개 지연 대비)
+        self.demand = demand or GridDemand()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="weather-prefetch")
+        self._lock = threading.Lock()
+        self._last_slot = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.runs = 0
+        self.prefetched = 0
+        self.failed = 0
+        self.last_run = None
+
+    def record(self, nx, ny):
+        """날씨 요청 한 건을 격자 수요로 기록합니다."""
+        self.demand.record(nx, ny)
+
+    def prefetch(self, slot=None):
+        """slot(기본: 현재 발표 슬롯)에 대해 인기 격자를 미리 조회합니다. 이미 처리한 슬롯이면 None."""
+        slot = slot or self.current_slot()
+        with self._lock:
+            if self._last_slot == slot:
+                return None
+            self._last_slot = slot
+        base_date, base_time = slot
+        cells = self.demand.top(self.top_n, self.min_requests)
+        start_time = time.time()
+        futures = [self._executor.submit(self.fetch, nx, ny, base_date, base_time) for (nx, ny), _ in cells]
+        ok = failed = 0
+        for future in wait(futures)[0]:
+            try:
+                observation = future.result()
+            except Exception as e:
+                observation = None
+                print(f"Error prefetching KMA observation: {e}")
+                sys.stdout.flush()
+            # STALE 값은 기상청 조회가 실패했거나 회로가 열려 마지막 정상값으로 대신한 것
+            if observation and not observation.get("STALE"):
+                ok += 1
+            else:
+                failed += 1
+        elapsed = time.time() - start_time
+        result = {"slot": f"{base_date} {base_time}", "cells": len(cells), "prefetched": ok, "failed": failed,
+                  "elapsed": round(elapsed, 3)}
+        with self._lock:
+            self.runs += 1
+            self.prefetched += ok
+            self.failed += failed
+            self.last_run = result
+        if cells:
+            print(f"Weather prefetch for {base_date} {base_time}: {ok}/{len(cells)} grid cells in {elapsed:.2f} seconds.")
+            sys.stdout.flush()
+        return result
+
+    def seconds_until_next_slot(self, now=None):
+        """다음 발표 슬롯 경계 + publish_delay 까지 남은 초를 계산합니다."""
+        now = now or datetime.now(KST)
+        boundary = now.replace(minute=now.minute - now.minute % self.slot_minutes, second=0, microsecond=0)
+        target = boundary + timedelta(seconds=self.publish_delay)
+        if target <= now:
+            target += timedelta(minutes=self.slot_minutes)
+        return (target - now).total_seconds()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="weather-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.seconds_until_next_slot()):
+            try:
+                self.prefetch()
+            except Exception as e:
+                print(f"Error in weather prefetcher: {e}")
+                sys.stdout.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self.is_running(),
+                "top_n": self.top_n,
+                "tracked_cells": self.demand.cells(),
+                "recorded_requests": self.demand.recorded,
+                "runs": self.runs,
+                "prefetched": self.prefetched,
+                "failed": self.failed,
+                "last_run": self.last_run,
+                "top_cells": [[nx, ny, count] for (nx, ny), count in self.demand.top(10)],
+            }